@@ -24,8 +24,8 @@ def main():
     os.chdir('src')
     
     try:
-        # Executar a análise principal
-        subprocess.run([sys.executable, 'analise_lojas_joao.py'], check=True)
+        # Executar a análise principal (argumentos extras são repassados ao script)
+        subprocess.run([sys.executable, 'analise_lojas_joao.py'] + sys.argv[1:], check=True)
         
         print("\n✅ Análise concluída com sucesso!")
         print("📊 Gráficos salvos em: outputs/graficos/")
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PROJETO: Análise de Lojas do Senhor João
+EXECUÇÃO EM LOTE
+
+Analisa várias carteiras (diretórios de dados) em um único processo
+coordenador com um pool de workers; ver src/lote.py.
+
+Exemplo:
+    python run_batch.py clientes/*/ --saida outputs/lote --workers 4
+"""
+
+import os
+import sys
+
+def main():
+    raiz = os.path.dirname(os.path.abspath(__file__))
+    if not os.path.exists(os.path.join(raiz, 'src', 'lote.py')):
+        print("❌ Erro: src/lote.py não encontrado")
+        return 1
+
+    # Importa direto de src, sem subprocesso; os caminhos dos argumentos
+    # continuam relativos ao diretório atual
+    sys.path.insert(0, os.path.join(raiz, 'src'))
+    import lote
+
+    argumentos = sys.argv[1:]
+    if '--saida' not in argumentos:
+        argumentos += ['--saida', os.path.join(raiz, 'outputs', 'lote')]
+    return lote.main(argumentos)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Agregações por região e categoria calculadas em uma única passagem
+
+Um único groupby por (regiao, categoria_principal) percorre dados_lojas uma
+vez e guarda somas e contagens. As visões por região e por categoria são
+derivadas desse resultado (que tem no máximo regiões × categorias linhas),
+sem voltar aos dados das lojas. Como só há somas e contagens, a tabela pode
+ser atualizada recalculando apenas os grupos afetados por uma alteração.
+"""
+
+import pandas as pd
+
+# coluna de origem -> prefixo usado nas colunas agregadas
+METRICAS = {
+    'faturamento_mensal': 'faturamento',
+    'avaliacao_media': 'avaliacao',
+    'frete_medio': 'frete',
+    'produtos_vendidos': 'produtos',
+}
+
+
+def _derivar_medias(somas):
+    """Acrescenta as médias (soma / contagem não nula) a uma tabela de somas"""
+    resultado = somas.copy()
+    for prefixo in METRICAS.values():
+        resultado[f'{prefixo}_medio'] = resultado[f'{prefixo}_soma'] / resultado[f'{prefixo}_n']
+    return resultado
+
+
+def tabela_cruzada(dados_lojas):
+    """Somas e contagens por (regiao, categoria_principal) em uma única passagem"""
+    especificacao = {'n_lojas': ('loja_id', 'size')}
+    for coluna, prefixo in METRICAS.items():
+        especificacao[f'{prefixo}_soma'] = (coluna, 'sum')
+        especificacao[f'{prefixo}_n'] = (coluna, 'count')
+
+    cruzado = dados_lojas.groupby(['regiao', 'categoria_principal'], observed=True).agg(**especificacao)
+    # Somas de colunas float32 voltam como float32; as médias são calculadas em float64
+    return cruzado.astype({f'{p}_soma': 'float64' for p in ('faturamento', 'avaliacao', 'frete')})
+
+
+class AgregacoesLojas:
+    """Estatísticas por região, por categoria e por região × categoria
+
+    Cada tabela tem, para faturamento/avaliacao/frete/produtos, as colunas
+    <prefixo>_soma, <prefixo>_n (valores não nulos) e <prefixo>_medio, além
+    de n_lojas.
+    """
+
+    def __init__(self, dados_lojas=None, cruzado=None):
+        """Calcula todas as agregações com uma única passagem sobre dados_lojas
+
+        Alternativamente recebe a tabela cruzada de somas já calculada (cruzado).
+        """
+        if cruzado is None:
+            cruzado = tabela_cruzada(dados_lojas)
+        self.cruzado = cruzado
+        self.por_regiao_categoria = _derivar_medias(cruzado)
+        self.por_regiao = _derivar_medias(cruzado.groupby(level='regiao', observed=True).sum())
+        self.por_categoria = _derivar_medias(cruzado.groupby(level='categoria_principal', observed=True).sum())
+
+    def atualizar(self, dados_lojas, regioes, categorias):
+        """Novas agregações recalculando apenas as lojas das regiões × categorias afetadas
+
+        Os grupos (regiao, categoria) fora das regiões/categorias informadas são
+        reaproveitados da tabela cruzada atual.
+        """
+        regioes, categorias = list(regioes), list(categorias)
+        mascara = dados_lojas['regiao'].isin(regioes) & dados_lojas['categoria_principal'].isin(categorias)
+        parcial = tabela_cruzada(dados_lojas[mascara])
+
+        nivel_regiao = self.cruzado.index.get_level_values('regiao')
+        nivel_categoria = self.cruzado.index.get_level_values('categoria_principal')
+        mantidos = self.cruzado[~(nivel_regiao.isin(regioes) & nivel_categoria.isin(categorias))]
+        return AgregacoesLojas(cruzado=pd.concat([mantidos, parcial]).sort_index())
+
+    def faturamento_regiao(self):
+        """Faturamento por região no formato agg(['mean', 'sum', 'count'])"""
+        return pd.DataFrame({
+            'mean': self.por_regiao['faturamento_medio'],
+            'sum': self.por_regiao['faturamento_soma'],
+            'count': self.por_regiao['faturamento_n'],
+        })
+
+    def lojas_por_categoria(self):
+        """Quantidade de lojas por categoria, da maior para a menor (como value_counts)"""
+        return self.por_categoria['n_lojas'].sort_values(ascending=False, kind='stable').rename('count')
+
+    def lojas_por_regiao(self):
+        """Quantidade de lojas por região, da maior para a menor (como value_counts)"""
+        return self.por_regiao['n_lojas'].sort_values(ascending=False, kind='stable').rename('count')
+
+    def estatisticas_regionais(self):
+        """Médias de faturamento, avaliação e frete por região"""
+        return self.por_regiao[['faturamento_medio', 'avaliacao_medio', 'frete_medio']].rename(columns={
+            'faturamento_medio': 'faturamento_mensal',
+            'avaliacao_medio': 'avaliacao_media',
+            'frete_medio': 'frete_medio',
+        })
@@ -1,391 +1,752 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
-from matplotlib.patches import Patch
+import argparse
+import os
 import warnings
+import pandas as pd
+import graficos
+import pontuacao
+import incremental
+from agregacoes import AgregacoesLojas
+from produtos import IndiceProdutos
+import espacial
+import relatorio
+import series_mensais
+import instrumentacao
+from instrumentacao import etapa_instrumentada
+from carregamento import (ESQUEMA_LOJAS, ESQUEMA_PRODUTOS, ESQUEMA_PRODUTOS_POR_LOJA,
+                          COLUNAS_AGREGACAO_PRODUTOS, ler_csv_padrao, ler_csv_tipado,
+                          agregar_produtos_em_blocos, imprimir_metricas_carga)
+from cache_colunar import carregar_com_cache, cache_disponivel
 warnings.filterwarnings('ignore')
 
-# Configurações de estilo
-plt.style.use('default')
-sns.set_theme()
-plt.rcParams['figure.figsize'] = (12, 8)
-plt.rcParams['font.size'] = 10
+MODOS_CARGA = ('padrao', 'tipado', 'streaming')
 
 class AnaliseLojasJoao:
-    def __init__(self):
-        """Inicializa a classe de análise das lojas"""
-        self.dados_lojas = None
-        self.produtos_detalhados = None
+    def __init__(self, modo_carga='padrao', tamanho_bloco=None, usar_cache=True,
+                 modo_batch=False, dpi=graficos.DPI_PADRAO, formato='png',
+                 diretorio_dados='../data', diretorio_graficos=graficos.DIRETORIO_GRAFICOS,
+                 reutilizar_graficos=True, historico=None, rastreador=None):
+        """Inicializa a classe de análise das lojas
+
+        modo_carga: 'padrao' (read_csv com tipos inferidos), 'tipado' (esquema
+        explícito com categorias e numéricos reduzidos) ou 'streaming' (tipado,
+        com produtos_detalhados lido em blocos e agregado por loja_id).
+        usar_cache: reutiliza a cópia colunar (Feather) dos CSVs enquanto eles
+        não mudarem (requer pyarrow; sem ele os CSVs são sempre lidos).
+        modo_batch: execução sem interface (backend Agg, sem plt.show()).
+        dpi / formato: resolução e formato ('png', 'svg', 'webp') dos gráficos.
+        diretorio_dados / diretorio_graficos: onde ler dados_lojas.csv e
+        produtos_detalhados.csv e onde gravar os gráficos.
+        reutilizar_graficos: no modo batch, não renderiza de novo um gráfico cujo
+        arquivo foi gerado com as mesmas entradas e configurações
+        (manifesto_graficos.json). Fora do modo batch os gráficos são sempre
+        desenhados, para serem exibidos.
+        historico: diretório (com arquivos dados_lojas_AAAA-MM.csv) ou padrão glob
+        dos arquivos mensais; dados_lojas passa a ser o mês mais recente e o
+        histórico completo fica em self.historico (ver analise_temporal).
+        rastreador: instrumentacao.Rastreador que mede as etapas públicas e
+        subetapas (leitura, agregações, entradas, desenho e savefig dos
+        gráficos); sem ele nada é medido.
+        """
+        if modo_carga not in MODOS_CARGA:
+            raise ValueError(f"modo_carga deve ser um de {MODOS_CARGA}, recebido: {modo_carga!r}")
+        if formato not in graficos.FORMATOS_SAIDA:
+            raise ValueError(f"formato deve ser um de {graficos.FORMATOS_SAIDA}, recebido: {formato!r}")
+        self.modo_carga = modo_carga
+        self.tamanho_bloco = tamanho_bloco
+        self.usar_cache = usar_cache
+        self.diretorio_dados = diretorio_dados
+        self.diretorio_graficos = diretorio_graficos
+        self.modo_batch = modo_batch
+        self.dpi = dpi
+        self.formato = formato
+        self.reutilizar_graficos = reutilizar_graficos
+        self.metricas_graficos = []
+        self.criterios_score = pontuacao.CRITERIOS_PADRAO
+        if modo_batch:
+            graficos.usar_backend_nao_interativo()
+        self._dados_lojas = None
+        self._agregacoes = None
+        self._resumo_dados = None
+        self._indices_espaciais = {}
+        self._produtos_detalhados = None
+        self._indice_produtos = None
+        self.produtos_por_loja = None
+        self.metricas_carga = []
+        self.origem_historico = historico
+        self.historico = None
+        self.rastreador = rastreador if rastreador is not None else instrumentacao.INATIVO
         self.load_data()
         
+    @property
+    def dados_lojas(self):
+        """DataFrame das lojas; atribuir um novo DataFrame invalida as agregações, o resumo e os índices"""
+        return self._dados_lojas
+
+    @dados_lojas.setter
+    def dados_lojas(self, valor):
+        self._dados_lojas = valor
+        self._agregacoes = None
+        self._resumo_dados = None
+        self._indices_espaciais = {}
+
+    @property
+    def agregacoes(self):
+        """Agregações por região/categoria, calculadas uma vez e reutilizadas"""
+        if self._agregacoes is None:
+            with self.rastreador.etapa('agregacoes', categoria='subetapa'):
+                self._agregacoes = AgregacoesLojas(self.dados_lojas)
+        return self._agregacoes
+
+    @property
+    def produtos_detalhados(self):
+        """DataFrame dos produtos; atribuir um novo DataFrame invalida o índice por loja"""
+        return self._produtos_detalhados
+
+    @produtos_detalhados.setter
+    def produtos_detalhados(self, valor):
+        self._produtos_detalhados = valor
+        self._indice_produtos = None
+
+    @property
+    def indice_produtos(self):
+        """Índice de produtos_detalhados por loja_id, construído uma vez"""
+        if self._indice_produtos is None:
+            if self.produtos_detalhados is None:
+                raise ValueError("produtos_detalhados não está carregado "
+                                 "(o modo 'streaming' guarda apenas o agregado por loja)")
+            self._indice_produtos = IndiceProdutos(self.produtos_detalhados)
+        return self._indice_produtos
+
+    def indice_espacial(self, tamanho_celula_km=50.0):
+        """Índice espacial das coordenadas das lojas, reutilizado para o mesmo tamanho de célula"""
+        chave = float(tamanho_celula_km)
+        if chave not in self._indices_espaciais:
+            self._indices_espaciais[chave] = espacial.IndiceEspacial(
+                self.dados_lojas['lat'], self.dados_lojas['lon'], tamanho_celula_km)
+        return self._indices_espaciais[chave]
+
+    @etapa_instrumentada
+    def features_vizinhanca(self, raio_km=50.0, adicionar=False):
+        """Concorrência ao redor de cada loja (vizinhos no raio, faturamento médio deles, mais próxima)
+
+        adicionar=True grava as colunas em dados_lojas, para uso como critérios
+        do score (ex.: {'coluna': 'n_vizinhos', 'peso': 0.1, 'normalizacao':
+        'minmax', 'maior_melhor': False}).
+        """
+        features = espacial.features_vizinhanca(self.dados_lojas, raio_km, self.indice_espacial(raio_km))
+        if adicionar:
+            for coluna in features.columns:
+                self.dados_lojas[coluna] = features[coluna]
+        return features
+
+    def invalidar_agregacoes(self):
+        """Descarta as agregações e o resumo memorizados (usar após alterar dados_lojas no lugar)"""
+        self._agregacoes = None
+        self._resumo_dados = None
+
+    @etapa_instrumentada
     def load_data(self):
         """Carrega os dados dos arquivos CSV"""
+        caminho_lojas = os.path.join(self.diretorio_dados, 'dados_lojas.csv')
+        caminho_produtos = os.path.join(self.diretorio_dados, 'produtos_detalhados.csv')
+        def ler(caminho, leitor, esquema=None):
+            with self.rastreador.etapa('ler_csv', categoria='subetapa', arquivo=caminho):
+                if not self.usar_cache:
+                    return leitor()
+                return carregar_com_cache(caminho, leitor, chave=self.modo_carga, esquema=esquema)
+
+        def ler_lojas(caminho):
+            if self.modo_carga == 'padrao':
+                return ler(caminho, lambda: ler_csv_padrao(caminho))
+            return ler(caminho, lambda: ler_csv_tipado(caminho, ESQUEMA_LOJAS), ESQUEMA_LOJAS)
+
         try:
-            self.dados_lojas = pd.read_csv('../data/dados_lojas.csv')
-            self.produtos_detalhados = pd.read_csv('../data/produtos_detalhados.csv')
+            if self.origem_historico is not None:
+                # Um arquivo por mês; dados_lojas é o retrato do mês mais recente
+                arquivos = series_mensais.listar_arquivos_mensais(self.origem_historico)
+                lidos = [ler_lojas(caminho) for _, caminho in arquivos]
+                self.historico = series_mensais.empilhar_meses([frame for frame, _ in lidos],
+                                                               [mes for mes, _ in arquivos])
+                self.dados_lojas = series_mensais.ultimo_mes(self.historico)
+                metricas_lojas = [metricas for _, metricas in lidos]
+            else:
+                self.dados_lojas, m_lojas = ler_lojas(caminho_lojas)
+                metricas_lojas = [m_lojas]
+            if self.modo_carga == 'padrao':
+                self.produtos_detalhados, m_produtos = ler(
+                    caminho_produtos, lambda: ler_csv_padrao(caminho_produtos))
+            elif self.modo_carga == 'tipado':
+                self.produtos_detalhados, m_produtos = ler(
+                    caminho_produtos, lambda: ler_csv_tipado(caminho_produtos, ESQUEMA_PRODUTOS),
+                    ESQUEMA_PRODUTOS)
+            else:
+                argumentos = {'tamanho_bloco': self.tamanho_bloco} if self.tamanho_bloco else {}
+                self.produtos_por_loja, m_produtos = ler(
+                    caminho_produtos, lambda: agregar_produtos_em_blocos(caminho_produtos, **argumentos),
+                    {'colunas': COLUNAS_AGREGACAO_PRODUTOS, 'entrada': ESQUEMA_PRODUTOS,
+                     'saida': ESQUEMA_PRODUTOS_POR_LOJA, 'indice': 'loja_id'})
+            self.metricas_carga = metricas_lojas + [m_produtos]
             print("✅ Dados carregados com sucesso!")
             print(f"📊 Total de lojas: {len(self.dados_lojas)}")
-            print(f"📦 Total de produtos detalhados: {len(self.produtos_detalhados)}")
+            if self.historico is not None:
+                meses = self.historico['mes']
+                print(f"📅 Histórico: {meses.nunique()} meses ({meses.min()} a {meses.max()}), "
+                      f"{len(self.historico)} registros loja × mês")
+            total_produtos = (len(self.produtos_detalhados) if self.produtos_detalhados is not None
+                              else int(self.produtos_por_loja['n_produtos'].sum()))
+            print(f"📦 Total de produtos detalhados: {total_produtos}")
+            if self.usar_cache and not cache_disponivel():
+                print("💡 Instale pyarrow para ativar o cache colunar dos CSVs")
+            if self.modo_carga != 'padrao' or self.usar_cache:
+                imprimir_metricas_carga(self.metricas_carga)
         except FileNotFoundError as e:
             print(f"❌ Erro ao carregar dados: {e}")
-            print("💡 Certifique-se de que os arquivos CSV estão na pasta 'data/'")
+            print(f"💡 Certifique-se de que os arquivos CSV estão na pasta '{self.diretorio_dados}'")
+        except ValueError as e:
+            # Valor incompatível com o esquema explícito (ex.: texto em coluna numérica)
+            print(f"❌ Erro ao interpretar os dados no modo '{self.modo_carga}': {e}")
+            print("💡 Corrija o CSV ou use --modo-carga padrao (tipos inferidos)")
             
+    @etapa_instrumentada
     def explorar_dados(self):
-        """Exibe informações básicas sobre os dados"""
+        """Exibe informações básicas sobre os dados (o mesmo resumo de resumo_dados)"""
+        resumo = self.resumo_dados()
         print("\n" + "="*50)
         print("📋 EXPLORAÇÃO INICIAL DOS DADOS")
         print("="*50)
         
         print("\n📈 Informações das Lojas:")
-        print(self.dados_lojas.info())
+        print(f"   {resumo['n_lojas']} lojas, {len(resumo['tipos'])} colunas")
+        for coluna, tipo in resumo['tipos'].items():
+            print(f"   {coluna:<22} {tipo:<10} {resumo['nao_nulos'][coluna]} não nulos")
         
         print("\n📊 Estatísticas Descritivas - Faturamento:")
-        print(self.dados_lojas[['faturamento_mensal', 'produtos_vendidos', 'avaliacao_media', 'frete_medio']].describe())
+        print(pd.DataFrame(resumo['estatisticas']))
         
         print("\n🏪 Distribuição por Região:")
-        print(self.dados_lojas['regiao'].value_counts())
+        for regiao, n_lojas in resumo['lojas_por_regiao'].items():
+            print(f"   {regiao:<22} {n_lojas}")
         
         print("\n🛍️ Distribuição por Categoria:")
-        print(self.dados_lojas['categoria_principal'].value_counts())
+        for categoria, n_lojas in resumo['lojas_por_categoria'].items():
+            print(f"   {categoria:<22} {n_lojas}")
         
+    @etapa_instrumentada
+    def calcular_score_performance(self, criterios=None):
+        """Calcula o score de performance de cada loja (coluna score_performance)
+
+        O score é usado pelo ranking (gráfico 6) e por gerar_recomendacoes, por
+        isso é calculado aqui, explicitamente, e não como efeito colateral do gráfico.
+        criterios: especificação de pontuacao (padrão: 40% faturamento, 30%
+        avaliação, 30% frete invertido).
+        """
+        if criterios is not None:
+            self.criterios_score = criterios
+        self.dados_lojas['score_performance'] = pontuacao.score_performance(self.dados_lojas, self.criterios_score)
+        return self.dados_lojas['score_performance']
+
+    @etapa_instrumentada
+    def simular_cenarios(self, cenarios, criterios=None):
+        """Melhor loja para cada cenário de pesos (análise de sensibilidade da recomendação)
+
+        cenarios: array (cenários × critérios), DataFrame com uma coluna por
+        critério ou quantidade de cenários aleatórios a gerar.
+        """
+        criterios = criterios if criterios is not None else self.criterios_score
+        if isinstance(cenarios, int):
+            cenarios = pontuacao.cenarios_aleatorios(cenarios, criterios)
+        pesos = pontuacao.matriz_pesos(cenarios, criterios)
+        posicoes, scores = pontuacao.melhor_por_cenario(self.dados_lojas, pesos, criterios)
+        resultado = pd.DataFrame(pesos, columns=[f"peso_{c['coluna']}" for c in criterios])
+        resultado['loja_id'] = self.dados_lojas['loja_id'].to_numpy()[posicoes]
+        resultado['nome_loja'] = self.dados_lojas['nome_loja'].to_numpy()[posicoes]
+        resultado['score'] = scores
+        return resultado
+
+    def _garantir_score_performance(self):
+        """Calcula o score de performance se ainda não existir"""
+        if 'score_performance' not in self.dados_lojas.columns:
+            self.calcular_score_performance()
+
+    def _entradas_grafico(self, nome):
+        """Prepara apenas os dados agregados de que o gráfico `nome` precisa
+
+        O resultado é pequeno e serializável, para poder ser enviado a outro processo.
+        Acima de graficos.LIMITE_LOJAS_DETALHADO lojas, os gráficos por loja recebem
+        top-N + demais lojas, uma amostra ou uma grade de densidade.
+        """
+        lojas = self.dados_lojas
+        detalhado = graficos.modo_detalhado(len(lojas))
+        if nome == 'grafico_faturamento_por_loja':
+            dados = lojas[['nome_loja', 'faturamento_mensal']]
+            if detalhado:
+                return {'dados_ordenados': dados.sort_values('faturamento_mensal', ascending=True)}
+            return {'dados_ordenados': graficos.top_n_com_demais(dados, 'faturamento_mensal'),
+                    'total_lojas': len(lojas)}
+        if nome == 'grafico_categoria_vendas':
+            return {
+                'faturamento_categoria': self.agregacoes.por_categoria['faturamento_soma'],
+                'categoria_count': self.agregacoes.lojas_por_categoria(),
+            }
+        if nome == 'grafico_avaliacao_vs_faturamento':
+            dados = lojas[['avaliacao_media', 'faturamento_mensal', 'regiao']]
+            if detalhado:
+                return {'dados': dados}
+            if len(dados) > graficos.AMOSTRA_DISPERSAO:
+                dados_grafico = dados.sample(graficos.AMOSTRA_DISPERSAO, random_state=0)
+            else:
+                dados_grafico = dados
+            return {
+                'dados': dados_grafico,
+                'tendencia': series_mensais.tendencia_linear(dados['avaliacao_media'], dados['faturamento_mensal']),
+                'correlacao': dados['avaliacao_media'].corr(dados['faturamento_mensal']),
+                'total_lojas': len(lojas),
+            }
+        if nome == 'mapa_geografico_vendas':
+            dados = lojas[['lon', 'lat', 'faturamento_mensal', 'avaliacao_media']]
+            if detalhado:
+                return {'dados': dados}
+            return {'densidade': graficos.densidade_geografica(dados)}
+        if nome == 'analise_regional_completa':
+            por_regiao = self.agregacoes.por_regiao
+            return {
+                'faturamento_regiao': self.agregacoes.faturamento_regiao(),
+                'avaliacao_regiao': por_regiao['avaliacao_medio'],
+                'frete_regiao': por_regiao['frete_medio'],
+                'produtos_regiao': por_regiao['produtos_soma'],
+            }
+        if nome == 'ranking_lojas_performance':
+            self._garantir_score_performance()
+            dados = lojas[['nome_loja', 'regiao', 'score_performance']]
+            if detalhado:
+                return {'dados_ranking': dados.sort_values('score_performance', ascending=True)}
+            return {'dados_ranking': graficos.top_n_com_demais(dados, 'score_performance'),
+                    'total_lojas': len(lojas)}
+        raise KeyError(f"Gráfico desconhecido: {nome}")
+
+    def _caminho_grafico(self, nome):
+        """Caminho de saída do gráfico com o diretório e formato configurados"""
+        return graficos.caminho_grafico(nome, self.diretorio_graficos, self.formato)
+
+    def _planejar_grafico(self, nome, manifesto):
+        """Entradas, caminho e hash do gráfico, e se o arquivo existente pode ser reutilizado"""
+        with self.rastreador.etapa(f'{nome}.entradas', categoria='grafico'):
+            argumentos = self._entradas_grafico(nome)
+        caminho = self._caminho_grafico(nome)
+        with self.rastreador.etapa(f'{nome}.hash', categoria='grafico'):
+            hash_atual = graficos.hash_grafico(nome, argumentos, self.dpi, self.formato)
+        # Fora do modo batch o gráfico é exibido, então precisa ser desenhado
+        reutilizar = (self.reutilizar_graficos and self.modo_batch
+                      and graficos.grafico_atualizado(manifesto, caminho, hash_atual))
+        return argumentos, caminho, hash_atual, reutilizar
+
+    def _renderizar(self, nome):
+        """Renderiza um único gráfico no processo atual (e o exibe fora do modo batch)
+
+        No modo batch, se o arquivo já foi gerado com as mesmas entradas e
+        configurações, nada é desenhado.
+        """
+        manifesto = graficos.carregar_manifesto(self.diretorio_graficos)
+        argumentos, caminho, hash_atual, reutilizar = self._planejar_grafico(nome, manifesto)
+        if reutilizar:
+            metricas = graficos.metricas_reutilizado(nome, caminho, manifesto[os.path.basename(caminho)])
+            self.metricas_graficos.append(metricas)
+            return metricas
+        metricas = graficos.renderizar_grafico(nome, argumentos, caminho, dpi=self.dpi, fechar=self.modo_batch)
+        self.rastreador.registrar_grafico(metricas)
+        if not self.modo_batch:
+            fig = metricas.pop('figura')
+            plt = graficos.carregar_matplotlib()
+            plt.show()
+            plt.close(fig)
+        graficos.registrar_no_manifesto(manifesto, metricas, hash_atual)
+        graficos.salvar_manifesto(manifesto, self.diretorio_graficos)
+        self.metricas_graficos.append(metricas)
+        return metricas
+
+    @etapa_instrumentada
     def grafico_faturamento_por_loja(self):
         """Gráfico 1: Faturamento por loja (Gráfico de Barras)"""
-        fig, ax = plt.subplots(figsize=(15, 8))
-        
-        # Ordenar por faturamento
-        dados_ordenados = self.dados_lojas.sort_values('faturamento_mensal', ascending=True)
-        
-        bars = ax.barh(dados_ordenados['nome_loja'], dados_ordenados['faturamento_mensal'], 
-                       color=sns.color_palette("viridis", len(dados_ordenados)))
-        
-        # Adicionar valores nas barras
-        for i, bar in enumerate(bars):
-            width = bar.get_width()
-            ax.text(width + 2000, bar.get_y() + bar.get_height()/2, 
-                   f'R$ {width:,.0f}', ha='left', va='center', fontweight='bold')
-        
-        ax.set_xlabel('Faturamento Mensal (R$)', fontsize=12, fontweight='bold')
-        ax.set_ylabel('Lojas', fontsize=12, fontweight='bold')
-        ax.set_title('💰 Faturamento Mensal por Loja\n(Ordenado do menor para o maior)', 
-                    fontsize=14, fontweight='bold', pad=20)
-        
-        # Formatação do eixo x
-        ax.ticklabel_format(style='plain', axis='x')
-        ax.grid(axis='x', alpha=0.3)
-        
-        plt.tight_layout()
-        plt.savefig('../outputs/graficos/grafico_1_faturamento_por_loja.png', dpi=300, bbox_inches='tight')
-        plt.show()
-        
+        self._renderizar('grafico_faturamento_por_loja')
+
+    @etapa_instrumentada
     def grafico_categoria_vendas(self):
         """Gráfico 2: Participação das categorias no faturamento total (Gráfico de Pizza)"""
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(18, 8))
-        
-        # Gráfico de Pizza - Faturamento por Categoria
-        faturamento_categoria = self.dados_lojas.groupby('categoria_principal')['faturamento_mensal'].sum()
-        
-        colors = plt.cm.Set3(np.linspace(0, 1, len(faturamento_categoria)))
-        wedges, texts, autotexts = ax1.pie(faturamento_categoria.values, 
-                                          labels=faturamento_categoria.index,
-                                          autopct='%1.1f%%',
-                                          colors=colors,
-                                          explode=[0.05 if cat == faturamento_categoria.idxmax() else 0 
-                                                  for cat in faturamento_categoria.index],
-                                          shadow=True,
-                                          startangle=90)
-        
-        ax1.set_title('🏪 Participação das Categorias no Faturamento Total', 
-                     fontsize=14, fontweight='bold', pad=20)
-        
-        # Melhorar a aparência dos textos
-        for autotext in autotexts:
-            autotext.set_color('white')
-            autotext.set_fontweight('bold')
-            autotext.set_fontsize(10)
-        
-        # Gráfico de Barras - Quantidade de Lojas por Categoria
-        categoria_count = self.dados_lojas['categoria_principal'].value_counts()
-        bars = ax2.bar(categoria_count.index, categoria_count.values, 
-                       color=sns.color_palette("husl", len(categoria_count)))
-        
-        ax2.set_title('📊 Quantidade de Lojas por Categoria', 
-                     fontsize=14, fontweight='bold', pad=20)
-        ax2.set_xlabel('Categoria', fontsize=12, fontweight='bold')
-        ax2.set_ylabel('Número de Lojas', fontsize=12, fontweight='bold')
-        
-        # Adicionar valores nas barras
-        for bar in bars:
-            height = bar.get_height()
-            ax2.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                    f'{int(height)}', ha='center', va='bottom', fontweight='bold')
-        
-        ax2.grid(axis='y', alpha=0.3)
-        plt.xticks(rotation=45)
-        
-        plt.tight_layout()
-        plt.savefig('../outputs/graficos/grafico_2_categorias_vendas.png', dpi=300, bbox_inches='tight')
-        plt.show()
-        
+        self._renderizar('grafico_categoria_vendas')
+
+    @etapa_instrumentada
     def grafico_avaliacao_vs_faturamento(self):
         """Gráfico 3: Correlação entre Avaliação e Faturamento (Gráfico de Dispersão)"""
-        fig, ax = plt.subplots(figsize=(14, 8))
-        
-        # Criar o scatter plot com cores por região
-        regioes = self.dados_lojas['regiao'].unique()
-        colors = plt.cm.tab10(np.linspace(0, 1, len(regioes)))
-        
-        for i, regiao in enumerate(regioes):
-            dados_regiao = self.dados_lojas[self.dados_lojas['regiao'] == regiao]
-            ax.scatter(dados_regiao['avaliacao_media'], dados_regiao['faturamento_mensal'],
-                      c=[colors[i]], label=regiao, s=100, alpha=0.7, edgecolors='black', linewidth=1)
-        
-        # Adicionar linha de tendência
-        z = np.polyfit(self.dados_lojas['avaliacao_media'], self.dados_lojas['faturamento_mensal'], 1)
-        p = np.poly1d(z)
-        ax.plot(self.dados_lojas['avaliacao_media'], p(self.dados_lojas['avaliacao_media']), 
-                "r--", alpha=0.8, linewidth=2, label='Linha de Tendência')
-        
-        # Calcular correlação
-        correlacao = self.dados_lojas['avaliacao_media'].corr(self.dados_lojas['faturamento_mensal'])
-        
-        ax.set_xlabel('Avaliação Média (⭐)', fontsize=12, fontweight='bold')
-        ax.set_ylabel('Faturamento Mensal (R$)', fontsize=12, fontweight='bold')
-        ax.set_title(f'⭐ Correlação entre Avaliação e Faturamento\n(Correlação: {correlacao:.3f})', 
-                    fontsize=14, fontweight='bold', pad=20)
-        
-        ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
-        ax.grid(True, alpha=0.3)
-        
-        # Formatação do eixo y
-        ax.ticklabel_format(style='plain', axis='y')
-        
-        plt.tight_layout()
-        plt.savefig('../outputs/graficos/grafico_3_avaliacao_vs_faturamento.png', dpi=300, bbox_inches='tight')
-        plt.show()
-        
+        self._renderizar('grafico_avaliacao_vs_faturamento')
+
+    @etapa_instrumentada
     def mapa_geografico_vendas(self):
         """Gráfico 4: Mapa de Vendas por Localização Geográfica"""
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(20, 8))
-        
-        # Mapa de Dispersão - Faturamento por Localização
-        scatter = ax1.scatter(self.dados_lojas['lon'], self.dados_lojas['lat'], 
-                             c=self.dados_lojas['faturamento_mensal'],
-                             s=self.dados_lojas['faturamento_mensal']/1000,
-                             cmap='viridis', alpha=0.7, edgecolors='black', linewidth=1)
-        
-        ax1.set_xlabel('Longitude', fontsize=12, fontweight='bold')
-        ax1.set_ylabel('Latitude', fontsize=12, fontweight='bold')
-        ax1.set_title('🗺️ Distribuição Geográfica do Faturamento\n(Tamanho do ponto = Faturamento)', 
-                     fontsize=14, fontweight='bold', pad=20)
-        
-        # Adicionar colorbar
-        cbar1 = plt.colorbar(scatter, ax=ax1, shrink=0.8)
-        cbar1.set_label('Faturamento (R$)', fontweight='bold')
-        
-        # Mapa de Dispersão - Avaliação por Localização
-        scatter2 = ax2.scatter(self.dados_lojas['lon'], self.dados_lojas['lat'], 
-                              c=self.dados_lojas['avaliacao_media'],
-                              s=200, cmap='RdYlGn', alpha=0.7, edgecolors='black', linewidth=1)
-        
-        ax2.set_xlabel('Longitude', fontsize=12, fontweight='bold')
-        ax2.set_ylabel('Latitude', fontsize=12, fontweight='bold')
-        ax2.set_title('⭐ Distribuição Geográfica das Avaliações', 
-                     fontsize=14, fontweight='bold', pad=20)
-        
-        # Adicionar colorbar
-        cbar2 = plt.colorbar(scatter2, ax=ax2, shrink=0.8)
-        cbar2.set_label('Avaliação Média', fontweight='bold')
-        
-        plt.tight_layout()
-        plt.savefig('../outputs/graficos/grafico_4_mapa_geografico.png', dpi=300, bbox_inches='tight')
-        plt.show()
-        
+        self._renderizar('mapa_geografico_vendas')
+
+    @etapa_instrumentada
     def analise_regional_completa(self):
         """Gráfico 5: Análise Completa por Região"""
-        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(18, 12))
-        
-        # 1. Faturamento Médio por Região
-        faturamento_regiao = self.dados_lojas.groupby('regiao')['faturamento_mensal'].agg(['mean', 'sum', 'count'])
-        
-        bars1 = ax1.bar(faturamento_regiao.index, faturamento_regiao['mean'], 
-                       color=sns.color_palette("viridis", len(faturamento_regiao)))
-        ax1.set_title('💰 Faturamento Médio por Região', fontweight='bold', fontsize=12)
-        ax1.set_ylabel('Faturamento Médio (R$)', fontweight='bold')
-        ax1.tick_params(axis='x', rotation=45)
-        
-        for bar in bars1:
-            height = bar.get_height()
-            ax1.text(bar.get_x() + bar.get_width()/2., height + 1000,
-                    f'R$ {height:,.0f}', ha='center', va='bottom', fontweight='bold', fontsize=9)
-        
-        # 2. Avaliação Média por Região
-        avaliacao_regiao = self.dados_lojas.groupby('regiao')['avaliacao_media'].mean()
-        bars2 = ax2.bar(avaliacao_regiao.index, avaliacao_regiao.values, 
-                       color=sns.color_palette("plasma", len(avaliacao_regiao)))
-        ax2.set_title('⭐ Avaliação Média por Região', fontweight='bold', fontsize=12)
-        ax2.set_ylabel('Avaliação Média', fontweight='bold')
-        ax2.tick_params(axis='x', rotation=45)
-        ax2.set_ylim(3.5, 5.0)
-        
-        for bar in bars2:
-            height = bar.get_height()
-            ax2.text(bar.get_x() + bar.get_width()/2., height + 0.02,
-                    f'{height:.2f}', ha='center', va='bottom', fontweight='bold', fontsize=9)
-        
-        # 3. Frete Médio por Região
-        frete_regiao = self.dados_lojas.groupby('regiao')['frete_medio'].mean()
-        bars3 = ax3.bar(frete_regiao.index, frete_regiao.values, 
-                       color=sns.color_palette("coolwarm", len(frete_regiao)))
-        ax3.set_title('🚚 Frete Médio por Região', fontweight='bold', fontsize=12)
-        ax3.set_ylabel('Frete Médio (R$)', fontweight='bold')
-        ax3.tick_params(axis='x', rotation=45)
-        
-        for bar in bars3:
-            height = bar.get_height()
-            ax3.text(bar.get_x() + bar.get_width()/2., height + 0.2,
-                    f'R$ {height:.2f}', ha='center', va='bottom', fontweight='bold', fontsize=9)
-        
-        # 4. Produtos Vendidos por Região
-        produtos_regiao = self.dados_lojas.groupby('regiao')['produtos_vendidos'].sum()
-        bars4 = ax4.bar(produtos_regiao.index, produtos_regiao.values, 
-                       color=sns.color_palette("Set2", len(produtos_regiao)))
-        ax4.set_title('📦 Total de Produtos Vendidos por Região', fontweight='bold', fontsize=12)
-        ax4.set_ylabel('Produtos Vendidos', fontweight='bold')
-        ax4.tick_params(axis='x', rotation=45)
-        
-        for bar in bars4:
-            height = bar.get_height()
-            ax4.text(bar.get_x() + bar.get_width()/2., height + 50,
-                    f'{int(height)}', ha='center', va='bottom', fontweight='bold', fontsize=9)
-        
-        plt.suptitle('📊 ANÁLISE COMPLETA POR REGIÃO', fontsize=16, fontweight='bold', y=0.98)
-        plt.tight_layout()
-        plt.savefig('../outputs/graficos/grafico_5_analise_regional.png', dpi=300, bbox_inches='tight')
-        plt.show()
-        
+        self._renderizar('analise_regional_completa')
+
+    @etapa_instrumentada
     def ranking_lojas_performance(self):
         """Gráfico 6: Ranking de Performance das Lojas"""
-        # Criar score de performance baseado em múltiplos fatores
-        self.dados_lojas['score_performance'] = (
-            (self.dados_lojas['faturamento_mensal'] / self.dados_lojas['faturamento_mensal'].max() * 0.4) +
-            (self.dados_lojas['avaliacao_media'] / 5.0 * 0.3) +
-            ((self.dados_lojas['frete_medio'].max() - self.dados_lojas['frete_medio']) / self.dados_lojas['frete_medio'].max() * 0.3)  # Inverso do frete (menor é melhor)
-        )
-        
-        fig, ax = plt.subplots(figsize=(16, 10))
-        
-        # Ordenar por score de performance
-        dados_ranking = self.dados_lojas.sort_values('score_performance', ascending=True)
-        
-        # Criar cores baseadas na região
-        region_colors = {'Sudeste': '#1f77b4', 'Nordeste': '#ff7f0e', 'Sul': '#2ca02c', 
-                        'Centro-Oeste': '#d62728', 'Norte': '#9467bd'}
-        colors = [region_colors[region] for region in dados_ranking['regiao']]
-        
-        bars = ax.barh(range(len(dados_ranking)), dados_ranking['score_performance'], 
-                       color=colors, alpha=0.8, edgecolor='black', linewidth=0.5)
-        
-        # Personalizar eixos
-        ax.set_yticks(range(len(dados_ranking)))
-        ax.set_yticklabels(dados_ranking['nome_loja'], fontsize=10)
-        ax.set_xlabel('Score de Performance', fontsize=12, fontweight='bold')
-        ax.set_title('🏆 RANKING DE PERFORMANCE DAS LOJAS\n(Baseado em Faturamento, Avaliação e Frete)', 
-                    fontsize=14, fontweight='bold', pad=20)
-        
-        # Adicionar valores nas barras
-        for i, bar in enumerate(bars):
-            width = bar.get_width()
-            ax.text(width + 0.01, bar.get_y() + bar.get_height()/2, 
-                   f'{width:.3f}', ha='left', va='center', fontweight='bold', fontsize=9)
-        
-        # Adicionar legenda das regiões
-        legend_elements = [Patch(facecolor=color, label=region) 
-                          for region, color in region_colors.items()]
-        ax.legend(handles=legend_elements, loc='lower right', title='Regiões', title_fontsize=12)
-        
-        ax.grid(axis='x', alpha=0.3)
-        plt.tight_layout()
-        plt.savefig('../outputs/graficos/grafico_6_ranking_performance.png', dpi=300, bbox_inches='tight')
-        plt.show()
-        
-    def gerar_relatorio_completo(self):
-        """Gera todas as análises e recomendações"""
+        self._garantir_score_performance()
+        self._renderizar('ranking_lojas_performance')
+
+    @etapa_instrumentada
+    def gerar_relatorio_completo(self, jobs=1):
+        """Gera todas as análises e recomendações
+
+        jobs > 1 renderiza os gráficos em paralelo, um processo (backend Agg)
+        por gráfico, gerando os mesmos arquivos do modo sequencial.
+        """
         print("\n" + "="*70)
         print("🏪 ANÁLISE COMPLETA DAS LOJAS - SENHOR JOÃO")
         print("="*70)
         
         # Explorar dados
         self.explorar_dados()
+
+        # O score precisa existir antes do ranking e das recomendações
+        self.calcular_score_performance()
         
         # Gerar todos os gráficos
-        print("\n📈 Gerando visualizações...")
-        self.grafico_faturamento_por_loja()
-        self.grafico_categoria_vendas()
-        self.grafico_avaliacao_vs_faturamento()
-        self.mapa_geografico_vendas()
-        self.analise_regional_completa()
-        self.ranking_lojas_performance()
+        self.gerar_graficos(jobs=jobs)
         
         # Análises e recomendações
+        self.analise_produtos()
+        if self.historico is not None:
+            self.analise_temporal()
         self.gerar_recomendacoes()
-        
-    def gerar_recomendacoes(self):
-        """Gera recomendações baseadas na análise dos dados"""
+
+    @etapa_instrumentada
+    def gerar_graficos(self, nomes=None, jobs=1):
+        """Renderiza os gráficos indicados (padrão: todos), em sequência ou em paralelo
+
+        No modo batch, gráficos cujas entradas e configurações não mudaram desde
+        a última renderização (ver manifesto_graficos.json) reutilizam o arquivo existente.
+        """
+        nomes = list(graficos.ARQUIVOS_GRAFICOS) if nomes is None else list(nomes)
+        print("\n📈 Gerando visualizações...")
+        self.metricas_graficos = []
+        if jobs > 1:
+            manifesto = graficos.carregar_manifesto(self.diretorio_graficos)
+            planos = {nome: self._planejar_grafico(nome, manifesto) for nome in nomes}
+            tarefas = [(nome, argumentos, caminho)
+                       for nome, (argumentos, caminho, _, reutilizar) in planos.items() if not reutilizar]
+            renderizados = ({m['grafico']: m for m in graficos.renderizar_em_paralelo(tarefas, jobs, dpi=self.dpi)}
+                            if tarefas else {})
+            for nome, (_, caminho, hash_atual, reutilizar) in planos.items():
+                if reutilizar:
+                    metricas = graficos.metricas_reutilizado(nome, caminho, manifesto[os.path.basename(caminho)])
+                else:
+                    metricas = renderizados[nome]
+                    self.rastreador.registrar_grafico(metricas)
+                    graficos.registrar_no_manifesto(manifesto, metricas, hash_atual)
+                self.metricas_graficos.append(metricas)
+            if renderizados:
+                graficos.salvar_manifesto(manifesto, self.diretorio_graficos)
+        else:
+            for nome in nomes:
+                getattr(self, nome)()
+        graficos.imprimir_metricas_graficos(self.metricas_graficos)
+
+    def _caminho_estado_incremental(self):
+        """Local do snapshot usado pela análise incremental"""
+        return os.path.join(self.diretorio_graficos, os.pardir, '.estado', 'incremental.pkl')
+
+    @etapa_instrumentada
+    def analise_incremental(self, jobs=1, caminho_estado=None):
+        """Reanálise que recalcula só o que mudou desde a última execução
+
+        Compara os dados atuais com o snapshot da execução anterior (hash por
+        loja_id e coluna). Atualiza só os grupos região × categoria e os scores
+        das lojas afetadas e renderiza só os gráficos cujas entradas mudaram.
+        Sem snapshot compatível, faz a análise completa e grava o snapshot.
+        """
+        caminho_estado = caminho_estado or self._caminho_estado_incremental()
+        estado = incremental.carregar_estado(caminho_estado)
+        hashes = incremental.hashes_lojas(self.dados_lojas)
+        produtos = self.produtos_detalhados if self.produtos_detalhados is not None else self.produtos_por_loja
+        hashes_produtos = incremental.hashes_produtos(produtos)
+        diferenca = incremental.comparar(estado, self.dados_lojas, hashes, hashes_produtos)
+        estatisticas_score = pontuacao.estatisticas_criterios(self.dados_lojas, self.criterios_score)
+
         print("\n" + "="*70)
-        print("💡 RECOMENDAÇÕES PARA O SENHOR JOÃO")
+        print("🔄 ANÁLISE INCREMENTAL DAS LOJAS")
         print("="*70)
-        
-        # Encontrar a melhor loja
-        melhor_loja = self.dados_lojas.loc[self.dados_lojas['score_performance'].idxmax()]
-        
-        print(f"\n🏆 LOJA RECOMENDADA: {melhor_loja['nome_loja']}")
-        print(f"📍 Localização: {melhor_loja['nome_loja']}")
-        print(f"💰 Faturamento Mensal: R$ {melhor_loja['faturamento_mensal']:,.2f}")
-        print(f"⭐ Avaliação Média: {melhor_loja['avaliacao_media']}/5.0")
-        print(f"🚚 Frete Médio: R$ {melhor_loja['frete_medio']:.2f}")
-        print(f"📦 Produtos Vendidos: {melhor_loja['produtos_vendidos']}")
-        print(f"🏪 Categoria Principal: {melhor_loja['categoria_principal']}")
-        
-        print(f"\n📊 JUSTIFICATIVA DA RECOMENDAÇÃO:")
-        print(f"• Score de Performance: {melhor_loja['score_performance']:.3f}")
-        print(f"• Região estratégica: {melhor_loja['regiao']}")
-        
-        # Análises adicionais
-        print(f"\n📈 INSIGHTS PRINCIPAIS:")
-        
-        # Top 3 lojas por faturamento
-        top_faturamento = self.dados_lojas.nlargest(3, 'faturamento_mensal')
-        print(f"\n💰 TOP 3 FATURAMENTO:")
-        for i, loja in top_faturamento.iterrows():
-            print(f"   {loja['nome_loja']}: R$ {loja['faturamento_mensal']:,.2f}")
-        
-        # Top 3 lojas por avaliação
-        top_avaliacao = self.dados_lojas.nlargest(3, 'avaliacao_media')
-        print(f"\n⭐ TOP 3 AVALIAÇÃO:")
-        for i, loja in top_avaliacao.iterrows():
-            print(f"   {loja['nome_loja']}: {loja['avaliacao_media']}/5.0")
-        
-        # Análise por região
-        print(f"\n🗺️ ANÁLISE GEOGRÁFICA:")
-        regiao_stats = self.dados_lojas.groupby('regiao').agg({
-            'faturamento_mensal': 'mean',
-            'avaliacao_media': 'mean',
-            'frete_medio': 'mean'
-        }).round(2)
-        
-        melhor_regiao = regiao_stats.loc[regiao_stats['faturamento_mensal'].idxmax()]
-        print(f"   Melhor região por faturamento: {regiao_stats['faturamento_mensal'].idxmax()}")
-        print(f"   Faturamento médio: R$ {melhor_regiao['faturamento_mensal']:,.2f}")
-        
-        print(f"\n✅ CONCLUSÃO FINAL:")
-        print(f"   Recomendamos a aquisição da {melhor_loja['nome_loja']} por apresentar:")
-        print(f"   • Excelente performance geral (score: {melhor_loja['score_performance']:.3f})")
-        print(f"   • Bom equilíbrio entre faturamento e satisfação do cliente")
-        print(f"   • Localização estratégica na região {melhor_loja['regiao']}")
-        print(f"   • Categoria {melhor_loja['categoria_principal']} com bom potencial")
+
+        if diferenca is None:
+            print("📭 Sem snapshot compatível: análise completa")
+            self.calcular_score_performance()
+            nomes = list(graficos.ARQUIVOS_GRAFICOS)
+        else:
+            print(f"🔍 Alterações desde a última execução: {diferenca.resumo()}")
+            if diferenca.regioes_afetadas:
+                self._agregacoes = AgregacoesLojas(cruzado=estado['cruzado']).atualizar(
+                    self.dados_lojas, diferenca.regioes_afetadas, diferenca.categorias_afetadas)
+            else:
+                self._agregacoes = AgregacoesLojas(cruzado=estado['cruzado'])
+            print(f"   Grupos região × categoria recalculados: {len(diferenca.regioes_afetadas)} regiões × "
+                  f"{len(diferenca.categorias_afetadas)} categorias "
+                  f"(de {len(self._agregacoes.cruzado)} grupos)")
+            self._atualizar_scores(estado, diferenca, estatisticas_score)
+            diferenca.scores_alterados = incremental.scores_alterados(estado, self.dados_lojas)
+            if len(diferenca.scores_alterados):
+                print(f"   Scores diferentes da execução anterior: {len(diferenca.scores_alterados)} lojas")
+            if len(diferenca.produtos_alterados):
+                self._verificar_produtos_alterados(diferenca.produtos_alterados)
+
+            colunas_score = [c['coluna'] for c in self.criterios_score]
+            nomes = diferenca.graficos_afetados(graficos.DEPENDENCIAS_GRAFICOS, colunas_score)
+            # Gráficos cujo arquivo não existe (ex.: outro formato) também são gerados
+            nomes += [nome for nome in graficos.ARQUIVOS_GRAFICOS
+                      if nome not in nomes and not os.path.exists(self._caminho_grafico(nome))]
+            nomes = [nome for nome in graficos.ARQUIVOS_GRAFICOS if nome in nomes]
+
+        if nomes:
+            self.gerar_graficos(nomes, jobs=jobs)
+        else:
+            self.metricas_graficos = []
+            print("\n✅ Nenhum gráfico precisa ser atualizado")
+
+        self.gerar_recomendacoes()
+        incremental.salvar_estado(caminho_estado, self.dados_lojas, hashes, hashes_produtos,
+                                  self.agregacoes, self.criterios_score, estatisticas_score)
+        return diferenca
+
+    def _atualizar_scores(self, estado, diferenca, estatisticas_score):
+        """Recalcula o score só das lojas novas/alteradas quando as referências não mudaram"""
+        reaproveitavel = (
+            estado['criterios'] == [dict(c) for c in self.criterios_score]
+            and estado['estatisticas_score'] == estatisticas_score
+            and not pontuacao.depende_de_todas_as_lojas(self.criterios_score)
+        )
+        if not reaproveitavel:
+            print("   Referências do score mudaram: scores recalculados para todas as lojas")
+            self.calcular_score_performance()
+            return
+        lojas = self.dados_lojas
+        scores = estado['scores'].reindex(lojas['loja_id'].to_numpy()).to_numpy(copy=True)
+        recalcular = lojas['loja_id'].isin(diferenca.lojas_recalcular).to_numpy()
+        if recalcular.any():
+            scores[recalcular] = pontuacao.score_performance(
+                lojas[recalcular], self.criterios_score, estatisticas_score).to_numpy()
+        lojas['score_performance'] = scores
+        print(f"   Scores recalculados: {int(recalcular.sum())} de {len(lojas)} lojas")
+        
+    def _verificar_produtos_alterados(self, lojas):
+        """Refaz a verificação de consistência dos produtos só das lojas cujos produtos mudaram"""
+        print(f"   Produtos alterados em {len(lojas)} lojas")
+        if self.produtos_detalhados is None:
+            return
+        divergentes = self.indice_produtos.verificar_consistencia(lojas=lojas)
+        if len(divergentes):
+            print(f"\n⚠️ {len(divergentes)} produto(s) com receita diferente de quantidade × preço:")
+            print(divergentes[['loja_id', 'produto', 'receita_produto', 'receita_esperada']].head(10).to_string(index=False))
+        else:
+            print("   ✅ Receitas dos produtos alterados consistentes com quantidade × preço")
+
+    @etapa_instrumentada
+    def analise_temporal(self, janela=series_mensais.JANELA_PADRAO, top_n=5):
+        """Evolução mensal do faturamento: média móvel, variações mensal/anual e tendência por loja
+
+        Retorna (metricas, tendencias) de series_mensais.metricas_temporais, ou
+        None sem histórico mensal.
+        """
+        print("\n" + "="*70)
+        print("📅 EVOLUÇÃO MENSAL DO FATURAMENTO")
+        print("="*70)
+        if self.historico is None:
+            print("   Disponível apenas com o histórico mensal carregado (parâmetro historico / --historico)")
+            return None
+
+        metricas, tendencias = series_mensais.metricas_temporais(self.historico, janela=janela)
+        total = metricas.groupby('mes')['faturamento_mensal'].sum()
+        ultimo = total.index[-1]
+        print(f"\n💰 Faturamento total em {ultimo}: R$ {total.iloc[-1]:,.2f}")
+        for rotulo, defasagem in (('mês anterior', 1), ('mesmo mês do ano anterior', series_mensais.MESES_NO_ANO)):
+            anterior = ultimo - defasagem
+            if anterior in total.index:
+                print(f"   Variação em relação ao {rotulo}: {total.iloc[-1] / total[anterior] - 1:+.1%}")
+
+        # Nome mais recente de cada loja (o histórico está ordenado por loja e mês)
+        recentes = self.historico.drop_duplicates('loja_id', keep='last')
+        nomes = pd.Series(recentes['nome_loja'].to_numpy(), index=recentes['loja_id'].to_numpy())
+        comparaveis = tendencias.dropna(subset=['inclinacao_mensal'])
+        for titulo, selecao in (('📈 MAIOR CRESCIMENTO', comparaveis.nlargest(top_n, 'inclinacao_mensal')),
+                                ('📉 MAIOR QUEDA', comparaveis.nsmallest(top_n, 'inclinacao_mensal'))):
+            print(f"\n{titulo} (tendência linear, R$/mês):")
+            print("\n".join(f"   {nome}: R$ {inclinacao:+,.2f}/mês ({crescimento:+.1%} ao mês)"
+                            for nome, inclinacao, crescimento in zip(
+                                nomes.loc[selecao.index], selecao['inclinacao_mensal'], selecao['crescimento_mensal'])))
+        return metricas, tendencias
+
+    @etapa_instrumentada
+    def analise_produtos(self, loja_id=None, top_n=3):
+        """Mix de receita, principais produtos e consistência de produtos_detalhados
+
+        loja_id: loja detalhada (padrão: a de maior score de performance).
+        """
+        print("\n" + "="*70)
+        print("📦 ANÁLISE DE PRODUTOS")
+        print("="*70)
+        if self.produtos_detalhados is None:
+            print("   Disponível apenas com produtos_detalhados carregado (modos 'padrao' e 'tipado')")
+            return
+
+        indice = self.indice_produtos
+        divergentes = indice.verificar_consistencia()
+        if len(divergentes):
+            print(f"\n⚠️ {len(divergentes)} produto(s) com receita diferente de quantidade × preço:")
+            print(divergentes[['loja_id', 'produto', 'receita_produto', 'receita_esperada']].head(10).to_string(index=False))
+        else:
+            print(f"\n✅ Receitas consistentes com quantidade × preço ({len(indice)} produtos)")
+
+        if loja_id is None:
+            self._garantir_score_performance()
+            loja_id = self.dados_lojas.loc[self.dados_lojas['score_performance'].idxmax(), 'loja_id']
+        loja = self.dados_lojas.loc[self.dados_lojas['loja_id'] == loja_id, 'nome_loja']
+        nome = loja.iloc[0] if len(loja) else f"Loja {loja_id}"
+
+        produtos_loja = indice.produtos_da_loja(loja_id)
+        if not len(produtos_loja):
+            print(f"\n   {nome}: sem produtos detalhados")
+            return
+        receita_total = produtos_loja['receita_produto'].sum()
+        print(f"\n🏪 {nome}: {len(produtos_loja)} produtos, receita R$ {receita_total:,.2f}")
+
+        mix = produtos_loja.groupby('categoria', observed=True)['receita_produto'].sum() / receita_total
+        print("   Mix de receita por categoria:")
+        print("\n".join(f"      {categoria}: {participacao:.1%}" for categoria, participacao in mix.items()))
+
+        top = produtos_loja.nlargest(top_n, 'receita_produto')
+        print(f"   Top {top_n} produtos por receita:")
+        print("\n".join(f"      {produto}: R$ {receita:,.2f}"
+                        for produto, receita in zip(top['produto'], top['receita_produto'])))
+
+    @etapa_instrumentada
+    def montar_relatorio(self, top_n=relatorio.TOP_N_PADRAO):
+        """Relatório estruturado: loja recomendada, top-N, estatísticas regionais e resumo dos dados"""
+        self._garantir_score_performance()
+        medias = self.agregacoes.por_regiao[['n_lojas', 'faturamento_medio', 'avaliacao_medio', 'frete_medio']]
+        return relatorio.montar_relatorio(self.dados_lojas, medias.rename(columns={'avaliacao_medio': 'avaliacao_media'}),
+                                          top_n=top_n, resumo_dados=self.resumo_dados())
+
+    @etapa_instrumentada
+    def relatorios_por_grupo(self, coluna='regiao', top_n=relatorio.TOP_N_PADRAO):
+        """Um relatório por região (ou outra coluna, ex.: categoria_principal)"""
+        self._garantir_score_performance()
+        return relatorio.relatorios_por_grupo(self.dados_lojas, coluna, top_n=top_n)
+
+    @etapa_instrumentada
+    def salvar_relatorio(self, caminho, por_grupo=('regiao',)):
+        """Grava o relatório geral e os relatórios por grupo em JSON ou NDJSON (pela extensão)"""
+        relatorios = [self.montar_relatorio()]
+        for coluna in por_grupo:
+            relatorios += self.relatorios_por_grupo(coluna)
+        relatorio.salvar_relatorios(relatorios, caminho)
+        print(f"\n💾 Relatório estruturado salvo em {caminho} ({len(relatorios)} relatórios)")
+        return relatorios
+
+    @etapa_instrumentada
+    def resumo_dados(self):
+        """Resumo estruturado da exploração inicial (quantidades, estatísticas e distribuições)
+
+        Calculado uma vez por dados_lojas, como as agregações. Descreve as colunas
+        carregadas; as derivadas (score, vizinhança) ficam de fora.
+        """
+        if self._resumo_dados is None:
+            lojas = self.dados_lojas
+            carregadas = [c for c in lojas.columns
+                          if c != 'score_performance' and c not in espacial.COLUNAS_VIZINHANCA]
+            colunas = ['faturamento_mensal', 'produtos_vendidos', 'avaliacao_media', 'frete_medio']
+            self._resumo_dados = {
+                'n_lojas': len(lojas),
+                'tipos': {c: str(lojas[c].dtype) for c in carregadas},
+                'nao_nulos': {c: int(n) for c, n in lojas[carregadas].count().items()},
+                'estatisticas': lojas[colunas].astype('float64').describe().round(6).to_dict(),
+                'lojas_por_regiao': {str(k): int(v) for k, v in self.agregacoes.lojas_por_regiao().items()},
+                'lojas_por_categoria': {str(k): int(v) for k, v in self.agregacoes.lojas_por_categoria().items()},
+            }
+        return self._resumo_dados
+
+    @etapa_instrumentada
+    def gerar_recomendacoes(self):
+        """Gera recomendações baseadas na análise dos dados
+
+        Exibe no console o relatório estruturado (ver montar_relatorio) e o retorna.
+        """
+        resultado = self.montar_relatorio()
+        relatorio.imprimir_relatorio(resultado)
+        return resultado
 
 # Executar análise completa
+def parse_args(argv=None):
+    """Lê os argumentos de linha de comando"""
+    parser = argparse.ArgumentParser(description="Análise das lojas do Senhor João")
+    parser.add_argument('--modo-carga', choices=MODOS_CARGA, default='padrao',
+                        help="Estratégia de leitura dos CSVs (padrão: %(default)s)")
+    parser.add_argument('--tamanho-bloco', type=int, default=None,
+                        help="Linhas por bloco no modo streaming")
+    parser.add_argument('--sem-cache', action='store_true',
+                        help="Ignora o cache colunar e lê sempre os CSVs")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="Processos para renderizar os gráficos em paralelo (padrão: %(default)s)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Recalcula e renderiza apenas o que mudou desde a última execução")
+    parser.add_argument('--batch', action='store_true',
+                        help="Execução sem interface: backend Agg, sem janelas, figuras fechadas após salvar")
+    parser.add_argument('--dpi', type=int, default=graficos.DPI_PADRAO,
+                        help="Resolução dos gráficos (padrão: %(default)s)")
+    parser.add_argument('--formato', choices=graficos.FORMATOS_SAIDA, default='png',
+                        help="Formato dos gráficos (padrão: %(default)s)")
+    parser.add_argument('--diretorio-dados', default='../data',
+                        help="Diretório com dados_lojas.csv e produtos_detalhados.csv (padrão: %(default)s)")
+    parser.add_argument('--diretorio-saida', default=None,
+                        help="Raiz das saídas; os gráficos ficam em DIR/graficos (padrão: ../outputs)")
+    parser.add_argument('--historico', default=None,
+                        help="Diretório ou padrão glob dos arquivos mensais (dados_lojas_AAAA-MM.csv)")
+    parser.add_argument('--saida-relatorio', default=None,
+                        help="Grava o relatório (geral e por região) em JSON ou NDJSON (extensão .ndjson)")
+    parser.add_argument('--forcar-graficos', action='store_true',
+                        help="Renderiza todos os gráficos, mesmo os que não mudaram")
+    parser.add_argument('--trace', default=None,
+                        help="Mede as etapas e grava o trace neste arquivo")
+    parser.add_argument('--formato-trace', choices=('json', 'chrome'), default='json',
+                        help="json (etapas com tempo, CPU e memória) ou chrome (chrome://tracing, Perfetto)")
+    parser.add_argument('--perfil', nargs='+', default=(), metavar='ETAPA',
+                        help=f"Executa as etapas indicadas (ou '{instrumentacao.TODAS_ETAPAS}') sob cProfile")
+    parser.add_argument('--perfil-memoria', action='store_true',
+                        help="Mede o pico de memória de cada etapa com tracemalloc (mais lento)")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    analise = AnaliseLojasJoao()
-    analise.gerar_relatorio_completo()
+    args = parse_args()
+    rastreador = None
+    if args.trace or args.perfil or args.perfil_memoria:
+        rastreador = instrumentacao.Rastreador(perfil=args.perfil, memoria=args.perfil_memoria)
+    diretorio_graficos = (os.path.join(args.diretorio_saida, 'graficos') if args.diretorio_saida
+                          else graficos.DIRETORIO_GRAFICOS)
+    analise = AnaliseLojasJoao(modo_carga=args.modo_carga, tamanho_bloco=args.tamanho_bloco,
+                               usar_cache=not args.sem_cache, modo_batch=args.batch,
+                               dpi=args.dpi, formato=args.formato,
+                               diretorio_dados=args.diretorio_dados, diretorio_graficos=diretorio_graficos,
+                               reutilizar_graficos=not args.forcar_graficos, historico=args.historico,
+                               rastreador=rastreador)
+    if analise.dados_lojas is None:
+        # O motivo já foi exibido por load_data
+        raise SystemExit(1)
+    if args.incremental:
+        analise.analise_incremental(jobs=args.jobs)
+    else:
+        analise.gerar_relatorio_completo(jobs=args.jobs)
+    if args.saida_relatorio:
+        analise.salvar_relatorio(args.saida_relatorio)
+    if rastreador is not None:
+        rastreador.imprimir_resumo()
+        if args.trace:
+            rastreador.salvar(args.trace, args.formato_trace)
+            print(f"\n💾 Trace salvo em {args.trace}")
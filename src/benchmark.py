@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark da análise das lojas sobre dados sintéticos
+
+Gera datasets sintéticos (dados_sinteticos) em vários tamanhos e mede tempo
+(parede e CPU) e pico de memória (tracemalloc) de cada etapa: load_data, as
+agregações, os índices de produtos e espacial, cada gráfico e
+gerar_recomendacoes. Os resultados são gravados em JSON, e --comparar aponta
+as etapas que ficaram mais lentas em relação a um resultado anterior.
+--importacao mede só a inicialização a frio (importações) da CLI e da biblioteca.
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import dados_sinteticos
+import espacial
+import graficos
+from analise_lojas_joao import AnaliseLojasJoao, MODOS_CARGA
+
+TAMANHOS_PADRAO = (1_000, 10_000, 100_000, 1_000_000)
+PRODUTOS_POR_LOJA = 10
+# Acima deste número de lojas os gráficos não são medidos
+LIMITE_LOJAS_GRAFICOS = 1_000_000
+# Os pares de lojas a até 50 km crescem com o quadrado da densidade (~15
+# milhões com 100.000 lojas, ~1,5 bilhão com 1.000.000). A memória fica
+# limitada pela agregação em blocos, mas o tempo não; acima disso a etapa não é medida
+LIMITE_LOJAS_VIZINHANCA = 100_000
+DIRETORIO_RESULTADOS = '../outputs/benchmarks'
+TOLERANCIA_PADRAO = 0.2
+# Etapas mais rápidas que isso nas duas execuções não são comparadas (ruído de medição)
+SEGUNDOS_MINIMOS_COMPARACAO = 0.05
+
+
+def _reconstruir_agregacoes(analise):
+    """Refaz a passagem única por dados_lojas e deixa o resultado memorizado na análise"""
+    analise.invalidar_agregacoes()
+    return analise.agregacoes
+
+
+def _reconstruir_indice_produtos(analise):
+    """Refaz o índice de produtos e deixa o resultado memorizado na análise"""
+    analise.produtos_detalhados = analise.produtos_detalhados  # o setter descarta o índice atual
+    return analise.indice_produtos
+
+
+# Etapas de análise: (nome, função que recebe a análise carregada), executadas em
+# sequência sobre a mesma análise. As etapas de construção ('agregacoes',
+# 'indice_produtos') refazem o trabalho e memorizam o resultado; as consultas
+# seguintes (faturamento_regiao, resumo_por_loja...) medem apenas a derivação a
+# partir dele, e relatorios_por_regiao reaproveita o score calculado antes
+ETAPAS_AGREGACAO = (
+    ('agregacoes', _reconstruir_agregacoes),
+    ('faturamento_regiao', lambda a: a.agregacoes.faturamento_regiao()),
+    ('lojas_por_regiao', lambda a: a.agregacoes.lojas_por_regiao()),
+    ('lojas_por_categoria', lambda a: a.agregacoes.lojas_por_categoria()),
+    ('estatisticas_regionais', lambda a: a.agregacoes.estatisticas_regionais()),
+    ('calcular_score_performance', lambda a: a.calcular_score_performance()),
+    ('simular_cenarios_100', lambda a: a.simular_cenarios(100)),
+    ('features_vizinhanca', lambda a: espacial.features_vizinhanca(a.dados_lojas)),
+    ('relatorios_por_regiao', lambda a: a.relatorios_por_grupo('regiao')),
+)
+
+ETAPAS_PRODUTOS = (
+    ('indice_produtos', _reconstruir_indice_produtos),
+    ('resumo_por_loja', lambda a: a.indice_produtos.resumo_por_loja()),
+    ('mix_receita', lambda a: a.indice_produtos.mix_receita()),
+    ('top_produtos', lambda a: a.indice_produtos.top_produtos()),
+    ('verificar_consistencia', lambda a: a.indice_produtos.verificar_consistencia()),
+)
+
+
+# Inicialização a frio: cada cenário roda em um interpretador novo, a partir de src/.
+# 'analise_com_graficos' equivale ao custo de importação de antes do carregamento
+# sob demanda do matplotlib (ver graficos.carregar_matplotlib)
+CENARIOS_IMPORTACAO = (
+    ('interpretador', ['-c', 'pass']),
+    ('relatorio_e_score', ['-c', 'import relatorio, pontuacao']),
+    ('analise_lojas_joao', ['-c', 'import analise_lojas_joao']),
+    ('analise_com_graficos', ['-c', 'import analise_lojas_joao, graficos; graficos.carregar_matplotlib()']),
+    ('cli_ajuda', ['analise_lojas_joao.py', '--help']),
+)
+REPETICOES_IMPORTACAO = 5
+
+
+def medir_importacao(repeticoes=REPETICOES_IMPORTACAO):
+    """Mediana do tempo de parede de cada cenário de CENARIOS_IMPORTACAO (processos novos)"""
+    diretorio_src = os.path.dirname(os.path.abspath(__file__))
+    resultados = []
+    for cenario, argumentos in CENARIOS_IMPORTACAO:
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            subprocess.run([sys.executable, *argumentos], cwd=diretorio_src, check=True,
+                           stdout=subprocess.DEVNULL)
+            tempos.append(time.perf_counter() - inicio)
+        resultados.append({'cenario': cenario, 'segundos': round(float(np.median(tempos)), 4),
+                           'segundos_min': round(min(tempos), 4)})
+    return resultados
+
+
+def imprimir_importacao(resultados):
+    """Tempos de inicialização, com e sem o custo fixo do interpretador"""
+    base = next(r['segundos'] for r in resultados if r['cenario'] == 'interpretador')
+    print("\n🚀 Inicialização a frio (mediana):")
+    for r in resultados:
+        print(f"   {r['cenario']:<34} {r['segundos']:>9.3f}s (+{r['segundos'] - base:.3f}s além do interpretador)")
+
+
+def medir(etapa, funcao, medir_memoria=True):
+    """Executa funcao() sem saída no console e retorna (resultado, métricas da etapa)
+
+    O tempo é medido sem tracemalloc (que deixa alocações pequenas, como as do
+    matplotlib, várias vezes mais lentas); com medir_memoria a etapa é executada
+    uma segunda vez com o rastreamento ligado, só para medir o pico de memória.
+    """
+    gc.collect()
+    inicio, inicio_cpu = time.perf_counter(), time.process_time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        resultado = funcao()
+    metricas = {
+        'etapa': etapa,
+        'segundos': round(time.perf_counter() - inicio, 4),
+        'segundos_cpu': round(time.process_time() - inicio_cpu, 4),
+    }
+    if medir_memoria:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                funcao()
+            atual, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        metricas['pico_memoria_mb'] = round(pico / (1024 * 1024), 3)
+        metricas['memoria_retida_mb'] = round(atual / (1024 * 1024), 3)
+    return resultado, metricas
+
+
+def ignorada(etapa, motivo):
+    """Registro de uma etapa não medida"""
+    return {'etapa': etapa, 'ignorada': motivo}
+
+
+def preparar_dados(diretorio_base, n_lojas, n_produtos, semente):
+    """Gera (ou reutiliza) o dataset sintético do tamanho pedido"""
+    diretorio = os.path.join(diretorio_base, f"lojas_{n_lojas}_produtos_{n_produtos}_semente_{semente}")
+    arquivos = [os.path.join(diretorio, n) for n in ('dados_lojas.csv', 'produtos_detalhados.csv')]
+    if all(os.path.exists(a) for a in arquivos):
+        return diretorio, None
+    inicio = time.perf_counter()
+    dados_sinteticos.gravar_dataset(diretorio, n_lojas, n_produtos, semente=semente)
+    return diretorio, round(time.perf_counter() - inicio, 2)
+
+
+def executar_tamanho(diretorio_dados, diretorio_graficos, n_lojas, modo_carga, limite_graficos,
+                     medir_memoria=True, dpi=graficos.DPI_PADRAO, memoria_graficos=False):
+    """Mede todas as etapas para um dataset; retorna a lista de métricas"""
+    resultados = []
+    analise, metricas = medir('load_data', lambda: AnaliseLojasJoao(
+        modo_carga=modo_carga, usar_cache=False, modo_batch=True, dpi=dpi, reutilizar_graficos=False,
+        diretorio_dados=diretorio_dados, diretorio_graficos=diretorio_graficos), medir_memoria)
+    metricas['memoria_frames_mb'] = round(float(sum(m['memoria_frame_mb'] or 0 for m in analise.metricas_carga)), 3)
+    resultados.append(metricas)
+
+    for etapa, funcao in ETAPAS_AGREGACAO:
+        if etapa == 'features_vizinhanca' and n_lojas > LIMITE_LOJAS_VIZINHANCA:
+            resultados.append(ignorada(etapa, f"mais de {LIMITE_LOJAS_VIZINHANCA} lojas"))
+        else:
+            resultados.append(medir(etapa, lambda: funcao(analise), medir_memoria)[1])
+
+    for etapa, funcao in ETAPAS_PRODUTOS:
+        if analise.produtos_detalhados is None:
+            resultados.append(ignorada(etapa, f"modo de carga {modo_carga!r} não guarda produtos_detalhados"))
+        else:
+            resultados.append(medir(etapa, lambda: funcao(analise), medir_memoria)[1])
+            analise.indice_produtos  # consultas seguintes usam o índice já construído
+
+    for nome in graficos.ARQUIVOS_GRAFICOS:
+        if n_lojas > limite_graficos:
+            resultados.append(ignorada(nome, f"mais de {limite_graficos} lojas"))
+            continue
+        metricas = medir(nome, getattr(analise, nome), medir_memoria and memoria_graficos)[1]
+        render = analise.metricas_graficos[-1]
+        metricas.update({'segundos_desenho': render['segundos_desenho'],
+                         'segundos_salvar': render['segundos_salvar'], 'bytes': render['bytes']})
+        resultados.append(metricas)
+
+    resultados.append(medir('gerar_recomendacoes', analise.gerar_recomendacoes, medir_memoria)[1])
+    return resultados
+
+
+def descrever_ambiente():
+    """Versões e máquina, para comparar resultados entre execuções"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def comparar_resultados(atual, anterior, tolerancia=TOLERANCIA_PADRAO):
+    """Etapas cujo tempo cresceu mais que `tolerancia` (fração) em relação ao resultado anterior"""
+    def tempos(execucao):
+        return {(r['n_lojas'], m['etapa']): m['segundos']
+                for r in execucao['resultados'] for m in r['etapas'] if 'segundos' in m}
+
+    tempos_atuais, tempos_anteriores = tempos(atual), tempos(anterior)
+    regressoes = []
+    for chave in sorted(tempos_atuais.keys() & tempos_anteriores.keys()):
+        antes, agora = tempos_anteriores[chave], tempos_atuais[chave]
+        if max(antes, agora) < SEGUNDOS_MINIMOS_COMPARACAO:
+            continue
+        if antes > 0 and agora / antes > 1 + tolerancia:
+            regressoes.append({'n_lojas': chave[0], 'etapa': chave[1], 'segundos_anterior': antes,
+                               'segundos': agora, 'razao': round(agora / antes, 2)})
+    return regressoes
+
+
+def imprimir_resultados(resultados):
+    """Tabela resumida dos tempos e memória por etapa"""
+    for r in resultados:
+        print(f"\n📏 {r['n_lojas']:,} lojas | {r['n_produtos']:,} produtos")
+        for m in r['etapas']:
+            if 'ignorada' in m:
+                print(f"   {m['etapa']:<34} ignorada ({m['ignorada']})")
+                continue
+            memoria = f" | pico {m['pico_memoria_mb']:,.1f} MB" if 'pico_memoria_mb' in m else ''
+            print(f"   {m['etapa']:<34} {m['segundos']:>9.3f}s{memoria}")
+
+
+def parse_args(argv=None):
+    """Lê os argumentos de linha de comando"""
+    parser = argparse.ArgumentParser(description="Benchmark da análise das lojas com dados sintéticos")
+    parser.add_argument('--lojas', type=int, nargs='+', default=list(TAMANHOS_PADRAO),
+                        help="Quantidades de lojas a medir (padrão: %(default)s)")
+    parser.add_argument('--produtos-por-loja', type=int, default=PRODUTOS_POR_LOJA,
+                        help="Linhas de produtos_detalhados por loja (padrão: %(default)s)")
+    parser.add_argument('--modo-carga', choices=MODOS_CARGA, default='tipado',
+                        help="Estratégia de leitura dos CSVs (padrão: %(default)s)")
+    parser.add_argument('--limite-graficos', type=int, default=LIMITE_LOJAS_GRAFICOS,
+                        help="Máximo de lojas para medir os gráficos (padrão: %(default)s)")
+    parser.add_argument('--dpi', type=int, default=graficos.DPI_PADRAO,
+                        help="Resolução dos gráficos medidos (padrão: %(default)s)")
+    parser.add_argument('--diretorio-dados', default=None,
+                        help="Onde gerar/reutilizar os datasets (padrão: diretório temporário)")
+    parser.add_argument('--saida', default=DIRETORIO_RESULTADOS,
+                        help="Diretório dos resultados JSON (padrão: %(default)s)")
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--sem-memoria', action='store_true',
+                        help="Não mede o pico de memória (cada etapa é executada uma única vez)")
+    parser.add_argument('--memoria-graficos', action='store_true',
+                        help="Mede também a memória dos gráficos (lento: tracemalloc no matplotlib)")
+    parser.add_argument('--importacao', action='store_true',
+                        help="Mede apenas o tempo de inicialização (importações) da CLI e da biblioteca")
+    parser.add_argument('--comparar', default=None,
+                        help="JSON de uma execução anterior para detectar regressões")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_PADRAO,
+                        help="Aumento de tempo aceito antes de acusar regressão (padrão: %(default)s)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.importacao:
+        resultados = medir_importacao()
+        imprimir_importacao(resultados)
+        os.makedirs(args.saida, exist_ok=True)
+        caminho = os.path.join(args.saida, f"importacao_{datetime.now():%Y%m%d_%H%M%S}.json")
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump({'data': datetime.now().isoformat(timespec='seconds'), 'ambiente': descrever_ambiente(),
+                       'importacao': resultados}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Resultados salvos em {caminho}")
+        return 0
+    graficos.usar_backend_nao_interativo()
+    # Importa o matplotlib antes das medições, para que o primeiro gráfico não pague por isso
+    graficos.carregar_matplotlib()
+    diretorio_base = args.diretorio_dados or tempfile.mkdtemp(prefix='benchmark_lojas_')
+    diretorio_graficos = tempfile.mkdtemp(prefix='benchmark_graficos_')
+    medir_memoria = not args.sem_memoria
+
+    execucao = {'data': datetime.now().isoformat(timespec='seconds'), 'ambiente': descrever_ambiente(),
+                'modo_carga': args.modo_carga, 'dpi': args.dpi, 'rastreamento_memoria': medir_memoria, 'resultados': []}
+    try:
+        for n_lojas in args.lojas:
+            n_produtos = n_lojas * args.produtos_por_loja
+            print(f"🧪 {n_lojas:,} lojas / {n_produtos:,} produtos...")
+            diretorio_dados, segundos_geracao = preparar_dados(diretorio_base, n_lojas, n_produtos, args.semente)
+            etapas = executar_tamanho(diretorio_dados, diretorio_graficos, n_lojas, args.modo_carga,
+                                      args.limite_graficos, medir_memoria, args.dpi, args.memoria_graficos)
+            execucao['resultados'].append({'n_lojas': n_lojas, 'n_produtos': n_produtos,
+                                           'segundos_geracao': segundos_geracao, 'etapas': etapas})
+            gc.collect()
+    finally:
+        shutil.rmtree(diretorio_graficos, ignore_errors=True)
+        if args.diretorio_dados is None:
+            shutil.rmtree(diretorio_base, ignore_errors=True)
+
+    imprimir_resultados(execucao['resultados'])
+    os.makedirs(args.saida, exist_ok=True)
+    caminho = os.path.join(args.saida, f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(execucao, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Resultados salvos em {caminho}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            anterior = json.load(f)
+        regressoes = comparar_resultados(execucao, anterior, args.tolerancia)
+        if regressoes:
+            print(f"\n⚠️ {len(regressoes)} etapa(s) mais lenta(s) que em {args.comparar}:")
+            for r in regressoes:
+                print(f"   {r['n_lojas']:,} lojas | {r['etapa']}: {r['segundos_anterior']:.3f}s → "
+                      f"{r['segundos']:.3f}s ({r['razao']:.2f}x)")
+            return 1
+        print(f"\n✅ Nenhuma regressão acima de {args.tolerancia:.0%} em relação a {args.comparar}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache colunar (Feather) dos datasets das lojas
+
+Na primeira leitura grava uma cópia tipada do DataFrame em Feather sem
+compressão, que pode ser lida por memory-map. Enquanto o CSV de origem não
+mudar (tamanho + mtime, confirmados por SHA-256 quando o mtime difere) nem
+o esquema do leitor, as cargas seguintes leem o cache e pulam o parsing do
+CSV. Um cache ilegível ou que não pode ser gravado não interrompe a carga:
+o CSV é lido normalmente.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import pandas as pd
+
+from carregamento import montar_metricas
+
+try:
+    import pyarrow
+    import pyarrow.feather as feather
+except ImportError:
+    pyarrow = feather = None
+
+# Incrementar quando o formato gravado mudar, para invalidar caches antigos
+VERSAO_CACHE = 3
+NOME_DIRETORIO_CACHE = '.cache'
+
+
+def cache_disponivel():
+    """Indica se a dependência opcional (pyarrow) está instalada"""
+    return feather is not None
+
+
+def sha256_arquivo(caminho, tamanho_bloco=1 << 20):
+    """Calcula o SHA-256 do arquivo lendo em blocos"""
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def assinatura_esquema(esquema):
+    """Impressão digital do esquema do leitor (tipos, colunas, índice) e da versão do pandas"""
+    conteudo = json.dumps({'esquema': esquema, 'pandas': pd.__version__}, sort_keys=True, default=str)
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()[:16]
+
+
+def _caminhos_cache(caminho_csv, chave, diretorio_cache):
+    """Retorna os caminhos do arquivo Feather e do manifesto para a chave"""
+    if diretorio_cache is None:
+        diretorio_cache = os.path.join(os.path.dirname(caminho_csv), NOME_DIRETORIO_CACHE)
+    base = os.path.splitext(os.path.basename(caminho_csv))[0]
+    prefixo = os.path.join(diretorio_cache, f"{base}.{chave}")
+    return prefixo + '.feather', prefixo + '.json'
+
+
+def _origem_inalterada(caminho_csv, manifesto):
+    """Verifica se o CSV ainda corresponde ao manifesto (atualiza o mtime registrado se só ele mudou)"""
+    if manifesto.get('versao') != VERSAO_CACHE:
+        return False
+    stat = os.stat(caminho_csv)
+    origem = manifesto['origem']
+    if stat.st_size != origem['tamanho']:
+        return False
+    if stat.st_mtime_ns == origem['mtime_ns']:
+        return True
+    # Mesmo tamanho, mtime diferente (ex.: checkout ou cópia): confirma pelo conteúdo
+    if sha256_arquivo(caminho_csv) != origem['sha256']:
+        return False
+    origem['mtime_ns'] = stat.st_mtime_ns
+    return True
+
+
+def _ler_manifesto(caminho_manifesto):
+    """Lê o manifesto do cache, ou None se ausente, corrompido ou incompleto"""
+    try:
+        with open(caminho_manifesto, encoding='utf-8') as f:
+            manifesto = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifesto, dict) or not isinstance(manifesto.get('origem'), dict):
+        return None
+    if not all(campo in manifesto['origem'] for campo in ('tamanho', 'mtime_ns', 'sha256')):
+        return None
+    return manifesto
+
+
+def _gravar_manifesto(caminho_manifesto, manifesto):
+    """Grava o manifesto de forma atômica"""
+    temporario = caminho_manifesto + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, indent=2)
+    os.replace(temporario, caminho_manifesto)
+
+
+def carregar_com_cache(caminho_csv, leitor, chave, diretorio_cache=None, esquema=None):
+    """Carrega um dataset usando o cache colunar quando válido.
+
+    leitor: função sem argumentos que lê o CSV e retorna (df, metricas).
+    chave: identifica a variante do cache (ex.: modo de carga), pois o mesmo
+    CSV pode ser armazenado com tipos ou agregações diferentes.
+    esquema: descrição serializável do que o leitor produz (tipos, colunas,
+    índice); se mudar, o cache existente é descartado.
+    Sem pyarrow instalado, apenas delega para o leitor.
+    """
+    if feather is None:
+        return leitor()
+
+    caminho_feather, caminho_manifesto = _caminhos_cache(caminho_csv, chave, diretorio_cache)
+    manifesto = _ler_manifesto(caminho_manifesto)
+    assinatura = assinatura_esquema(esquema)
+
+    if (manifesto is not None and manifesto.get('esquema') == assinatura
+            and os.path.exists(caminho_feather)):
+        mtime_registrado = manifesto['origem']['mtime_ns']
+        if _origem_inalterada(caminho_csv, manifesto):
+            try:
+                if manifesto['origem']['mtime_ns'] != mtime_registrado:
+                    _gravar_manifesto(caminho_manifesto, manifesto)
+                inicio = time.perf_counter()
+                # memory_map + split_blocks permitem leitura sem cópia das colunas numéricas
+                tabela = feather.read_table(caminho_feather, memory_map=True)
+                df = tabela.to_pandas(split_blocks=True)
+                if manifesto.get('indice'):
+                    df = df.set_index(manifesto['indice'])
+                # Linhas do CSV de origem: no modo streaming o cache guarda o agregado por loja
+                linhas = manifesto.get('linhas', len(df))
+                return df, montar_metricas(caminho_csv, linhas, inicio, df, origem='cache')
+            except (OSError, pyarrow.ArrowException) as e:
+                print(f"⚠️ Cache colunar ignorado ({e}); o CSV será lido novamente")
+
+    # stat antes da leitura: se o CSV mudar durante o parsing, o próximo run reconstrói
+    stat = os.stat(caminho_csv)
+    df, metricas = leitor()
+    try:
+        _gravar_cache(caminho_csv, stat, df, metricas['linhas'], caminho_feather, caminho_manifesto,
+                      assinatura)
+    except (OSError, pyarrow.ArrowException) as e:
+        print(f"⚠️ Cache colunar não gravado ({e})")
+    return df, metricas
+
+
+def _gravar_cache(caminho_csv, stat, df, linhas, caminho_feather, caminho_manifesto, assinatura):
+    """Grava o DataFrame em Feather e o manifesto correspondente (linhas: do CSV de origem)"""
+    os.makedirs(os.path.dirname(caminho_feather), exist_ok=True)
+    indice = None
+    if df.index.name is not None:
+        indice = df.index.name
+        df = df.reset_index()
+
+    temporario = caminho_feather + '.tmp'
+    try:
+        feather.write_feather(df, temporario, compression='uncompressed')
+        os.replace(temporario, caminho_feather)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+    _gravar_manifesto(caminho_manifesto, {
+        'versao': VERSAO_CACHE,
+        'esquema': assinatura,
+        'origem': {
+            'caminho': os.path.abspath(caminho_csv),
+            'tamanho': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': sha256_arquivo(caminho_csv),
+        },
+        'indice': indice,
+        'linhas': int(linhas),
+    })
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Carregamento tipado e em blocos dos datasets das lojas
+
+Define o esquema explícito de dados_lojas.csv e produtos_detalhados.csv
+(colunas categóricas como `category`, numéricas reduzidas) e um leitor em
+blocos que agrega produtos_detalhados por loja_id conforme o arquivo é lido.
+"""
+
+import sys
+import time
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Esquema explícito das colunas. Valores monetários agregados e coordenadas
+# ficam em float64 para não perder precisão em somas e distâncias.
+ESQUEMA_LOJAS = {
+    'loja_id': 'int32',
+    'nome_loja': 'category',
+    'faturamento_mensal': 'float64',
+    'categoria_principal': 'category',
+    'produtos_vendidos': 'int32',
+    'avaliacao_media': 'float32',
+    'frete_medio': 'float32',
+    'lat': 'float64',
+    'lon': 'float64',
+    'regiao': 'category',
+}
+
+ESQUEMA_PRODUTOS = {
+    'loja_id': 'int32',
+    'produto': 'category',
+    'categoria': 'category',
+    'quantidade_vendida': 'int32',
+    'preco_unitario': 'float32',
+    'receita_produto': 'float64',
+}
+
+# Colunas lidas e resultado da agregação de produtos_detalhados por loja_id
+COLUNAS_AGREGACAO_PRODUTOS = ['loja_id', 'quantidade_vendida', 'receita_produto']
+ESQUEMA_PRODUTOS_POR_LOJA = {
+    'n_produtos': 'int64',
+    'quantidade_total': 'int64',
+    'receita_total': 'float64',
+}
+
+TAMANHO_BLOCO_PADRAO = 500_000
+
+
+def pico_memoria_mb():
+    """Retorna o pico de memória residente (RSS) do processo em MB, se disponível"""
+    if resource is not None:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux informa em KB, macOS em bytes
+        return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+
+
+def montar_metricas(arquivo, linhas, inicio, frame=None, origem='csv'):
+    """Monta o dicionário de métricas de uma carga"""
+    segundos = time.perf_counter() - inicio
+    return {
+        'arquivo': str(arquivo),
+        'origem': origem,
+        'linhas': int(linhas),
+        'segundos': round(segundos, 4),
+        'linhas_por_segundo': round(linhas / segundos, 1) if segundos > 0 else None,
+        'pico_rss_mb': pico_memoria_mb(),
+        'memoria_frame_mb': (round(frame.memory_usage(deep=True).sum() / (1024 * 1024), 3)
+                             if frame is not None else None),
+    }
+
+
+def ler_csv_padrao(caminho):
+    """Leitura original: pd.read_csv com tipos inferidos (referência de comparação)"""
+    inicio = time.perf_counter()
+    df = pd.read_csv(caminho)
+    return df, montar_metricas(caminho, len(df), inicio, df)
+
+
+def esquema_anulavel(esquema):
+    """Esquema com os inteiros como Int32 anulável, para aceitar células vazias"""
+    return {coluna: 'Int32' if tipo == 'int32' else tipo for coluna, tipo in esquema.items()}
+
+
+def reduzir_inteiros(df, esquema):
+    """Converte para int32 as colunas inteiras do esquema que não têm valores ausentes
+
+    Colunas com células vazias continuam como Int32 anulável, em vez de
+    interromper a leitura.
+    """
+    inteiras = {coluna: 'int32' for coluna, tipo in esquema.items()
+                if tipo == 'int32' and coluna in df.columns and not df[coluna].hasnans}
+    return df.astype(inteiras) if inteiras else df
+
+
+def ler_com_inteiros_anulaveis(ler, esquema):
+    """Executa ler(esquema); se falhar (ex.: inteiro com célula vazia), repete com Int32 anulável
+
+    O parsing de Int32 é bem mais lento, por isso só é usado quando necessário.
+    Um valor realmente inválido (texto em coluna numérica) falha de novo e o
+    ValueError é propagado.
+    """
+    try:
+        return ler(esquema)
+    except ValueError:
+        return ler(esquema_anulavel(esquema))
+
+
+def ler_csv_tipado(caminho, esquema):
+    """Lê o CSV inteiro aplicando o esquema explícito de tipos"""
+    inicio = time.perf_counter()
+    df = ler_com_inteiros_anulaveis(lambda tipos: pd.read_csv(caminho, dtype=tipos), esquema)
+    df = reduzir_inteiros(df, esquema)
+    return df, montar_metricas(caminho, len(df), inicio, df)
+
+
+def agregar_produtos_em_blocos(caminho, tamanho_bloco=TAMANHO_BLOCO_PADRAO):
+    """Lê produtos_detalhados em blocos e agrega por loja_id durante a leitura.
+
+    Mantém em memória apenas um bloco e o acumulado por loja, nunca o arquivo
+    inteiro. Retorna o DataFrame indexado por loja_id com n_produtos,
+    quantidade_total e receita_total, e as métricas da carga.
+    """
+    inicio = time.perf_counter()
+    colunas = COLUNAS_AGREGACAO_PRODUTOS
+    esquema = {coluna: ESQUEMA_PRODUTOS[coluna] for coluna in colunas}
+
+    def agregar(tipos):
+        acumulado = None
+        linhas = 0
+        for bloco in pd.read_csv(caminho, usecols=colunas, dtype=tipos, chunksize=tamanho_bloco):
+            bloco = reduzir_inteiros(bloco, esquema)
+            linhas += len(bloco)
+            parcial = bloco.groupby('loja_id', sort=False).agg(
+                n_produtos=('receita_produto', 'size'),
+                quantidade_total=('quantidade_vendida', 'sum'),
+                receita_total=('receita_produto', 'sum'),
+            )
+            acumulado = parcial if acumulado is None else acumulado.add(parcial, fill_value=0)
+        return acumulado, linhas
+
+    acumulado, linhas = ler_com_inteiros_anulaveis(agregar, esquema)
+
+    if acumulado is None:
+        acumulado = pd.DataFrame(columns=list(ESQUEMA_PRODUTOS_POR_LOJA),
+                                 index=pd.Index([], name='loja_id', dtype='int32'))
+    acumulado = acumulado.sort_index().astype(ESQUEMA_PRODUTOS_POR_LOJA)
+    # loja_id vazio não forma grupo, então o índice não tem ausentes mesmo lido como Int32
+    acumulado.index = acumulado.index.astype('int32')
+    return acumulado, montar_metricas(caminho, linhas, inicio, acumulado)
+
+
+def imprimir_metricas_carga(metricas):
+    """Exibe as métricas de carga no terminal"""
+    print("\n⏱️ Métricas de carga:")
+    for m in metricas:
+        taxa = f"{m['linhas_por_segundo']:,.0f} linhas/s" if m['linhas_por_segundo'] else "-"
+        pico = f"{m['pico_rss_mb']:.1f} MB" if m['pico_rss_mb'] is not None else "n/d"
+        frame = f"{m['memoria_frame_mb']:.3f} MB" if m['memoria_frame_mb'] is not None else "-"
+        print(f"   {m['arquivo']} [{m.get('origem', 'csv')}]: {m['linhas']} linhas em {m['segundos']:.3f}s "
+              f"({taxa}) | frame: {frame} | pico RSS: {pico}")
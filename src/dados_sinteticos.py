@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gerador de dados sintéticos no esquema de dados_lojas / produtos_detalhados
+
+Gera lojas e produtos em qualquer escala respeitando as colunas, os
+vocabulários de região e categoria e as faixas de coordenadas de cada região
+do Brasil. Usado pelo benchmark; a semente fixa torna os dados reprodutíveis.
+"""
+
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+# Proporção de lojas e faixa aproximada de coordenadas (lat, lon) de cada região
+REGIOES = {
+    'Sudeste': {'peso': 0.40, 'lat': (-25.0, -14.5), 'lon': (-53.0, -39.7)},
+    'Nordeste': {'peso': 0.20, 'lat': (-18.3, -1.0), 'lon': (-48.5, -34.8)},
+    'Sul': {'peso': 0.20, 'lat': (-33.7, -22.5), 'lon': (-57.6, -48.0)},
+    'Centro-Oeste': {'peso': 0.10, 'lat': (-24.0, -7.3), 'lon': (-61.6, -45.9)},
+    'Norte': {'peso': 0.10, 'lat': (-13.7, 5.2), 'lon': (-73.9, -46.0)},
+}
+
+# Faturamento típico (mediana em R$) e faixa de preço unitário de cada categoria
+CATEGORIAS = {
+    'Eletrônicos': {'faturamento': 150000, 'preco': (150.0, 9000.0)},
+    'Moda': {'faturamento': 110000, 'preco': (40.0, 400.0)},
+    'Casa e Jardim': {'faturamento': 90000, 'preco': (50.0, 2500.0)},
+    'Esportes': {'faturamento': 100000, 'preco': (30.0, 1500.0)},
+    'Livros': {'faturamento': 45000, 'preco': (20.0, 150.0)},
+}
+
+PRODUTOS_POR_CATEGORIA = 50
+
+
+def gerar_lojas(n_lojas, semente=42):
+    """DataFrame de n_lojas lojas com as colunas de dados_lojas.csv"""
+    rng = np.random.default_rng(semente)
+    nomes_regioes = list(REGIOES)
+    pesos = np.array([REGIOES[r]['peso'] for r in nomes_regioes])
+    regiao = rng.choice(len(nomes_regioes), size=n_lojas, p=pesos / pesos.sum())
+    nomes_categorias = list(CATEGORIAS)
+    categoria = rng.integers(0, len(nomes_categorias), size=n_lojas)
+
+    lat_min = np.array([REGIOES[r]['lat'][0] for r in nomes_regioes])[regiao]
+    lat_max = np.array([REGIOES[r]['lat'][1] for r in nomes_regioes])[regiao]
+    lon_min = np.array([REGIOES[r]['lon'][0] for r in nomes_regioes])[regiao]
+    lon_max = np.array([REGIOES[r]['lon'][1] for r in nomes_regioes])[regiao]
+
+    mediana = np.array([CATEGORIAS[c]['faturamento'] for c in nomes_categorias])[categoria]
+    faturamento = np.round(mediana * rng.lognormal(0.0, 0.35, size=n_lojas), -3)
+    ids = np.arange(1, n_lojas + 1, dtype='int64')
+    nomes_regiao = np.array(nomes_regioes)[regiao]
+
+    return pd.DataFrame({
+        'loja_id': ids,
+        'nome_loja': pd.Series(ids).map('Loja {:07d}'.format) + ' ' + nomes_regiao,
+        'faturamento_mensal': faturamento.astype('int64'),
+        'categoria_principal': np.array(nomes_categorias)[categoria],
+        'produtos_vendidos': np.maximum(1, (faturamento / rng.uniform(60, 160, size=n_lojas))).astype('int64'),
+        'avaliacao_media': np.round(rng.uniform(3.6, 4.9, size=n_lojas), 1),
+        'frete_medio': np.round(rng.uniform(5.0, 25.0, size=n_lojas), 2),
+        'lat': np.round(rng.uniform(lat_min, lat_max), 6),
+        'lon': np.round(rng.uniform(lon_min, lon_max), 6),
+        'regiao': nomes_regiao,
+    })
+
+
+def gerar_produtos(lojas, n_produtos, semente=43, tamanho_bloco=1_000_000):
+    """Gera produtos_detalhados em blocos de linhas (iterador de DataFrames)
+
+    Cada produto pertence a uma loja existente e à categoria principal dela;
+    receita_produto = quantidade_vendida × preco_unitario.
+    """
+    rng = np.random.default_rng(semente)
+    nomes_categorias = list(CATEGORIAS)
+    codigo_categoria = pd.Categorical(lojas['categoria_principal'], categories=nomes_categorias).codes
+    preco_min = np.array([CATEGORIAS[c]['preco'][0] for c in nomes_categorias])
+    preco_max = np.array([CATEGORIAS[c]['preco'][1] for c in nomes_categorias])
+    catalogo = np.array([f"{c} {i:03d}" for c in nomes_categorias for i in range(1, PRODUTOS_POR_CATEGORIA + 1)])
+    ids = lojas['loja_id'].to_numpy()
+    # Produtos de cada loja sorteados de uma vez; as linhas saem agrupadas por
+    # loja em todo o arquivo (não só dentro de cada bloco), como no arquivo original
+    fim_loja = np.cumsum(rng.multinomial(n_produtos, np.full(len(ids), 1.0 / len(ids))))
+
+    for inicio in range(0, n_produtos, tamanho_bloco):
+        n = min(tamanho_bloco, n_produtos - inicio)
+        posicao_loja = np.searchsorted(fim_loja, np.arange(inicio, inicio + n), side='right')
+        categoria = codigo_categoria[posicao_loja]
+        quantidade = rng.integers(1, 200, size=n)
+        preco = np.round(rng.uniform(preco_min[categoria], preco_max[categoria]), 2)
+        produto = catalogo[categoria * PRODUTOS_POR_CATEGORIA + rng.integers(0, PRODUTOS_POR_CATEGORIA, size=n)]
+        yield pd.DataFrame({
+            'loja_id': ids[posicao_loja],
+            'produto': produto,
+            'categoria': np.array(nomes_categorias)[categoria],
+            'quantidade_vendida': quantidade,
+            'preco_unitario': preco,
+            'receita_produto': np.round(quantidade * preco, 2),
+        })
+
+
+def gravar_dataset(diretorio, n_lojas, n_produtos, semente=42):
+    """Grava dados_lojas.csv e produtos_detalhados.csv sintéticos em `diretorio`"""
+    os.makedirs(diretorio, exist_ok=True)
+    lojas = gerar_lojas(n_lojas, semente=semente)
+    lojas.to_csv(os.path.join(diretorio, 'dados_lojas.csv'), index=False)
+    caminho_produtos = os.path.join(diretorio, 'produtos_detalhados.csv')
+    with open(caminho_produtos, 'w', encoding='utf-8', newline='') as f:
+        for i, bloco in enumerate(gerar_produtos(lojas, n_produtos, semente=semente + 1)):
+            bloco.to_csv(f, index=False, header=(i == 0), float_format='%.2f')
+    return diretorio
+
+
+def gravar_historico(diretorio, n_lojas, n_meses, inicio='2024-01', semente=42, fracao_ausente=0.02):
+    """Grava dados_lojas_AAAA-MM.csv de n_meses meses a partir de `inicio`
+
+    Cada loja tem uma taxa de crescimento mensal própria e sazonalidade anual;
+    uma fração das linhas é omitida para simular meses sem dados.
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    rng = np.random.default_rng(semente)
+    lojas = gerar_lojas(n_lojas, semente=semente)
+    crescimento = rng.normal(0.005, 0.015, size=n_lojas)
+    fase = rng.uniform(0, 2 * np.pi, size=n_lojas)
+    base = lojas['faturamento_mensal'].to_numpy(dtype='float64')
+    meses = np.arange(n_meses)
+    fator = ((1 + crescimento[:, None]) ** meses * (1 + 0.08 * np.sin(2 * np.pi * meses / 12 + fase[:, None]))
+             * rng.lognormal(0.0, 0.03, size=(n_lojas, n_meses)))
+    faturamento = np.round(base[:, None] * fator, -2)
+    presente = rng.random((n_lojas, n_meses)) >= fracao_ausente
+    caminhos = []
+    for i, mes in enumerate(pd.period_range(inicio, periods=n_meses, freq='M')):
+        mensal = lojas.assign(
+            faturamento_mensal=faturamento[:, i].astype('int64'),
+            produtos_vendidos=np.maximum(1, lojas['produtos_vendidos'] * fator[:, i]).astype('int64'))
+        caminho = os.path.join(diretorio, f"dados_lojas_{mes}.csv")
+        mensal[presente[:, i]].to_csv(caminho, index=False)
+        caminhos.append(caminho)
+    return caminhos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera datasets sintéticos no esquema das lojas")
+    parser.add_argument('diretorio', help="Diretório de saída dos CSVs")
+    parser.add_argument('--lojas', type=int, default=1000)
+    parser.add_argument('--produtos', type=int, default=None,
+                        help="Total de linhas de produtos (padrão: 10 por loja)")
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--meses', type=int, default=None,
+                        help="Gera também o histórico dados_lojas_AAAA-MM.csv com esse número de meses")
+    args = parser.parse_args()
+    n_produtos = args.produtos if args.produtos is not None else args.lojas * 10
+    gravar_dataset(args.diretorio, args.lojas, n_produtos, semente=args.semente)
+    print(f"✅ {args.lojas} lojas e {n_produtos} produtos gravados em {args.diretorio}")
+    if args.meses:
+        gravar_historico(args.diretorio, args.lojas, args.meses, semente=args.semente)
+        print(f"✅ Histórico de {args.meses} meses gravado em {args.diretorio}")
+
+
+if __name__ == "__main__":
+    main()
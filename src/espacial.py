@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice espacial (grade) sobre as coordenadas das lojas
+
+As lojas são distribuídas em células de uma grade lat/lon e ordenadas pela
+chave da célula. Uma consulta por raio só examina as células vizinhas que
+podem conter pontos dentro do raio; a distância exata é calculada por
+haversine. As consultas são em lote: o laço é sobre os deslocamentos de
+célula (poucos e fixos), nunca sobre lojas, e tudo roda em NumPy sem
+serviços externos. A grade não trata a travessia do antimeridiano (±180°),
+que não ocorre com lojas no Brasil.
+"""
+
+import numpy as np
+import pandas as pd
+
+RAIO_TERRA_KM = 6371.0088
+KM_POR_GRAU = np.pi * RAIO_TERRA_KM / 180.0
+# Maior distância possível entre dois pontos da Terra
+DISTANCIA_MAXIMA_KM = np.pi * RAIO_TERRA_KM
+
+# Deslocamento para manter os índices de célula positivos na chave combinada
+_DESLOCAMENTO = 1 << 20
+_BASE = 1 << 21
+
+COLUNAS_VIZINHANCA = ('n_vizinhos', 'faturamento_medio_vizinhos', 'distancia_concorrente_km')
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Distância em km pelo grande círculo (vetorizada)"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype='float64')) for v in (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2.0) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2.0) ** 2)
+    return 2.0 * RAIO_TERRA_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _montar_pares(consultas, indices, distancias):
+    """Concatena os pares encontrados em um DataFrame (consulta, indice, distancia_km)"""
+    if not consultas:
+        return pd.DataFrame({'consulta': np.array([], dtype='int64'), 'indice': np.array([], dtype='int64'),
+                             'distancia_km': np.array([], dtype='float64')})
+    return pd.DataFrame({'consulta': np.concatenate(consultas).astype('int64'),
+                         'indice': np.concatenate(indices).astype('int64'),
+                         'distancia_km': np.concatenate(distancias)})
+
+
+class IndiceEspacial:
+    """Grade de células sobre (lat, lon) com consultas em lote por raio e k vizinhos"""
+
+    def __init__(self, lat, lon, tamanho_celula_km=50.0):
+        """Constrói a grade; tamanho_celula_km próximo do raio típico das consultas é o ideal"""
+        self.lat = np.asarray(lat, dtype='float64')
+        self.lon = np.asarray(lon, dtype='float64')
+        self.tamanho_celula_km = float(tamanho_celula_km)
+        self.passo_lat = self.tamanho_celula_km / KM_POR_GRAU
+        # A largura de um grau de longitude diminui com a latitude: o passo em
+        # longitude garante células com pelo menos tamanho_celula_km na maior latitude
+        lat_maxima = min(float(np.max(np.abs(self.lat))) if len(self.lat) else 0.0, 89.0)
+        self.passo_lon = self.passo_lat / np.cos(np.radians(lat_maxima))
+        self.lat_maxima = lat_maxima
+
+        chaves = self._chaves(*self._celulas(self.lat, self.lon))
+        self.ordem = np.argsort(chaves, kind='stable')
+        self.chaves_ordenadas = chaves[self.ordem]
+        self.n_celulas = int(np.count_nonzero(np.diff(self.chaves_ordenadas))) + 1 if len(chaves) else 0
+
+    def __len__(self):
+        return len(self.lat)
+
+    def _celulas(self, lat, lon):
+        """Índices (linha, coluna) da célula de cada ponto"""
+        return (np.floor(np.asarray(lat, dtype='float64') / self.passo_lat).astype('int64'),
+                np.floor(np.asarray(lon, dtype='float64') / self.passo_lon).astype('int64'))
+
+    @staticmethod
+    def _chaves(linhas, colunas):
+        """Chave única (int64) de cada célula"""
+        return (linhas + _DESLOCAMENTO) * _BASE + (colunas + _DESLOCAMENTO)
+
+    def pares_no_raio(self, lat, lon, raio_km):
+        """Todos os pares (consulta, loja) a até raio_km de distância
+
+        Retorna DataFrame com as colunas consulta (posição da consulta),
+        indice (posição da loja no índice) e distancia_km.
+        """
+        lat = np.atleast_1d(np.asarray(lat, dtype='float64'))
+        lon = np.atleast_1d(np.asarray(lon, dtype='float64'))
+        consultas, indices, distancias = [], [], []
+        for consulta, indice, distancia in self._blocos_no_raio(lat, lon, raio_km):
+            consultas.append(consulta)
+            indices.append(indice)
+            distancias.append(distancia)
+        return _montar_pares(consultas, indices, distancias)
+
+    def _blocos_no_raio(self, lat, lon, raio_km, candidatos_por_bloco=1_000_000):
+        """Gera os pares no raio em blocos (consulta, indice, distancia_km)
+
+        Cada deslocamento de célula é dividido em blocos de consultas com até
+        ~candidatos_por_bloco candidatos, o que limita a memória de trabalho.
+        """
+        raio_km = float(raio_km)
+        linhas, colunas = self._celulas(lat, lon)
+
+        # Quantas células cobrir em cada direção: em longitude, considera a
+        # maior latitude entre dados e consultas (onde o grau é mais estreito)
+        k_lat = int(np.ceil(raio_km / self.tamanho_celula_km))
+        lat_referencia = min(max(self.lat_maxima, float(np.max(np.abs(lat))) if len(lat) else 0.0), 89.0)
+        graus_lon = raio_km / (KM_POR_GRAU * np.cos(np.radians(lat_referencia)))
+        k_lon = int(np.ceil(graus_lon / self.passo_lon))
+        # Raio maior que metade do globo em longitude: basta varrer todas as colunas ocupadas
+        k_lon = min(k_lon, int(np.ceil(180.0 / self.passo_lon)) + 1)
+
+        # Raio grande em relação à grade: mais deslocamentos do que células
+        # ocupadas. Nesse caso é mais barato comparar com todas as lojas.
+        if (2 * k_lat + 1) * (2 * k_lon + 1) > self.n_celulas:
+            yield from self._blocos_todos(lat, lon, raio_km)
+            return
+
+        for dl in range(-k_lat, k_lat + 1):
+            for dc in range(-k_lon, k_lon + 1):
+                alvo = self._chaves(linhas + dl, colunas + dc)
+                inicio = np.searchsorted(self.chaves_ordenadas, alvo, side='left')
+                fim = np.searchsorted(self.chaves_ordenadas, alvo, side='right')
+                contagem = fim - inicio
+                acumulado = np.cumsum(contagem)
+                if not len(acumulado) or not acumulado[-1]:
+                    continue
+                # Consultas consecutivas agrupadas em blocos de até ~candidatos_por_bloco candidatos
+                a = 0
+                while a < len(lat):
+                    base = int(acumulado[a - 1]) if a else 0
+                    b = max(int(np.searchsorted(acumulado, base + candidatos_por_bloco, side='right')), a + 1)
+                    total = int(acumulado[b - 1]) - base
+                    if total:
+                        bloco_contagem = contagem[a:b]
+                        consulta = np.repeat(np.arange(a, b), bloco_contagem)
+                        deslocamento = np.arange(total) - np.repeat(acumulado[a:b] - base - bloco_contagem,
+                                                                    bloco_contagem)
+                        indice = self.ordem[np.repeat(inicio[a:b], bloco_contagem) + deslocamento]
+                        distancia = haversine_km(lat[consulta], lon[consulta], self.lat[indice], self.lon[indice])
+                        dentro = distancia <= raio_km
+                        yield consulta[dentro], indice[dentro], distancia[dentro]
+                    a = b
+
+    def _blocos_todos(self, lat, lon, raio_km, elementos_por_bloco=4_000_000):
+        """Pares no raio comparando cada consulta com todas as lojas, em blocos de consultas"""
+        tamanho_bloco = max(1, elementos_por_bloco // max(len(self), 1))
+        for inicio in range(0, len(lat), tamanho_bloco):
+            bloco = slice(inicio, inicio + tamanho_bloco)
+            distancia = haversine_km(lat[bloco, None], lon[bloco, None], self.lat[None, :], self.lon[None, :])
+            consulta, indice = np.nonzero(distancia <= raio_km)
+            yield consulta + inicio, indice, distancia[consulta, indice]
+
+    def agregar_no_raio(self, lat, lon, raio_km, valores=None, excluir=None):
+        """Contagem, soma de `valores` e menor distância das lojas a até raio_km de cada consulta
+
+        Acumula bloco a bloco (um por deslocamento de célula), sem montar a
+        lista de pares: a memória não cresce com o total de pares.
+        excluir: posição no índice a ignorar para cada consulta (ex.: a própria loja).
+        Retorna (contagem, soma, menor_distancia); menor_distancia é inf para
+        consultas sem lojas no raio.
+        """
+        lat = np.atleast_1d(np.asarray(lat, dtype='float64'))
+        lon = np.atleast_1d(np.asarray(lon, dtype='float64'))
+        n = len(lat)
+        valores = None if valores is None else np.asarray(valores, dtype='float64')
+        excluir = None if excluir is None else np.asarray(excluir)
+        contagem = np.zeros(n, dtype='int64')
+        soma = np.zeros(n)
+        menor = np.full(n, np.inf)
+        for consulta, indice, distancia in self._blocos_no_raio(lat, lon, raio_km):
+            if excluir is not None:
+                manter = indice != excluir[consulta]
+                consulta, indice, distancia = consulta[manter], indice[manter], distancia[manter]
+            contagem += np.bincount(consulta, minlength=n)
+            if valores is not None:
+                soma += np.bincount(consulta, weights=valores[indice], minlength=n)
+            np.minimum.at(menor, consulta, distancia)
+        return contagem, soma, menor
+
+    def contagem_no_raio(self, lat, lon, raio_km):
+        """Quantidade de lojas a até raio_km de cada consulta"""
+        return self.agregar_no_raio(lat, lon, raio_km)[0]
+
+    def k_mais_proximos(self, lat, lon, k, excluir=None):
+        """Os k vizinhos mais próximos de cada consulta
+
+        excluir: array com a posição no índice a ignorar para cada consulta
+        (ex.: a própria loja, quando as consultas são as lojas do índice).
+        Retorna (indices, distancias), matrizes (consultas × k) completadas
+        com -1 / inf quando há menos de k lojas.
+        """
+        lat = np.atleast_1d(np.asarray(lat, dtype='float64'))
+        lon = np.atleast_1d(np.asarray(lon, dtype='float64'))
+        n = len(lat)
+        k = min(int(k), len(self) - (1 if excluir is not None else 0))
+        indices = np.full((n, max(k, 0)), -1, dtype='int64')
+        distancias = np.full((n, max(k, 0)), np.inf)
+        if n == 0 or k <= 0:
+            return indices, distancias
+
+        # Raio crescente: só as consultas que ainda não têm k vizinhos são refeitas
+        pendentes = np.arange(n)
+        raio = self.tamanho_celula_km
+        while len(pendentes):
+            pares = self.pares_no_raio(lat[pendentes], lon[pendentes], raio)
+            if excluir is not None:
+                proprio = np.asarray(excluir)[pendentes][pares['consulta'].to_numpy()]
+                pares = pares[pares['indice'].to_numpy() != proprio]
+            consulta = pares['consulta'].to_numpy()
+            contagem = np.bincount(consulta, minlength=len(pendentes))
+            completas = (contagem >= k) | (raio >= DISTANCIA_MAXIMA_KM)
+
+            # Dentro de cada consulta, ordena por distância e mantém as k primeiras
+            selecionados = completas[consulta]
+            consulta, indice, distancia = (consulta[selecionados], pares['indice'].to_numpy()[selecionados],
+                                           pares['distancia_km'].to_numpy()[selecionados])
+            ordem = np.lexsort((distancia, consulta))
+            consulta, indice, distancia = consulta[ordem], indice[ordem], distancia[ordem]
+            inicio_grupo = np.searchsorted(consulta, consulta, side='left')
+            posicao = np.arange(len(consulta)) - inicio_grupo
+            manter = posicao < k
+            linhas = pendentes[consulta[manter]]
+            indices[linhas, posicao[manter]] = indice[manter]
+            distancias[linhas, posicao[manter]] = distancia[manter]
+
+            pendentes = pendentes[~completas]
+            raio = min(raio * 2.0, DISTANCIA_MAXIMA_KM)
+        return indices, distancias
+
+    def densidade_por_celula(self, valores=None):
+        """Quantidade de lojas (e soma de `valores`, se informado) por célula ocupada da grade"""
+        linhas, colunas = self._celulas(self.lat, self.lon)
+        dados = pd.DataFrame({'linha': linhas, 'coluna': colunas})
+        especificacao = {'n_lojas': ('linha', 'size')}
+        if valores is not None:
+            dados['valor'] = np.asarray(valores, dtype='float64')
+            especificacao['valor_total'] = ('valor', 'sum')
+        densidade = dados.groupby(['linha', 'coluna']).agg(**especificacao).reset_index()
+        densidade['lat_centro'] = (densidade['linha'] + 0.5) * self.passo_lat
+        densidade['lon_centro'] = (densidade['coluna'] + 0.5) * self.passo_lon
+        return densidade.sort_values('n_lojas', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def features_vizinhanca(dados_lojas, raio_km=50.0, indice=None):
+    """Features de concorrência de cada loja, para uso no score
+
+    n_vizinhos: outras lojas a até raio_km; faturamento_medio_vizinhos: média
+    do faturamento dessas lojas (0 sem vizinhos); distancia_concorrente_km:
+    distância até a loja mais próxima (DISTANCIA_MAXIMA_KM se não há outra loja).
+    """
+    if indice is None:
+        indice = IndiceEspacial(dados_lojas['lat'], dados_lojas['lon'], tamanho_celula_km=raio_km)
+    n = len(dados_lojas)
+    posicoes = np.arange(n)
+    lat = dados_lojas['lat'].to_numpy(dtype='float64')
+    lon = dados_lojas['lon'].to_numpy(dtype='float64')
+    faturamento = dados_lojas['faturamento_mensal'].to_numpy(dtype='float64')
+
+    n_vizinhos, soma, mais_proximo = indice.agregar_no_raio(lat, lon, raio_km, valores=faturamento,
+                                                            excluir=posicoes)
+    media = np.divide(soma, n_vizinhos, out=np.zeros(n), where=n_vizinhos > 0)
+
+    # Só as lojas sem vizinhos no raio procuram o concorrente mais longe
+    sem_vizinhos = np.flatnonzero(n_vizinhos == 0)
+    if len(sem_vizinhos):
+        _, distancias = indice.k_mais_proximos(lat[sem_vizinhos], lon[sem_vizinhos], 1,
+                                               excluir=posicoes[sem_vizinhos])
+        if distancias.shape[1]:
+            mais_proximo[sem_vizinhos] = distancias[:, 0]
+    mais_proximo = np.where(np.isfinite(mais_proximo), mais_proximo, DISTANCIA_MAXIMA_KM)
+
+    return pd.DataFrame({
+        'n_vizinhos': n_vizinhos,
+        'faturamento_medio_vizinhos': media,
+        'distancia_concorrente_km': mais_proximo,
+    }, index=dados_lojas.index)
@@ -0,0 +1,664 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Renderização dos gráficos da análise das lojas
+
+Cada função desenhar_* recebe apenas os dados já preparados de que precisa
+(nunca o objeto AnaliseLojasJoao inteiro) e retorna a figura; renderizar_grafico
+salva o arquivo no formato/DPI configurados, fecha a figura e mede tempo e
+tamanho. Por serem funções de módulo com argumentos serializáveis, podem ser
+executadas em processos separados (ver renderizar_em_paralelo).
+
+O manifesto (manifesto_graficos.json no diretório dos gráficos) guarda o hash
+das entradas e configurações de cada arquivo gerado; um gráfico cujo hash não
+mudou não precisa ser desenhado de novo.
+
+matplotlib e seaborn só são importados (e o estilo aplicado) na primeira
+renderização, em carregar_matplotlib.
+"""
+
+import functools
+import hashlib
+import importlib.metadata
+import json
+import os
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from series_mensais import tendencia_linear
+
+# matplotlib, seaborn e Patch são importados na primeira renderização
+# (carregar_matplotlib); quem usa só os dados ou o relatório não paga por eles
+plt = None
+sns = None
+Patch = None
+# Backend pedido antes da importação do pyplot (ver usar_backend_nao_interativo)
+_backend_pendente = None
+
+DIRETORIO_GRAFICOS = '../outputs/graficos'
+
+ARQUIVOS_GRAFICOS = {
+    'grafico_faturamento_por_loja': 'grafico_1_faturamento_por_loja',
+    'grafico_categoria_vendas': 'grafico_2_categorias_vendas',
+    'grafico_avaliacao_vs_faturamento': 'grafico_3_avaliacao_vs_faturamento',
+    'mapa_geografico_vendas': 'grafico_4_mapa_geografico',
+    'analise_regional_completa': 'grafico_5_analise_regional',
+    'ranking_lojas_performance': 'grafico_6_ranking_performance',
+}
+
+# Colunas de dados_lojas que cada gráfico lê (score_performance vem dos critérios de pontuação)
+DEPENDENCIAS_GRAFICOS = {
+    'grafico_faturamento_por_loja': ('nome_loja', 'faturamento_mensal'),
+    'grafico_categoria_vendas': ('categoria_principal', 'faturamento_mensal'),
+    'grafico_avaliacao_vs_faturamento': ('avaliacao_media', 'faturamento_mensal', 'regiao'),
+    'mapa_geografico_vendas': ('lon', 'lat', 'faturamento_mensal', 'avaliacao_media'),
+    'analise_regional_completa': ('regiao', 'faturamento_mensal', 'avaliacao_media', 'frete_medio',
+                                  'produtos_vendidos'),
+    'ranking_lojas_performance': ('nome_loja', 'regiao', 'score_performance'),
+}
+
+FORMATOS_SAIDA = ('png', 'svg', 'webp')
+DPI_PADRAO = 300
+ARQUIVO_MANIFESTO = 'manifesto_graficos.json'
+
+CORES_REGIOES = {'Sudeste': '#1f77b4', 'Nordeste': '#ff7f0e', 'Sul': '#2ca02c',
+                 'Centro-Oeste': '#d62728', 'Norte': '#9467bd'}
+
+# Acima deste número de lojas os gráficos por loja passam ao modo agregado:
+# top-N + "demais lojas" nas barras, amostra na dispersão e grade de densidade no mapa
+LIMITE_LOJAS_DETALHADO = 50
+TOP_N_BARRAS = 30
+AMOSTRA_DISPERSAO = 5000
+CELULAS_MAPA = 60
+ROTULO_DEMAIS = 'Demais lojas'
+COR_DEMAIS = '#9e9e9e'
+
+
+def carregar_matplotlib():
+    """Importa matplotlib/seaborn e aplica o estilo dos gráficos (só na primeira chamada)
+
+    Retorna o módulo pyplot.
+    """
+    global plt, sns, Patch
+    if plt is None:
+        import matplotlib
+        if _backend_pendente is not None:
+            matplotlib.use(_backend_pendente)
+        import matplotlib.pyplot as pyplot
+        import seaborn
+        from matplotlib.patches import Patch as patch
+
+        # Configurações de estilo
+        pyplot.style.use('default')
+        seaborn.set_theme()
+        pyplot.rcParams['figure.figsize'] = (12, 8)
+        pyplot.rcParams['font.size'] = 10
+        plt, sns, Patch = pyplot, seaborn, patch
+    return plt
+
+
+def modo_detalhado(n_lojas, limite=LIMITE_LOJAS_DETALHADO):
+    """True se os gráficos devem desenhar cada loja individualmente"""
+    return n_lojas <= limite
+
+
+def top_n_com_demais(dados, coluna, n=TOP_N_BARRAS):
+    """As n lojas de maior `coluna` e uma linha com a média das demais, em ordem crescente
+
+    A linha das demais vem primeiro (base do gráfico de barras horizontais); nas
+    colunas de texto ela recebe ROTULO_DEMAIS e, em nome_loja, a quantidade de lojas.
+    """
+    top = dados.nlargest(n, coluna).iloc[::-1]
+    restantes = len(dados) - len(top)
+    if not restantes:
+        return top
+    demais = {c: ROTULO_DEMAIS for c in dados.columns}
+    demais['nome_loja'] = f"Demais {restantes:,} lojas (média)".replace(',', '.')
+    demais[coluna] = dados[coluna].drop(top.index).mean()
+    textos = {c: 'object' for c in dados.columns if c != coluna}
+    return pd.concat([pd.DataFrame([demais]).astype(textos), top.astype(textos)], ignore_index=True)
+
+
+def densidade_geografica(dados, celulas=CELULAS_MAPA):
+    """Faturamento total e avaliação média por célula de uma grade lon × lat
+
+    Substitui um ponto por loja por uma grade de tamanho fixo, de modo que o
+    custo de desenho do mapa não depende do número de lojas.
+    """
+    lon = dados['lon'].to_numpy(dtype='float64')
+    lat = dados['lat'].to_numpy(dtype='float64')
+    contagem, bordas_lon, bordas_lat = np.histogram2d(lon, lat, bins=celulas)
+    grade = [bordas_lon, bordas_lat]
+    faturamento, _, _ = np.histogram2d(lon, lat, bins=grade,
+                                       weights=dados['faturamento_mensal'].to_numpy(dtype='float64'))
+    soma_avaliacao, _, _ = np.histogram2d(lon, lat, bins=grade,
+                                          weights=dados['avaliacao_media'].to_numpy(dtype='float64'))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        avaliacao = soma_avaliacao / contagem
+    return {
+        'bordas_lon': bordas_lon,
+        'bordas_lat': bordas_lat,
+        'contagem': contagem,
+        'faturamento_total': np.where(contagem > 0, faturamento, np.nan),
+        'avaliacao_media': avaliacao,
+    }
+
+
+def desenhar_faturamento_por_loja(dados_ordenados, total_lojas=None):
+    """Gráfico 1: Faturamento por loja (Gráfico de Barras)
+
+    dados_ordenados: nome_loja e faturamento_mensal, já em ordem crescente.
+    total_lojas: informado no modo agregado (dados_ordenados = top_n_com_demais).
+    """
+    carregar_matplotlib()
+    fig, ax = plt.subplots(figsize=(15, 8))
+
+    bars = ax.barh(dados_ordenados['nome_loja'], dados_ordenados['faturamento_mensal'],
+                   color=sns.color_palette("viridis", len(dados_ordenados)))
+
+    # Adicionar valores nas barras (uma única chamada para todos os rótulos)
+    ax.bar_label(bars, fmt='R$ {:,.0f}', padding=3, fontweight='bold')
+
+    ax.set_xlabel('Faturamento Mensal (R$)', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Lojas', fontsize=12, fontweight='bold')
+    subtitulo = ('Ordenado do menor para o maior' if total_lojas is None else
+                 f'Top {len(dados_ordenados) - 1} de {total_lojas:,} lojas'.replace(',', '.'))
+    ax.set_title(f'💰 Faturamento Mensal por Loja\n({subtitulo})',
+                fontsize=14, fontweight='bold', pad=20)
+
+    # Formatação do eixo x
+    ax.ticklabel_format(style='plain', axis='x')
+    ax.grid(axis='x', alpha=0.3)
+
+    plt.tight_layout()
+    return fig
+
+
+def desenhar_categoria_vendas(faturamento_categoria, categoria_count):
+    """Gráfico 2: Participação das categorias no faturamento total (Gráfico de Pizza)
+
+    faturamento_categoria: soma do faturamento por categoria.
+    categoria_count: quantidade de lojas por categoria (ordem decrescente).
+    """
+    carregar_matplotlib()
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(18, 8))
+
+    # Gráfico de Pizza - Faturamento por Categoria
+    colors = plt.cm.Set3(np.linspace(0, 1, len(faturamento_categoria)))
+    wedges, texts, autotexts = ax1.pie(faturamento_categoria.values,
+                                      labels=faturamento_categoria.index,
+                                      autopct='%1.1f%%',
+                                      colors=colors,
+                                      explode=[0.05 if cat == faturamento_categoria.idxmax() else 0
+                                              for cat in faturamento_categoria.index],
+                                      shadow=True,
+                                      startangle=90)
+
+    ax1.set_title('🏪 Participação das Categorias no Faturamento Total',
+                 fontsize=14, fontweight='bold', pad=20)
+
+    # Melhorar a aparência dos textos
+    for autotext in autotexts:
+        autotext.set_color('white')
+        autotext.set_fontweight('bold')
+        autotext.set_fontsize(10)
+
+    # Gráfico de Barras - Quantidade de Lojas por Categoria
+    bars = ax2.bar(categoria_count.index, categoria_count.values,
+                   color=sns.color_palette("husl", len(categoria_count)))
+
+    ax2.set_title('📊 Quantidade de Lojas por Categoria',
+                 fontsize=14, fontweight='bold', pad=20)
+    ax2.set_xlabel('Categoria', fontsize=12, fontweight='bold')
+    ax2.set_ylabel('Número de Lojas', fontsize=12, fontweight='bold')
+
+    # Adicionar valores nas barras
+    for bar in bars:
+        height = bar.get_height()
+        ax2.text(bar.get_x() + bar.get_width()/2., height + 0.1,
+                f'{int(height)}', ha='center', va='bottom', fontweight='bold')
+
+    ax2.grid(axis='y', alpha=0.3)
+    plt.xticks(rotation=45)
+
+    plt.tight_layout()
+    return fig
+
+
+def desenhar_avaliacao_vs_faturamento(dados, tendencia=None, correlacao=None, total_lojas=None):
+    """Gráfico 3: Correlação entre Avaliação e Faturamento (Gráfico de Dispersão)
+
+    dados: avaliacao_media, faturamento_mensal e regiao de cada loja.
+    No modo agregado (total_lojas informado) os pontos são menores e dados tem
+    no máximo AMOSTRA_DISPERSAO lojas (amostra acima disso); tendencia
+    (inclinação e intercepto de series_mensais.tendencia_linear), correlacao e
+    total_lojas vêm do conjunto completo.
+    """
+    carregar_matplotlib()
+    fig, ax = plt.subplots(figsize=(14, 8))
+
+    # Criar o scatter plot com cores por região
+    regioes = dados['regiao'].unique()
+    colors = plt.cm.tab10(np.linspace(0, 1, len(regioes)))
+    estilo = ({'s': 100, 'alpha': 0.7, 'edgecolors': 'black', 'linewidth': 1} if total_lojas is None
+              else {'s': 12, 'alpha': 0.4, 'linewidth': 0})
+
+    for i, regiao in enumerate(regioes):
+        dados_regiao = dados[dados['regiao'] == regiao]
+        ax.scatter(dados_regiao['avaliacao_media'], dados_regiao['faturamento_mensal'],
+                  c=[colors[i]], label=regiao, **estilo)
+
+    # Adicionar linha de tendência (mínimos quadrados em forma fechada)
+    if tendencia is None:
+        tendencia = tendencia_linear(dados['avaliacao_media'], dados['faturamento_mensal'])
+    inclinacao, intercepto = tendencia
+    ax.plot(dados['avaliacao_media'], intercepto + inclinacao * dados['avaliacao_media'],
+            "r--", alpha=0.8, linewidth=2, label='Linha de Tendência')
+
+    # Calcular correlação
+    if correlacao is None:
+        correlacao = dados['avaliacao_media'].corr(dados['faturamento_mensal'])
+
+    ax.set_xlabel('Avaliação Média (⭐)', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Faturamento Mensal (R$)', fontsize=12, fontweight='bold')
+    if total_lojas is None:
+        amostra = ''
+    elif len(dados) < total_lojas:
+        amostra = f' | amostra de {len(dados):,} de {total_lojas:,} lojas'.replace(',', '.')
+    else:
+        amostra = f' | {total_lojas:,} lojas'.replace(',', '.')
+    ax.set_title(f'⭐ Correlação entre Avaliação e Faturamento\n(Correlação: {correlacao:.3f}{amostra})',
+                fontsize=14, fontweight='bold', pad=20)
+
+    ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+    ax.grid(True, alpha=0.3)
+
+    # Formatação do eixo y
+    ax.ticklabel_format(style='plain', axis='y')
+
+    plt.tight_layout()
+    return fig
+
+
+def desenhar_mapa_geografico(dados=None, densidade=None):
+    """Gráfico 4: Mapa de Vendas por Localização Geográfica
+
+    dados: lon, lat, faturamento_mensal e avaliacao_media de cada loja; ou, no
+    modo agregado, densidade: grade calculada por densidade_geografica.
+    """
+    carregar_matplotlib()
+    if densidade is not None:
+        return _desenhar_mapa_densidade(densidade)
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(20, 8))
+
+    # Mapa de Dispersão - Faturamento por Localização
+    scatter = ax1.scatter(dados['lon'], dados['lat'],
+                         c=dados['faturamento_mensal'],
+                         s=dados['faturamento_mensal']/1000,
+                         cmap='viridis', alpha=0.7, edgecolors='black', linewidth=1)
+
+    ax1.set_xlabel('Longitude', fontsize=12, fontweight='bold')
+    ax1.set_ylabel('Latitude', fontsize=12, fontweight='bold')
+    ax1.set_title('🗺️ Distribuição Geográfica do Faturamento\n(Tamanho do ponto = Faturamento)',
+                 fontsize=14, fontweight='bold', pad=20)
+
+    # Adicionar colorbar
+    cbar1 = plt.colorbar(scatter, ax=ax1, shrink=0.8)
+    cbar1.set_label('Faturamento (R$)', fontweight='bold')
+
+    # Mapa de Dispersão - Avaliação por Localização
+    scatter2 = ax2.scatter(dados['lon'], dados['lat'],
+                          c=dados['avaliacao_media'],
+                          s=200, cmap='RdYlGn', alpha=0.7, edgecolors='black', linewidth=1)
+
+    ax2.set_xlabel('Longitude', fontsize=12, fontweight='bold')
+    ax2.set_ylabel('Latitude', fontsize=12, fontweight='bold')
+    ax2.set_title('⭐ Distribuição Geográfica das Avaliações',
+                 fontsize=14, fontweight='bold', pad=20)
+
+    # Adicionar colorbar
+    cbar2 = plt.colorbar(scatter2, ax=ax2, shrink=0.8)
+    cbar2.set_label('Avaliação Média', fontweight='bold')
+
+    plt.tight_layout()
+    return fig
+
+
+def _desenhar_mapa_densidade(densidade):
+    """Gráfico 4 no modo agregado: faturamento total e avaliação média por célula"""
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(20, 8))
+    bordas_lon, bordas_lat = densidade['bordas_lon'], densidade['bordas_lat']
+    n_lojas = int(densidade['contagem'].sum())
+
+    malha1 = ax1.pcolormesh(bordas_lon, bordas_lat, np.ma.masked_invalid(densidade['faturamento_total'].T),
+                            cmap='viridis', shading='flat')
+    ax1.set_xlabel('Longitude', fontsize=12, fontweight='bold')
+    ax1.set_ylabel('Latitude', fontsize=12, fontweight='bold')
+    ax1.set_title(f'🗺️ Distribuição Geográfica do Faturamento\n(Faturamento total por área | '
+                  f'{n_lojas:,} lojas)'.replace(',', '.'), fontsize=14, fontweight='bold', pad=20)
+    cbar1 = plt.colorbar(malha1, ax=ax1, shrink=0.8)
+    cbar1.set_label('Faturamento (R$)', fontweight='bold')
+
+    malha2 = ax2.pcolormesh(bordas_lon, bordas_lat, np.ma.masked_invalid(densidade['avaliacao_media'].T),
+                            cmap='RdYlGn', shading='flat')
+    ax2.set_xlabel('Longitude', fontsize=12, fontweight='bold')
+    ax2.set_ylabel('Latitude', fontsize=12, fontweight='bold')
+    ax2.set_title('⭐ Distribuição Geográfica das Avaliações\n(Avaliação média por área)',
+                 fontsize=14, fontweight='bold', pad=20)
+    cbar2 = plt.colorbar(malha2, ax=ax2, shrink=0.8)
+    cbar2.set_label('Avaliação Média', fontweight='bold')
+
+    plt.tight_layout()
+    return fig
+
+
+def desenhar_analise_regional(faturamento_regiao, avaliacao_regiao, frete_regiao,
+                              produtos_regiao):
+    """Gráfico 5: Análise Completa por Região
+
+    faturamento_regiao: DataFrame com mean/sum/count do faturamento por região;
+    demais argumentos: Series por região.
+    """
+    carregar_matplotlib()
+    fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(18, 12))
+
+    # 1. Faturamento Médio por Região
+    bars1 = ax1.bar(faturamento_regiao.index, faturamento_regiao['mean'],
+                   color=sns.color_palette("viridis", len(faturamento_regiao)))
+    ax1.set_title('💰 Faturamento Médio por Região', fontweight='bold', fontsize=12)
+    ax1.set_ylabel('Faturamento Médio (R$)', fontweight='bold')
+    ax1.tick_params(axis='x', rotation=45)
+
+    for bar in bars1:
+        height = bar.get_height()
+        ax1.text(bar.get_x() + bar.get_width()/2., height + 1000,
+                f'R$ {height:,.0f}', ha='center', va='bottom', fontweight='bold', fontsize=9)
+
+    # 2. Avaliação Média por Região
+    bars2 = ax2.bar(avaliacao_regiao.index, avaliacao_regiao.values,
+                   color=sns.color_palette("plasma", len(avaliacao_regiao)))
+    ax2.set_title('⭐ Avaliação Média por Região', fontweight='bold', fontsize=12)
+    ax2.set_ylabel('Avaliação Média', fontweight='bold')
+    ax2.tick_params(axis='x', rotation=45)
+    ax2.set_ylim(3.5, 5.0)
+
+    for bar in bars2:
+        height = bar.get_height()
+        ax2.text(bar.get_x() + bar.get_width()/2., height + 0.02,
+                f'{height:.2f}', ha='center', va='bottom', fontweight='bold', fontsize=9)
+
+    # 3. Frete Médio por Região
+    bars3 = ax3.bar(frete_regiao.index, frete_regiao.values,
+                   color=sns.color_palette("coolwarm", len(frete_regiao)))
+    ax3.set_title('🚚 Frete Médio por Região', fontweight='bold', fontsize=12)
+    ax3.set_ylabel('Frete Médio (R$)', fontweight='bold')
+    ax3.tick_params(axis='x', rotation=45)
+
+    for bar in bars3:
+        height = bar.get_height()
+        ax3.text(bar.get_x() + bar.get_width()/2., height + 0.2,
+                f'R$ {height:.2f}', ha='center', va='bottom', fontweight='bold', fontsize=9)
+
+    # 4. Produtos Vendidos por Região
+    bars4 = ax4.bar(produtos_regiao.index, produtos_regiao.values,
+                   color=sns.color_palette("Set2", len(produtos_regiao)))
+    ax4.set_title('📦 Total de Produtos Vendidos por Região', fontweight='bold', fontsize=12)
+    ax4.set_ylabel('Produtos Vendidos', fontweight='bold')
+    ax4.tick_params(axis='x', rotation=45)
+
+    for bar in bars4:
+        height = bar.get_height()
+        ax4.text(bar.get_x() + bar.get_width()/2., height + 50,
+                f'{int(height)}', ha='center', va='bottom', fontweight='bold', fontsize=9)
+
+    plt.suptitle('📊 ANÁLISE COMPLETA POR REGIÃO', fontsize=16, fontweight='bold', y=0.98)
+    plt.tight_layout()
+    return fig
+
+
+def desenhar_ranking_performance(dados_ranking, total_lojas=None):
+    """Gráfico 6: Ranking de Performance das Lojas
+
+    dados_ranking: nome_loja, regiao e score_performance, em ordem crescente de score.
+    total_lojas: informado no modo agregado (dados_ranking = top_n_com_demais).
+    """
+    carregar_matplotlib()
+    fig, ax = plt.subplots(figsize=(16, 10))
+
+    # Criar cores baseadas na região
+    colors = [CORES_REGIOES.get(region, COR_DEMAIS) for region in dados_ranking['regiao']]
+
+    bars = ax.barh(range(len(dados_ranking)), dados_ranking['score_performance'],
+                   color=colors, alpha=0.8, edgecolor='black', linewidth=0.5)
+
+    # Personalizar eixos
+    ax.set_yticks(range(len(dados_ranking)))
+    ax.set_yticklabels(dados_ranking['nome_loja'], fontsize=10)
+    ax.set_xlabel('Score de Performance', fontsize=12, fontweight='bold')
+    subtitulo = ('Baseado em Faturamento, Avaliação e Frete' if total_lojas is None else
+                 f'Top {len(dados_ranking) - 1} de {total_lojas:,} lojas'.replace(',', '.'))
+    ax.set_title(f'🏆 RANKING DE PERFORMANCE DAS LOJAS\n({subtitulo})',
+                fontsize=14, fontweight='bold', pad=20)
+
+    # Adicionar valores nas barras (uma única chamada para todos os rótulos)
+    ax.bar_label(bars, fmt='{:.3f}', padding=3, fontweight='bold', fontsize=9)
+
+    # Adicionar legenda das regiões
+    legend_elements = [Patch(facecolor=color, label=region)
+                      for region, color in CORES_REGIOES.items()]
+    if total_lojas is not None:
+        legend_elements.append(Patch(facecolor=COR_DEMAIS, label=ROTULO_DEMAIS))
+    ax.legend(handles=legend_elements, loc='lower right', title='Regiões', title_fontsize=12)
+
+    ax.grid(axis='x', alpha=0.3)
+    plt.tight_layout()
+    return fig
+
+
+# Função de desenho de cada gráfico, na ordem do relatório
+FUNCOES_GRAFICOS = {
+    'grafico_faturamento_por_loja': desenhar_faturamento_por_loja,
+    'grafico_categoria_vendas': desenhar_categoria_vendas,
+    'grafico_avaliacao_vs_faturamento': desenhar_avaliacao_vs_faturamento,
+    'mapa_geografico_vendas': desenhar_mapa_geografico,
+    'analise_regional_completa': desenhar_analise_regional,
+    'ranking_lojas_performance': desenhar_ranking_performance,
+}
+
+
+def usar_backend_nao_interativo():
+    """Troca para o backend Agg: nenhuma janela é aberta e plt.show() não bloqueia
+
+    Se o pyplot ainda não foi importado, o backend é aplicado na importação.
+    """
+    global _backend_pendente
+    if plt is None:
+        _backend_pendente = 'Agg'
+    else:
+        plt.switch_backend('Agg')
+
+
+def renderizar_grafico(nome, argumentos, caminho, dpi=DPI_PADRAO, fechar=True):
+    """Desenha e salva um gráfico, retornando as métricas de renderização.
+
+    O formato do arquivo é definido pela extensão de `caminho`. Com fechar=False
+    a figura continua aberta (para exibição interativa) e é retornada em 'figura'.
+    A importação do matplotlib (só no primeiro gráfico do processo) é medida à
+    parte, em segundos_importacao, e não entra no tempo de desenho.
+    """
+    inicio_importacao = time.perf_counter()
+    carregar_matplotlib()
+    segundos_importacao = time.perf_counter() - inicio_importacao
+    inicio_unix = time.time()
+    inicio = time.perf_counter()
+    fig = FUNCOES_GRAFICOS[nome](**argumentos)
+    desenho = time.perf_counter()
+    diretorio = os.path.dirname(caminho)
+    if diretorio:
+        os.makedirs(diretorio, exist_ok=True)
+    fig.savefig(caminho, dpi=dpi, bbox_inches='tight')
+    fim = time.perf_counter()
+    metricas = {
+        'grafico': nome,
+        'arquivo': caminho,
+        'formato': os.path.splitext(caminho)[1].lstrip('.'),
+        'dpi': dpi,
+        'segundos_desenho': round(desenho - inicio, 4),
+        'segundos_salvar': round(fim - desenho, 4),
+        'segundos': round(fim - inicio, 4),
+        'segundos_importacao': round(segundos_importacao, 4),
+        'bytes': os.path.getsize(caminho),
+        'inicio_unix': inicio_unix,
+        'processo': os.getpid(),
+    }
+    if fechar:
+        plt.close(fig)
+    else:
+        metricas['figura'] = fig
+    return metricas
+
+
+def _inicializar_worker():
+    """Worker de renderização: backend Agg, matplotlib já importado e sem o tracemalloc herdado"""
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+    usar_backend_nao_interativo()
+    carregar_matplotlib()
+
+
+def _executar_tarefa(nome, argumentos, caminho, dpi):
+    """Executa a renderização de um gráfico no worker"""
+    return renderizar_grafico(nome, argumentos, caminho, dpi=dpi)
+
+
+def renderizar_em_paralelo(tarefas, jobs, dpi=DPI_PADRAO):
+    """Renderiza as tarefas (nome, argumentos, caminho) em um pool de processos Agg.
+
+    Retorna a lista de métricas na ordem das tarefas. Erros de um gráfico são
+    propagados ao chamador.
+    """
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_inicializar_worker) as executor:
+        futuros = [executor.submit(_executar_tarefa, nome, argumentos, caminho, dpi)
+                   for nome, argumentos, caminho in tarefas]
+        return [futuro.result() for futuro in futuros]
+
+
+def caminho_grafico(nome, diretorio=DIRETORIO_GRAFICOS, formato='png'):
+    """Caminho do arquivo de saída de um gráfico"""
+    if formato not in FORMATOS_SAIDA:
+        raise ValueError(f"formato deve ser um de {FORMATOS_SAIDA}, recebido: {formato!r}")
+    return os.path.join(diretorio, f"{ARQUIVOS_GRAFICOS[nome]}.{formato}")
+
+
+@functools.lru_cache(maxsize=None)
+def assinatura_codigo():
+    """Hash do código deste módulo (funções de desenho e estilo) e da versão do matplotlib
+
+    A versão vem dos metadados do pacote, sem importar o matplotlib.
+    """
+    with open(__file__, 'rb') as f:
+        codigo = f.read()
+    return hashlib.sha256(codigo + importlib.metadata.version('matplotlib').encode()).hexdigest()
+
+
+def _atualizar_hash(h, valor):
+    """Acrescenta um argumento de desenho ao hash (DataFrame, Series, array, dict ou escalar)"""
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        rotulos = list(valor.columns) if isinstance(valor, pd.DataFrame) else [valor.name]
+        tipos = [str(t) for t in np.atleast_1d(valor.dtypes)]
+        h.update(repr((type(valor).__name__, valor.shape, rotulos, tipos, list(valor.index.names))).encode())
+        h.update(pd.util.hash_pandas_object(valor, index=True).to_numpy().tobytes())
+    elif isinstance(valor, np.ndarray):
+        h.update(repr((valor.dtype.str, valor.shape)).encode())
+        h.update(np.ascontiguousarray(valor).tobytes())
+    elif isinstance(valor, dict):
+        for chave in sorted(valor):
+            h.update(repr(chave).encode())
+            _atualizar_hash(h, valor[chave])
+    else:
+        h.update(repr(valor).encode())
+
+
+def hash_grafico(nome, argumentos, dpi, formato):
+    """Hash das entradas de um gráfico e das configurações que afetam o arquivo gerado"""
+    h = hashlib.sha256()
+    h.update(repr((nome, dpi, formato, assinatura_codigo())).encode())
+    _atualizar_hash(h, argumentos)
+    return h.hexdigest()
+
+
+def carregar_manifesto(diretorio=DIRETORIO_GRAFICOS):
+    """Manifesto dos gráficos gerados ({arquivo: hash, tempo, tamanho}), vazio se não existir"""
+    caminho = os.path.join(diretorio, ARQUIVO_MANIFESTO)
+    try:
+        with open(caminho, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def salvar_manifesto(manifesto, diretorio=DIRETORIO_GRAFICOS):
+    """Grava o manifesto de forma atômica"""
+    os.makedirs(diretorio, exist_ok=True)
+    caminho = os.path.join(diretorio, ARQUIVO_MANIFESTO)
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(temporario, caminho)
+
+
+def grafico_atualizado(manifesto, caminho, hash_atual):
+    """True se o arquivo existe e foi gerado com as mesmas entradas e configurações"""
+    registro = manifesto.get(os.path.basename(caminho))
+    return (registro is not None and registro['hash'] == hash_atual
+            and os.path.exists(caminho) and os.path.getsize(caminho) == registro['bytes'])
+
+
+def registrar_no_manifesto(manifesto, metricas, hash_atual):
+    """Registra no manifesto o hash e as métricas de um gráfico recém-renderizado"""
+    manifesto[os.path.basename(metricas['arquivo'])] = {
+        'grafico': metricas['grafico'],
+        'hash': hash_atual,
+        'dpi': metricas['dpi'],
+        'segundos': metricas['segundos'],
+        'bytes': metricas['bytes'],
+        'gerado_em': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def metricas_reutilizado(nome, caminho, registro):
+    """Métricas de um gráfico não renderizado porque o arquivo existente está atualizado"""
+    return {
+        'grafico': nome,
+        'arquivo': caminho,
+        'formato': os.path.splitext(caminho)[1].lstrip('.'),
+        'dpi': registro['dpi'],
+        'segundos_desenho': 0.0,
+        'segundos_salvar': 0.0,
+        'segundos': 0.0,
+        'bytes': registro['bytes'],
+        'reutilizado': True,
+    }
+
+
+def imprimir_metricas_graficos(metricas):
+    """Exibe tempo de renderização e tamanho de cada gráfico gerado"""
+    if not metricas:
+        return
+    print("\n⏱️ Renderização dos gráficos:")
+    for m in metricas:
+        if m.get('reutilizado'):
+            print(f"   {os.path.basename(m['arquivo'])}: sem alterações, arquivo reutilizado | "
+                  f"{m['bytes'] / 1024:,.0f} KB @ {m['dpi']} dpi")
+            continue
+        print(f"   {os.path.basename(m['arquivo'])}: {m['segundos']:.2f}s "
+              f"(desenho {m['segundos_desenho']:.2f}s + salvar {m['segundos_salvar']:.2f}s) | "
+              f"{m['bytes'] / 1024:,.0f} KB @ {m['dpi']} dpi")
+    importacao = sum(m.get('segundos_importacao', 0) for m in metricas)
+    if importacao >= 0.001:
+        print(f"   Importação do matplotlib (fora dos tempos acima): {importacao:.2f}s")
+    total_segundos = sum(m['segundos'] for m in metricas)
+    total_bytes = sum(m['bytes'] for m in metricas)
+    print(f"   Total: {total_segundos:.2f}s | {total_bytes / 1024:,.0f} KB")
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Detecção de alterações entre execuções, por loja_id
+
+Guarda um snapshot com o hash de cada coluna de cada loja (e do conjunto de
+produtos de cada loja), as agregações por região × categoria e os scores.
+Na execução seguinte, a comparação dos hashes indica quais lojas e colunas
+mudaram, para recalcular só os grupos e scores afetados e renderizar de novo
+só os gráficos cujas entradas mudaram.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from espacial import COLUNAS_VIZINHANCA
+
+VERSAO_ESTADO = 1
+# Identificador e colunas derivadas (recalculadas a partir das demais)
+COLUNAS_IGNORADAS = ('loja_id', 'score_performance') + COLUNAS_VIZINHANCA
+
+
+def colunas_monitoradas(dados_lojas):
+    """Colunas de dados_lojas comparadas entre execuções"""
+    return [c for c in dados_lojas.columns if c not in COLUNAS_IGNORADAS]
+
+
+def hashes_lojas(dados_lojas):
+    """Hash (uint64) de cada coluna monitorada de cada loja, indexado por loja_id"""
+    hashes = {c: pd.util.hash_pandas_object(dados_lojas[c], index=False).to_numpy()
+              for c in colunas_monitoradas(dados_lojas)}
+    return pd.DataFrame(hashes, index=pd.Index(dados_lojas['loja_id'].to_numpy(), name='loja_id'))
+
+
+def hashes_produtos(produtos):
+    """Hash do conjunto de produtos de cada loja, independente da ordem das linhas
+
+    Aceita produtos_detalhados (uma linha por produto) ou o agregado por loja
+    do modo streaming (indexado por loja_id).
+    """
+    if produtos is None:
+        return None
+    if 'loja_id' in produtos.columns:
+        linhas = pd.util.hash_pandas_object(produtos, index=False)
+        chaves = produtos['loja_id'].to_numpy()
+    else:
+        linhas = pd.util.hash_pandas_object(produtos, index=True)
+        chaves = produtos.index.to_numpy()
+    # Soma com overflow (módulo 2**64): combina os hashes sem depender da ordem
+    return linhas.groupby(chaves).sum().rename_axis('loja_id')
+
+
+def assinatura_tipos(dados_lojas):
+    """Tipos das colunas monitoradas; hashes só são comparáveis com os mesmos tipos"""
+    return {c: str(dados_lojas[c].dtype) for c in colunas_monitoradas(dados_lojas)}
+
+
+class DiferencaLojas:
+    """Resultado da comparação entre o snapshot anterior e os dados atuais"""
+
+    def __init__(self, novas, removidas, alteradas, colunas_alteradas, produtos_alterados,
+                 regioes_afetadas, categorias_afetadas, scores_alterados=None):
+        self.novas = novas
+        self.removidas = removidas
+        self.alteradas = alteradas
+        self.colunas_alteradas = colunas_alteradas
+        self.produtos_alterados = produtos_alterados
+        self.regioes_afetadas = regioes_afetadas
+        self.categorias_afetadas = categorias_afetadas
+        # Preenchido depois da atualização dos scores (ver scores_alterados)
+        self.scores_alterados = np.array([]) if scores_alterados is None else scores_alterados
+
+    @property
+    def vazia(self):
+        """Nenhuma loja nova, removida ou alterada (inclusive nos produtos)"""
+        return not (len(self.novas) or len(self.removidas) or len(self.alteradas)
+                    or len(self.produtos_alterados))
+
+    @property
+    def lojas_recalcular(self):
+        """Lojas presentes nos dados atuais cujo score precisa ser recalculado"""
+        return np.union1d(self.novas, self.alteradas)
+
+    def graficos_afetados(self, dependencias, colunas_score):
+        """Gráficos cujas colunas de entrada mudaram
+
+        dependencias: {grafico: colunas lidas}; score_performance é expandido nas
+        colunas dos critérios de pontuação (colunas_score). Gráficos que leem
+        score_performance também são afetados quando algum score mudou sem
+        alteração nos dados (ex.: novos pesos dos critérios).
+        """
+        if len(self.novas) or len(self.removidas):
+            return list(dependencias)
+        afetados = []
+        for nome, colunas in dependencias.items():
+            colunas = set(colunas)
+            if 'score_performance' in colunas:
+                if len(self.scores_alterados):
+                    afetados.append(nome)
+                    continue
+                colunas = (colunas - {'score_performance'}) | set(colunas_score)
+            if colunas & self.colunas_alteradas:
+                afetados.append(nome)
+        return afetados
+
+    def resumo(self):
+        """Resumo legível da diferença"""
+        return (f"{len(self.novas)} novas, {len(self.removidas)} removidas, "
+                f"{len(self.alteradas)} alteradas, {len(self.produtos_alterados)} com produtos alterados")
+
+
+def scores_alterados(estado, dados_lojas):
+    """loja_ids cujo score_performance atual difere do salvo no snapshot"""
+    ids = dados_lojas['loja_id'].to_numpy()
+    anteriores = estado['scores'].reindex(ids).to_numpy()
+    atuais = dados_lojas['score_performance'].to_numpy()
+    return ids[~np.isclose(atuais, anteriores, rtol=0.0, atol=1e-12)]
+
+
+def comparar(estado, dados_lojas, hashes_atuais, hashes_produtos_atuais):
+    """Compara os dados atuais com o snapshot; retorna None se não forem comparáveis"""
+    if estado is None or estado.get('versao') != VERSAO_ESTADO:
+        return None
+    if estado['tipos'] != assinatura_tipos(dados_lojas):
+        return None
+
+    anteriores = estado['hashes']
+    ids_anteriores = anteriores.index.to_numpy()
+    ids_atuais = hashes_atuais.index.to_numpy()
+    novas = np.setdiff1d(ids_atuais, ids_anteriores)
+    removidas = np.setdiff1d(ids_anteriores, ids_atuais)
+    comuns = np.intersect1d(ids_atuais, ids_anteriores)
+
+    diferentes = (hashes_atuais.loc[comuns].to_numpy() != anteriores.loc[comuns, hashes_atuais.columns].to_numpy())
+    alteradas = comuns[diferentes.any(axis=1)]
+    colunas_alteradas = set(hashes_atuais.columns[diferentes.any(axis=0)])
+
+    produtos_alterados = np.array([], dtype=ids_atuais.dtype)
+    if hashes_produtos_atuais is not None and estado.get('hashes_produtos') is not None:
+        ids = hashes_produtos_atuais.index.union(estado['hashes_produtos'].index)
+        atual = hashes_produtos_atuais.reindex(ids, fill_value=0).to_numpy()
+        anterior = estado['hashes_produtos'].reindex(ids, fill_value=0).to_numpy()
+        produtos_alterados = ids.to_numpy()[atual != anterior]
+
+    # Regiões/categorias afetadas: valores atuais das lojas novas/alteradas e
+    # valores anteriores das lojas alteradas/removidas (uma loja pode mudar de região)
+    grupos_anteriores = estado['grupos']
+    mudaram_agora = dados_lojas['loja_id'].isin(np.union1d(novas, alteradas)).to_numpy()
+    mudaram_antes = grupos_anteriores.index.isin(np.union1d(alteradas, removidas))
+    regioes = set(dados_lojas.loc[mudaram_agora, 'regiao']) | set(grupos_anteriores.loc[mudaram_antes, 'regiao'])
+    categorias = (set(dados_lojas.loc[mudaram_agora, 'categoria_principal'])
+                  | set(grupos_anteriores.loc[mudaram_antes, 'categoria_principal']))
+
+    return DiferencaLojas(novas, removidas, alteradas, colunas_alteradas, produtos_alterados,
+                          regioes, categorias)
+
+
+def carregar_estado(caminho):
+    """Lê o snapshot salvo, ou None se não existir ou estiver ilegível"""
+    if not os.path.exists(caminho):
+        return None
+    try:
+        return pd.read_pickle(caminho)
+    except Exception as e:
+        print(f"⚠️ Snapshot incremental ignorado ({e}); será feita uma análise completa")
+        return None
+
+
+def salvar_estado(caminho, dados_lojas, hashes_atuais, hashes_produtos_atuais, agregacoes,
+                  criterios, estatisticas_score):
+    """Grava o snapshot da execução atual de forma atômica"""
+    os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+    estado = {
+        'versao': VERSAO_ESTADO,
+        'tipos': assinatura_tipos(dados_lojas),
+        'hashes': hashes_atuais,
+        'hashes_produtos': hashes_produtos_atuais,
+        'grupos': pd.DataFrame({
+            'regiao': dados_lojas['regiao'].astype(str).to_numpy(),
+            'categoria_principal': dados_lojas['categoria_principal'].astype(str).to_numpy(),
+        }, index=hashes_atuais.index),
+        'cruzado': agregacoes.cruzado,
+        'scores': pd.Series(dados_lojas['score_performance'].to_numpy(), index=hashes_atuais.index),
+        'criterios': [dict(c) for c in criterios],
+        'estatisticas_score': estatisticas_score,
+    }
+    temporario = caminho + '.tmp'
+    pd.to_pickle(estado, temporario)
+    os.replace(temporario, caminho)
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Instrumentação das etapas da análise
+
+Um Rastreador registra cada etapa (e as subetapas aninhadas) com tempo de
+parede, tempo de CPU e pico de memória, e grava o resultado como JSON ou no
+formato de eventos do Chrome (chrome://tracing, Perfetto). Opcionalmente
+envolve etapas escolhidas em cProfile e mede a memória com tracemalloc.
+
+Sem rastreador ativo, as etapas instrumentadas (decorador etapa_instrumentada
+ou bloco with rastreador.etapa) custam apenas um teste de atributo.
+"""
+
+import contextlib
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+from carregamento import pico_memoria_mb
+
+TODAS_ETAPAS = 'todas'
+LINHAS_PERFIL = 15
+# Abaixo disso o matplotlib já estava importado e a importação não é registrada
+LIMIAR_IMPORTACAO = 0.001
+DIRETORIO_PERFIS = '../outputs/perfis'
+
+
+class Rastreador:
+    """Coleta as etapas de uma execução
+
+    perfil: nomes das etapas a envolver em cProfile (ou 'todas'); um arquivo
+    .prof por etapa é gravado em diretorio_perfis.
+    memoria: mede o pico de memória de cada etapa com tracemalloc (mais lento);
+    sem ele, é registrado o pico de RSS do processo ao fim da etapa.
+    """
+
+    ativo = True
+
+    def __init__(self, perfil=(), memoria=False, diretorio_perfis=DIRETORIO_PERFIS):
+        self.perfil = {perfil} if isinstance(perfil, str) else set(perfil)
+        self.memoria = memoria
+        self.diretorio_perfis = diretorio_perfis
+        self.eventos = []
+        self.perfis = {}
+        self._pilha = []
+        self._perfil_ativo = None
+        self._origem = time.perf_counter()
+        self._origem_unix = time.time()
+        if memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _deve_perfilar(self, nome):
+        return self._perfil_ativo is None and (TODAS_ETAPAS in self.perfil or nome in self.perfil)
+
+    @contextlib.contextmanager
+    def etapa(self, nome, categoria='etapa', **argumentos):
+        """Mede o bloco como uma etapa (aninhada na etapa em andamento, se houver)"""
+        if self.memoria:
+            _, pico = tracemalloc.get_traced_memory()
+            if self._pilha:
+                self._pilha[-1]['pico_bytes'] = max(self._pilha[-1]['pico_bytes'], pico)
+            tracemalloc.reset_peak()
+            atual, _ = tracemalloc.get_traced_memory()
+        else:
+            atual = 0
+        quadro = {'base_bytes': atual, 'pico_bytes': atual}
+        self._pilha.append(quadro)
+        perfil = None
+        if self._deve_perfilar(nome):
+            perfil = self._perfil_ativo = cProfile.Profile()
+            perfil.enable()
+        inicio, inicio_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            fim, fim_cpu = time.perf_counter(), time.process_time()
+            if perfil is not None:
+                perfil.disable()
+                self._perfil_ativo = None
+                self._salvar_perfil(nome, perfil)
+            self._pilha.pop()
+            evento = {
+                'nome': nome,
+                'categoria': categoria,
+                'inicio': round(inicio - self._origem, 6),
+                'segundos': round(fim - inicio, 6),
+                'segundos_cpu': round(fim_cpu - inicio_cpu, 6),
+                'profundidade': len(self._pilha),
+                'thread': threading.get_ident(),
+                'processo': os.getpid(),
+            }
+            if self.memoria:
+                _, pico = tracemalloc.get_traced_memory()
+                quadro['pico_bytes'] = max(quadro['pico_bytes'], pico)
+                evento['pico_memoria_mb'] = round((quadro['pico_bytes'] - quadro['base_bytes']) / (1024 * 1024), 3)
+                if self._pilha:
+                    self._pilha[-1]['pico_bytes'] = max(self._pilha[-1]['pico_bytes'], quadro['pico_bytes'])
+            else:
+                evento['pico_rss_mb'] = pico_memoria_mb()
+            if argumentos:
+                evento['argumentos'] = argumentos
+            self.eventos.append(evento)
+
+    def registrar(self, nome, inicio_unix, segundos, categoria='subetapa', processo=None, **argumentos):
+        """Registra uma etapa medida fora do rastreador (ex.: desenho e savefig de um gráfico)
+
+        inicio_unix é o time.time() do início, o que permite registrar etapas
+        executadas em outros processos.
+        """
+        evento = {
+            'nome': nome,
+            'categoria': categoria,
+            'inicio': round(inicio_unix - self._origem_unix, 6),
+            'segundos': round(segundos, 6),
+            'profundidade': len(self._pilha),
+            'thread': threading.get_ident() if processo is None else 0,
+            'processo': os.getpid() if processo is None else processo,
+        }
+        if argumentos:
+            evento['argumentos'] = argumentos
+        self.eventos.append(evento)
+
+    def registrar_grafico(self, metricas):
+        """Subetapas de desenho e savefig a partir das métricas de graficos.renderizar_grafico
+
+        A importação do matplotlib, quando ocorreu neste gráfico, vira uma
+        subetapa própria logo antes do desenho.
+        """
+        inicio = metricas.get('inicio_unix')
+        if inicio is None:
+            return
+        processo = metricas.get('processo')
+        importacao = metricas.get('segundos_importacao')
+        if importacao and importacao >= LIMIAR_IMPORTACAO:
+            self.registrar('matplotlib.importacao', inicio - importacao, importacao,
+                           categoria='grafico', processo=processo)
+        self.registrar(f"{metricas['grafico']}.desenho", inicio, metricas['segundos_desenho'],
+                       categoria='grafico', processo=processo)
+        self.registrar(f"{metricas['grafico']}.savefig", inicio + metricas['segundos_desenho'],
+                       metricas['segundos_salvar'], categoria='grafico', processo=processo,
+                       bytes=metricas['bytes'], dpi=metricas['dpi'])
+
+    def _salvar_perfil(self, nome, perfil):
+        os.makedirs(self.diretorio_perfis, exist_ok=True)
+        caminho = os.path.join(self.diretorio_perfis, f"perfil_{nome}.prof")
+        perfil.dump_stats(caminho)
+        self.perfis[nome] = caminho
+
+    def eventos_ordenados(self):
+        """Eventos em ordem de início (pais antes dos filhos)"""
+        return sorted(self.eventos, key=lambda e: (e['inicio'], -e['segundos']))
+
+    def para_dict(self):
+        return {'origem_unix': self._origem_unix, 'memoria_tracemalloc': self.memoria,
+                'perfis': self.perfis, 'etapas': self.eventos_ordenados()}
+
+    def para_chrome_trace(self):
+        """Eventos completos ('ph': 'X') do formato Trace Event, em microssegundos"""
+        eventos = []
+        for e in self.eventos_ordenados():
+            argumentos = {chave: e[chave] for chave in ('segundos_cpu', 'pico_memoria_mb', 'pico_rss_mb') if chave in e}
+            argumentos.update(e.get('argumentos', {}))
+            eventos.append({'name': e['nome'], 'cat': e['categoria'], 'ph': 'X',
+                            'ts': round(e['inicio'] * 1e6, 1), 'dur': round(e['segundos'] * 1e6, 1),
+                            'pid': e['processo'], 'tid': e['thread'], 'args': argumentos})
+        return {'traceEvents': eventos, 'displayTimeUnit': 'ms'}
+
+    def salvar(self, caminho, formato='json'):
+        """Grava o trace em JSON ('json') ou no formato de eventos do Chrome ('chrome')"""
+        conteudo = self.para_chrome_trace() if formato == 'chrome' else self.para_dict()
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump(conteudo, f, ensure_ascii=False, indent=2 if formato == 'json' else None)
+        return caminho
+
+    def imprimir_resumo(self, profundidade_maxima=1):
+        """Tabela das etapas até a profundidade indicada (0 = só as de nível mais alto)"""
+        print("\n⏱️ Etapas instrumentadas:")
+        for e in self.eventos_ordenados():
+            if e['profundidade'] > profundidade_maxima:
+                continue
+            cpu = f" | CPU {e['segundos_cpu']:.3f}s" if 'segundos_cpu' in e else ''
+            if 'pico_memoria_mb' in e:
+                memoria = f" | pico {e['pico_memoria_mb']:,.1f} MB"
+            elif e.get('pico_rss_mb') is not None:
+                memoria = f" | RSS {e['pico_rss_mb']:,.1f} MB"
+            else:
+                memoria = ''
+            recuo = '   ' + '  ' * e['profundidade']
+            print(f"{recuo}{e['nome']:<{40 - 2 * e['profundidade']}} {e['segundos']:>8.3f}s{cpu}{memoria}")
+        for nome, caminho in self.perfis.items():
+            print(f"\n🔬 Perfil de {nome} ({caminho}):")
+            saida = io.StringIO()
+            pstats.Stats(caminho, stream=saida).sort_stats('cumulative').print_stats(LINHAS_PERFIL)
+            print(saida.getvalue().rstrip())
+
+
+class _RastreadorInativo:
+    """Rastreador desligado: etapas não são medidas nem registradas"""
+
+    ativo = False
+    eventos = ()
+
+    def etapa(self, nome, categoria='etapa', **argumentos):
+        return contextlib.nullcontext()
+
+    def registrar(self, *args, **kwargs):
+        pass
+
+    def registrar_grafico(self, metricas):
+        pass
+
+
+INATIVO = _RastreadorInativo()
+
+
+def etapa_instrumentada(metodo):
+    """Decora um método público para ser medido como etapa pelo self.rastreador"""
+    @functools.wraps(metodo)
+    def envoltorio(self, *args, **kwargs):
+        if not self.rastreador.ativo:
+            return metodo(self, *args, **kwargs)
+        with self.rastreador.etapa(metodo.__name__):
+            return metodo(self, *args, **kwargs)
+    return envoltorio
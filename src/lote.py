@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Análise em lote de várias carteiras de lojas
+
+Cada carteira é um diretório de dados (dados_lojas.csv e
+produtos_detalhados.csv) com a sua própria raiz de saída (gráficos, relatório
+JSON e log do console). As carteiras são distribuídas em um pool de processos
+cujo inicializador importa pandas, matplotlib e seaborn uma única vez por
+processo; cada carteira reaproveita essas importações em vez de iniciar um
+interpretador novo. Um erro em uma carteira é registrado no resultado dela e
+não interrompe as demais.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+ARQUIVO_RESUMO = 'resumo_lote.json'
+ARQUIVO_LOG = 'analise.log'
+ARQUIVO_RELATORIO = 'relatorio.json'
+
+
+class Carteira:
+    """Uma carteira de lojas: nome, diretório de dados e raiz de saída"""
+
+    def __init__(self, nome, diretorio_dados, diretorio_saida):
+        self.nome = nome
+        self.diretorio_dados = os.path.abspath(diretorio_dados)
+        self.diretorio_saida = os.path.abspath(diretorio_saida)
+
+    def para_dict(self):
+        return {'nome': self.nome, 'dados': self.diretorio_dados, 'saida': self.diretorio_saida}
+
+
+def carteiras_de_diretorios(diretorios, raiz_saida):
+    """Uma Carteira por diretório de dados, com saída em raiz_saida/<nome do diretório>"""
+    carteiras = []
+    for diretorio in diretorios:
+        nome = os.path.basename(os.path.normpath(os.path.abspath(diretorio)))
+        carteiras.append(Carteira(nome, diretorio, os.path.join(raiz_saida, nome)))
+    nomes = [c.nome for c in carteiras]
+    repetidos = sorted({n for n in nomes if nomes.count(n) > 1})
+    if repetidos:
+        raise ValueError(f"Carteiras com o mesmo nome de diretório: {', '.join(repetidos)} "
+                         f"(use um manifesto com nomes distintos)")
+    return carteiras
+
+
+def ler_manifesto(caminho):
+    """Carteiras de um JSON [{"nome", "dados", "saida"}]; caminhos relativos ao manifesto"""
+    with open(caminho, encoding='utf-8') as f:
+        itens = json.load(f)
+    base = os.path.dirname(os.path.abspath(caminho))
+    return [Carteira(item['nome'], os.path.join(base, item['dados']), os.path.join(base, item['saida']))
+            for item in itens]
+
+
+def inicializar_worker():
+    """Executado uma vez por processo: importa as bibliotecas pesadas e fixa o backend Agg"""
+    import analise_lojas_joao  # noqa: F401 (pandas e os módulos da análise)
+    import graficos
+    # O matplotlib é carregado sob demanda; aqui ele é importado logo, uma vez por processo
+    graficos.usar_backend_nao_interativo()
+    graficos.carregar_matplotlib()
+
+
+def analisar_carteira(carteira, opcoes):
+    """Executa a análise completa de uma carteira e devolve o resultado (nunca levanta)
+
+    O console da análise é gravado em <saida>/analise.log. opcoes são
+    argumentos extras de AnaliseLojasJoao (modo_carga, dpi, formato...).
+    """
+    from analise_lojas_joao import AnaliseLojasJoao
+
+    inicio, inicio_cpu = time.perf_counter(), time.process_time()
+    resultado = carteira.para_dict()
+    os.makedirs(carteira.diretorio_saida, exist_ok=True)
+    caminho_log = os.path.join(carteira.diretorio_saida, ARQUIVO_LOG)
+    try:
+        with open(caminho_log, 'w', encoding='utf-8') as log, \
+                contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+            analise = AnaliseLojasJoao(modo_batch=True, diretorio_dados=carteira.diretorio_dados,
+                                       diretorio_graficos=os.path.join(carteira.diretorio_saida, 'graficos'),
+                                       **opcoes)
+            if analise.dados_lojas is None:
+                raise FileNotFoundError(f"dados_lojas.csv não carregado de {carteira.diretorio_dados}")
+            analise.gerar_relatorio_completo()
+            analise.salvar_relatorio(os.path.join(carteira.diretorio_saida, ARQUIVO_RELATORIO))
+        resultado.update(status='ok', n_lojas=len(analise.dados_lojas), erro=None)
+    except Exception as e:
+        with open(caminho_log, 'a', encoding='utf-8') as log:
+            traceback.print_exc(file=log)
+        resultado.update(status='erro', n_lojas=None, erro=f"{type(e).__name__}: {e}")
+    resultado.update(segundos=round(time.perf_counter() - inicio, 3),
+                     cpu_segundos=round(time.process_time() - inicio_cpu, 3),
+                     pid=os.getpid(), log=caminho_log)
+    return resultado
+
+
+def executar_lote(carteiras, workers=None, opcoes=None):
+    """Analisa as carteiras em um pool de `workers` processos; resultados na ordem das carteiras
+
+    A queda de um processo do pool (ex.: falta de memória) marca como erro as
+    carteiras que ainda não tinham terminado.
+    """
+    if not carteiras:
+        return []
+    opcoes = opcoes or {}
+    workers = workers or max(1, min(len(carteiras), os.cpu_count() or 1))
+    resultados = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=inicializar_worker) as executor:
+        futuros = {executor.submit(analisar_carteira, carteira, opcoes): i for i, carteira in enumerate(carteiras)}
+        for futuro in as_completed(futuros):
+            i = futuros[futuro]
+            try:
+                resultados[i] = futuro.result()
+            except BrokenProcessPool as e:
+                resultados[i] = dict(carteiras[i].para_dict(), status='erro', n_lojas=None,
+                                     erro=f"Processo do pool encerrado: {e}", segundos=None,
+                                     cpu_segundos=None, pid=None, log=None)
+            imprimir_resultado(resultados[i])
+    return [resultados[i] for i in range(len(carteiras))]
+
+
+def imprimir_resultado(resultado):
+    """Uma linha por carteira concluída"""
+    if resultado['status'] == 'ok':
+        print(f"   ✅ {resultado['nome']}: {resultado['n_lojas']} lojas em {resultado['segundos']:.2f}s "
+              f"(CPU {resultado['cpu_segundos']:.2f}s, processo {resultado['pid']})")
+    else:
+        print(f"   ❌ {resultado['nome']}: {resultado['erro']}"
+              + (f" (log: {resultado['log']})" if resultado['log'] else ""))
+
+
+def salvar_resumo(resultados, caminho, segundos_total, workers):
+    """Grava o resumo do lote (tempo total e resultado de cada carteira) em JSON"""
+    diretorio = os.path.dirname(caminho)
+    if diretorio:
+        os.makedirs(diretorio, exist_ok=True)
+    resumo = {
+        'segundos_total': round(segundos_total, 3),
+        'workers': workers,
+        'ok': sum(r['status'] == 'ok' for r in resultados),
+        'erros': sum(r['status'] != 'ok' for r in resultados),
+        'carteiras': resultados,
+    }
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(resumo, f, ensure_ascii=False, indent=2)
+    return caminho
+
+
+def parse_args(argv=None):
+    """Lê os argumentos de linha de comando"""
+    from analise_lojas_joao import MODOS_CARGA
+    import graficos
+
+    parser = argparse.ArgumentParser(description="Análise em lote de várias carteiras de lojas")
+    parser.add_argument('diretorios', nargs='*',
+                        help="Diretórios de dados, um por carteira (saída em SAIDA/<nome do diretório>)")
+    parser.add_argument('--manifesto', default=None,
+                        help='JSON com [{"nome", "dados", "saida"}] (alternativa aos diretórios)')
+    parser.add_argument('--saida', default='../outputs/lote',
+                        help="Raiz das saídas e do resumo do lote (padrão: %(default)s)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Processos no pool (padrão: número de CPUs, limitado ao de carteiras)")
+    parser.add_argument('--modo-carga', choices=MODOS_CARGA, default='padrao')
+    parser.add_argument('--sem-cache', action='store_true',
+                        help="Ignora o cache colunar e lê sempre os CSVs")
+    parser.add_argument('--dpi', type=int, default=graficos.DPI_PADRAO)
+    parser.add_argument('--formato', choices=graficos.FORMATOS_SAIDA, default='png')
+    args = parser.parse_args(argv)
+    if not args.diretorios and not args.manifesto:
+        parser.error("informe os diretórios das carteiras ou --manifesto")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    carteiras = carteiras_de_diretorios(args.diretorios, args.saida)
+    if args.manifesto:
+        carteiras += ler_manifesto(args.manifesto)
+    if not carteiras:
+        print("🏪 Nenhuma carteira para analisar: nada a fazer")
+        return 0
+    workers = args.workers or min(len(carteiras), os.cpu_count() or 1)
+    opcoes = {'modo_carga': args.modo_carga, 'usar_cache': not args.sem_cache,
+              'dpi': args.dpi, 'formato': args.formato}
+
+    print(f"🏪 Análise em lote: {len(carteiras)} carteiras, {workers} processos")
+    inicio = time.perf_counter()
+    resultados = executar_lote(carteiras, workers, opcoes)
+    segundos_total = time.perf_counter() - inicio
+    caminho = salvar_resumo(resultados, os.path.join(args.saida, ARQUIVO_RESUMO), segundos_total, workers)
+
+    erros = sum(r['status'] != 'ok' for r in resultados)
+    print(f"\n⏱️ Lote concluído em {segundos_total:.2f}s: {len(resultados) - erros} ok, {erros} com erro")
+    print(f"💾 Resumo salvo em {caminho}")
+    return 1 if erros else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
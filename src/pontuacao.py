@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Score de performance das lojas
+
+Cada critério normaliza uma coluna de dados_lojas e recebe um peso. A matriz
+normalizada (lojas × critérios) é calculada uma vez; vários cenários de pesos
+(cenários × critérios) são avaliados com um único produto matricial, o que
+permite testar milhares de ponderações sem recalcular a normalização.
+
+Estratégias de normalização:
+- 'maximo': valor / referência (referência = `escala` ou o máximo da coluna);
+  com maior_melhor=False usa (referência - valor) / referência
+- 'minmax': (valor - mínimo) / (máximo - mínimo)
+- 'zscore': (valor - média) / desvio padrão
+- 'percentil': posição percentual (rank) do valor na coluna
+"""
+
+import numpy as np
+import pandas as pd
+
+NORMALIZACOES = ('maximo', 'minmax', 'zscore', 'percentil')
+
+# Fórmula original do ranking: 40% faturamento, 30% avaliação, 30% frete (menor é melhor)
+CRITERIOS_PADRAO = (
+    {'coluna': 'faturamento_mensal', 'peso': 0.4, 'normalizacao': 'maximo'},
+    {'coluna': 'avaliacao_media', 'peso': 0.3, 'normalizacao': 'maximo', 'escala': 5.0},
+    {'coluna': 'frete_medio', 'peso': 0.3, 'normalizacao': 'maximo', 'maior_melhor': False},
+)
+
+
+def estatisticas_coluna(valores):
+    """Estatísticas usadas pelas normalizações 'maximo', 'minmax' e 'zscore'"""
+    x = np.asarray(valores, dtype='float64')
+    return {'maximo': float(np.nanmax(x)), 'minimo': float(np.nanmin(x)),
+            'media': float(np.nanmean(x)), 'desvio': float(np.nanstd(x))}
+
+
+def estatisticas_criterios(dados, criterios=CRITERIOS_PADRAO):
+    """Referências de normalização de cada critério, na ordem dos critérios
+
+    Só inclui as estatísticas que a normalização do critério realmente usa;
+    se elas não mudam entre duas versões dos dados, os scores das lojas não
+    alteradas também não mudam.
+    """
+    usadas = {'minmax': ('minimo', 'maximo'), 'zscore': ('media', 'desvio')}
+    referencias = []
+    for c in criterios:
+        normalizacao = c.get('normalizacao', 'maximo')
+        if normalizacao == 'maximo':
+            chaves = () if c.get('escala') is not None else ('maximo',)
+        else:
+            chaves = usadas.get(normalizacao, ())
+        estatisticas = estatisticas_coluna(dados[c['coluna']]) if chaves else {}
+        referencias.append({chave: estatisticas[chave] for chave in chaves})
+    return referencias
+
+
+def depende_de_todas_as_lojas(criterios=CRITERIOS_PADRAO):
+    """Indica se algum critério usa rank (percentil), cujo valor muda com qualquer loja"""
+    return any(c.get('normalizacao', 'maximo') == 'percentil' for c in criterios)
+
+
+def normalizar(valores, normalizacao='maximo', maior_melhor=True, escala=None, estatisticas=None):
+    """Normaliza um vetor de valores segundo a estratégia escolhida (sempre "maior = melhor")
+
+    estatisticas: referências já calculadas (ver estatisticas_coluna), para
+    normalizar um subconjunto de lojas na mesma escala do conjunto completo.
+    """
+    x = np.asarray(valores, dtype='float64')
+    if normalizacao == 'percentil':
+        return pd.Series(x if maior_melhor else -x).rank(pct=True).to_numpy()
+    if normalizacao not in NORMALIZACOES:
+        raise ValueError(f"normalizacao deve ser uma de {NORMALIZACOES}, recebido: {normalizacao!r}")
+    if estatisticas is None:
+        estatisticas = estatisticas_coluna(x)
+    if normalizacao == 'maximo':
+        referencia = escala if escala is not None else estatisticas['maximo']
+        if referencia == 0:
+            return np.zeros_like(x)
+        return x / referencia if maior_melhor else (referencia - x) / referencia
+    if normalizacao == 'minmax':
+        minimo, maximo = estatisticas['minimo'], estatisticas['maximo']
+        if maximo == minimo:
+            return np.zeros_like(x)
+        v = (x - minimo) / (maximo - minimo)
+        return v if maior_melhor else 1.0 - v
+    desvio = estatisticas['desvio']
+    if desvio == 0:
+        return np.zeros_like(x)
+    v = (x - estatisticas['media']) / desvio
+    return v if maior_melhor else -v
+
+
+def matriz_normalizada(dados, criterios=CRITERIOS_PADRAO, estatisticas=None):
+    """Matriz (lojas × critérios) com cada coluna normalizada conforme seu critério"""
+    if estatisticas is None:
+        estatisticas = [None] * len(criterios)
+    colunas = [normalizar(dados[c['coluna']],
+                          normalizacao=c.get('normalizacao', 'maximo'),
+                          maior_melhor=c.get('maior_melhor', True),
+                          escala=c.get('escala'),
+                          estatisticas=e)
+               for c, e in zip(criterios, estatisticas)]
+    return np.column_stack(colunas) if colunas else np.empty((len(dados), 0))
+
+
+def matriz_pesos(cenarios, criterios=CRITERIOS_PADRAO):
+    """Converte cenários de pesos em uma matriz (cenários × critérios)
+
+    cenarios pode ser um array 2D na ordem dos critérios, um dict
+    {coluna: peso} (um cenário) ou um DataFrame com uma coluna por critério.
+    """
+    if isinstance(cenarios, dict):
+        cenarios = pd.DataFrame([cenarios])
+    if isinstance(cenarios, pd.DataFrame):
+        cenarios = cenarios.reindex(columns=[c['coluna'] for c in criterios], fill_value=0.0)
+    pesos = np.atleast_2d(np.asarray(cenarios, dtype='float64'))
+    if pesos.shape[1] != len(criterios):
+        raise ValueError(f"cada cenário deve ter {len(criterios)} pesos, recebido: {pesos.shape[1]}")
+    return pesos
+
+
+def calcular_scores(dados, cenarios=None, criterios=CRITERIOS_PADRAO, estatisticas=None):
+    """Scores de todas as lojas em todos os cenários: matriz (lojas × cenários)
+
+    Sem cenários, usa os pesos definidos nos próprios critérios.
+    """
+    if cenarios is None:
+        cenarios = [[c['peso'] for c in criterios]]
+    return matriz_normalizada(dados, criterios, estatisticas) @ matriz_pesos(cenarios, criterios).T
+
+
+def score_performance(dados, criterios=CRITERIOS_PADRAO, estatisticas=None):
+    """Score de cada loja com os pesos dos critérios, como Series alinhada a `dados`"""
+    return pd.Series(calcular_scores(dados, criterios=criterios, estatisticas=estatisticas)[:, 0],
+                     index=dados.index, name='score_performance')
+
+
+def melhor_por_cenario(dados, cenarios, criterios=CRITERIOS_PADRAO, tamanho_bloco=4096):
+    """Posição (iloc) da melhor loja e seu score em cada cenário
+
+    Os cenários são processados em blocos para limitar a memória da matriz
+    lojas × cenários. Retorna (posicoes, scores), ambos com um valor por cenário.
+    """
+    normalizada = matriz_normalizada(dados, criterios)
+    pesos = matriz_pesos(cenarios, criterios)
+    posicoes = np.empty(len(pesos), dtype='int64')
+    scores = np.empty(len(pesos), dtype='float64')
+    for inicio in range(0, len(pesos), tamanho_bloco):
+        bloco = normalizada @ pesos[inicio:inicio + tamanho_bloco].T
+        melhores = bloco.argmax(axis=0)
+        posicoes[inicio:inicio + tamanho_bloco] = melhores
+        scores[inicio:inicio + tamanho_bloco] = bloco[melhores, np.arange(bloco.shape[1])]
+    return posicoes, scores
+
+
+def cenarios_aleatorios(n_cenarios, criterios=CRITERIOS_PADRAO, semente=None):
+    """Gera cenários de pesos aleatórios (não negativos, somando 1) para análise de sensibilidade"""
+    rng = np.random.default_rng(semente)
+    return rng.dirichlet(np.ones(len(criterios)), size=n_cenarios)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Análise de produtos por loja sobre um índice ordenado por loja_id
+
+produtos_detalhados é ordenado uma vez por loja_id (ordenação estável); o
+início e o fim do bloco de cada loja ficam em arrays. Consultas de uma loja
+usam busca binária (O(log n)) e as agregações por loja usam operações
+vetorizadas sobre os blocos (np.add.reduceat, lexsort), sem laços em Python.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class IndiceProdutos:
+    """produtos_detalhados ordenado por loja_id, com os limites de cada loja"""
+
+    def __init__(self, produtos_detalhados):
+        """Ordena os produtos por loja_id (se necessário) e calcula os blocos por loja"""
+        produtos = produtos_detalhados
+        if not produtos['loja_id'].is_monotonic_increasing:
+            ordem = np.argsort(produtos['loja_id'].to_numpy(), kind='stable')
+            produtos = produtos.iloc[ordem]
+        self.produtos = produtos.reset_index(drop=True)
+
+        ids = self.produtos['loja_id'].to_numpy()
+        self.lojas, self.inicios, self.contagens = np.unique(ids, return_index=True, return_counts=True)
+        self.fins = self.inicios + self.contagens
+
+    def __len__(self):
+        return len(self.produtos)
+
+    def limites(self, loja_id):
+        """(inicio, fim) do bloco da loja, por busca binária; (0, 0) se não houver produtos"""
+        posicao = np.searchsorted(self.lojas, loja_id)
+        if posicao >= len(self.lojas) or self.lojas[posicao] != loja_id:
+            return 0, 0
+        return int(self.inicios[posicao]), int(self.fins[posicao])
+
+    def produtos_da_loja(self, loja_id):
+        """Produtos de uma loja (fatia do índice, sem varrer as demais lojas)"""
+        inicio, fim = self.limites(loja_id)
+        return self.produtos.iloc[inicio:fim]
+
+    def resumo_por_loja(self):
+        """Quantidade de produtos, unidades, receita e ticket médio por loja"""
+        if not len(self.produtos):
+            return pd.DataFrame(columns=['n_produtos', 'quantidade_total', 'receita_total', 'ticket_medio'],
+                                index=pd.Index([], name='loja_id'))
+        quantidade = np.add.reduceat(self.produtos['quantidade_vendida'].to_numpy(dtype='int64'), self.inicios)
+        receita = np.add.reduceat(self.produtos['receita_produto'].to_numpy(dtype='float64'), self.inicios)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ticket = np.where(quantidade > 0, receita / quantidade, np.nan)
+        return pd.DataFrame({
+            'n_produtos': self.contagens,
+            'quantidade_total': quantidade,
+            'receita_total': receita,
+            'ticket_medio': ticket,
+        }, index=pd.Index(self.lojas, name='loja_id'))
+
+    def mix_receita(self, nivel='categoria'):
+        """Participação de cada `nivel` (categoria ou produto) na receita de cada loja"""
+        mix = (self.produtos.groupby(['loja_id', nivel], observed=True, sort=True)['receita_produto']
+               .sum().rename('receita').reset_index())
+        total_loja = mix.groupby('loja_id')['receita'].transform('sum')
+        mix['participacao'] = mix['receita'] / total_loja
+        return mix
+
+    def top_produtos(self, n=3):
+        """Os n produtos de maior receita de cada loja, com a posição (1 = maior)"""
+        receita = self.produtos['receita_produto'].to_numpy(dtype='float64')
+        ids = self.produtos['loja_id'].to_numpy()
+        # Ordena por loja e, dentro da loja, por receita decrescente
+        ordem = np.lexsort((-receita, ids))
+        posicao_no_bloco = np.arange(len(ordem)) - np.repeat(self.inicios, self.contagens)
+        selecionados = ordem[posicao_no_bloco < n]
+        top = self.produtos.iloc[selecionados].copy()
+        top['posicao'] = posicao_no_bloco[posicao_no_bloco < n] + 1
+        return top.reset_index(drop=True)
+
+    def verificar_consistencia(self, tolerancia_relativa=0.01, tolerancia_absoluta=0.01, lojas=None):
+        """Produtos cuja receita_produto difere de quantidade_vendida × preco_unitario
+
+        lojas: loja_ids a verificar (padrão: todas).
+        Retorna as linhas divergentes com as colunas receita_esperada e diferenca.
+        """
+        produtos = self.produtos
+        if lojas is not None:
+            produtos = produtos[np.isin(produtos['loja_id'].to_numpy(), np.asarray(lojas))]
+        quantidade = produtos['quantidade_vendida'].to_numpy(dtype='float64')
+        preco = produtos['preco_unitario'].to_numpy(dtype='float64')
+        receita = produtos['receita_produto'].to_numpy(dtype='float64')
+        esperada = quantidade * preco
+        diferenca = receita - esperada
+        limite = np.maximum(tolerancia_absoluta, tolerancia_relativa * np.abs(esperada))
+        divergentes = ~(np.abs(diferenca) <= limite)  # NaN também é divergente
+        resultado = produtos.loc[divergentes].copy()
+        resultado['receita_esperada'] = esperada[divergentes]
+        resultado['diferenca'] = diferenca[divergentes]
+        return resultado
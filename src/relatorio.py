@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Relatório de recomendações como estrutura de dados
+
+montar_relatorio seleciona a loja recomendada, os top-N e as estatísticas
+regionais com operações vetorizadas e devolve um Relatorio; o console
+(imprimir_relatorio) e os arquivos JSON/NDJSON (salvar_relatorios) são apenas
+formas de exibir essa estrutura. relatorios_por_grupo monta um relatório por
+região (ou categoria) com um único groupby para todos os grupos.
+"""
+
+import json
+import os
+import numpy as np
+import pandas as pd
+
+# Campos de cada loja incluídos no relatório, na ordem de exibição
+CAMPOS_LOJA = ('loja_id', 'nome_loja', 'regiao', 'categoria_principal', 'faturamento_mensal',
+               'avaliacao_media', 'frete_medio', 'produtos_vendidos', 'score_performance')
+CAMPOS_REGIAO = {
+    'faturamento_medio': 'faturamento_mensal',
+    'avaliacao_media': 'avaliacao_media',
+    'frete_medio': 'frete_medio',
+}
+TOP_N_PADRAO = 3
+
+
+def colunas_nativas(frame):
+    """Cópia do DataFrame com float32 arredondado para o valor decimal e categorias como object"""
+    frame = frame.copy()
+    for coluna in frame.columns:
+        if frame[coluna].dtype == 'float32':
+            frame[coluna] = frame[coluna].astype('float64').round(6)
+        elif isinstance(frame[coluna].dtype, pd.CategoricalDtype):
+            # np.asarray converte só os códigos presentes, não todas as categorias
+            frame[coluna] = np.asarray(frame[coluna])
+    return frame
+
+
+def registros(frame):
+    """Linhas do DataFrame como dicts de tipos nativos (float32 arredondado para o valor decimal)"""
+    return colunas_nativas(frame).to_dict('records')
+
+
+class LojaResumo:
+    """Dados de uma loja citada no relatório"""
+
+    def __init__(self, loja_id, nome_loja, regiao, categoria_principal, faturamento_mensal,
+                 avaliacao_media, frete_medio, produtos_vendidos, score_performance):
+        self.loja_id = loja_id
+        self.nome_loja = nome_loja
+        self.regiao = regiao
+        self.categoria_principal = categoria_principal
+        self.faturamento_mensal = faturamento_mensal
+        self.avaliacao_media = avaliacao_media
+        self.frete_medio = frete_medio
+        self.produtos_vendidos = produtos_vendidos
+        self.score_performance = score_performance
+
+    @classmethod
+    def de_frame(cls, lojas):
+        """Uma LojaResumo por linha, sem iterar linha a linha no pandas"""
+        return [cls(**registro) for registro in registros(lojas[list(CAMPOS_LOJA)])]
+
+    def para_dict(self):
+        return {campo: getattr(self, campo) for campo in CAMPOS_LOJA}
+
+
+class EstatisticaRegional:
+    """Médias de uma região"""
+
+    def __init__(self, regiao, n_lojas, faturamento_medio, avaliacao_media, frete_medio):
+        self.regiao = regiao
+        self.n_lojas = n_lojas
+        self.faturamento_medio = faturamento_medio
+        self.avaliacao_media = avaliacao_media
+        self.frete_medio = frete_medio
+
+    def para_dict(self):
+        return {'regiao': self.regiao, 'n_lojas': self.n_lojas, 'faturamento_medio': self.faturamento_medio,
+                'avaliacao_media': self.avaliacao_media, 'frete_medio': self.frete_medio}
+
+
+class Relatorio:
+    """Recomendação, destaques e estatísticas regionais de um conjunto de lojas
+
+    resumo_dados: resumo da exploração inicial (AnaliseLojasJoao.resumo_dados),
+    presente apenas no relatório geral.
+    """
+
+    def __init__(self, escopo, n_lojas, recomendacao, top_faturamento, top_avaliacao, regioes,
+                 resumo_dados=None):
+        self.escopo = escopo
+        self.n_lojas = n_lojas
+        self.recomendacao = recomendacao
+        self.top_faturamento = top_faturamento
+        self.top_avaliacao = top_avaliacao
+        self.regioes = regioes
+        self.resumo_dados = resumo_dados
+
+    @property
+    def melhor_regiao(self):
+        """Região de maior faturamento médio"""
+        if not self.regioes:
+            return None
+        return max(self.regioes, key=lambda r: r.faturamento_medio)
+
+    def para_dict(self):
+        melhor = self.melhor_regiao
+        resultado = {
+            'escopo': self.escopo,
+            'n_lojas': self.n_lojas,
+            'recomendacao': self.recomendacao.para_dict(),
+            'top_faturamento': [loja.para_dict() for loja in self.top_faturamento],
+            'top_avaliacao': [loja.para_dict() for loja in self.top_avaliacao],
+            'regioes': [regiao.para_dict() for regiao in self.regioes],
+            'melhor_regiao': melhor.regiao if melhor is not None else None,
+        }
+        if self.resumo_dados is not None:
+            resultado['resumo_dados'] = self.resumo_dados
+        return resultado
+
+
+def _estatisticas_regionais(medias):
+    """EstatisticaRegional de cada linha de um DataFrame indexado por região"""
+    tabela = medias[['n_lojas', *CAMPOS_REGIAO]].round(2).rename_axis('regiao').reset_index()
+    return [EstatisticaRegional(**registro) for registro in registros(tabela)]
+
+
+def medias_regionais(dados_lojas, chaves=('regiao',)):
+    """n_lojas e médias de faturamento, avaliação e frete por `chaves`"""
+    colunas = {destino: (origem, 'mean') for destino, origem in CAMPOS_REGIAO.items()}
+    return dados_lojas.groupby(list(chaves), observed=True, sort=True).agg(
+        n_lojas=('loja_id', 'size'), **colunas)
+
+
+def montar_relatorio(dados_lojas, medias_por_regiao=None, top_n=TOP_N_PADRAO, escopo='todas as lojas',
+                     resumo_dados=None):
+    """Relatório de um conjunto de lojas (com score_performance já calculado)
+
+    medias_por_regiao: resultado de medias_regionais, se já disponível (ex.:
+    derivado das agregações em cache); senão é calculado aqui.
+    resumo_dados: resumo da exploração inicial a incluir no relatório.
+    """
+    if medias_por_regiao is None:
+        medias_por_regiao = medias_regionais(dados_lojas)
+    melhor = dados_lojas.loc[[dados_lojas['score_performance'].idxmax()]]
+    return Relatorio(
+        escopo=escopo,
+        n_lojas=len(dados_lojas),
+        recomendacao=LojaResumo.de_frame(melhor)[0],
+        top_faturamento=LojaResumo.de_frame(dados_lojas.nlargest(top_n, 'faturamento_mensal')),
+        top_avaliacao=LojaResumo.de_frame(dados_lojas.nlargest(top_n, 'avaliacao_media')),
+        regioes=_estatisticas_regionais(medias_por_regiao),
+        resumo_dados=resumo_dados,
+    )
+
+
+def _top_por_grupo(dados_lojas, coluna, ordem, top_n):
+    """As top_n lojas de cada grupo de `coluna` por `ordem` (mesmo desempate de nlargest)"""
+    grupos = pd.factorize(dados_lojas[coluna])[0]
+    posicoes = np.lexsort((np.arange(len(dados_lojas)), -dados_lojas[ordem].to_numpy(dtype='float64'), grupos))
+    # Posição de cada loja dentro do seu grupo, na ordem já classificada
+    grupos_ordenados = grupos[posicoes]
+    inicio_grupo = np.flatnonzero(np.r_[True, grupos_ordenados[1:] != grupos_ordenados[:-1]])
+    posicao_no_grupo = np.arange(len(posicoes)) - np.repeat(inicio_grupo, np.diff(np.r_[inicio_grupo, len(posicoes)]))
+    return dados_lojas.iloc[posicoes[posicao_no_grupo < top_n]]
+
+
+def relatorios_por_grupo(dados_lojas, coluna='regiao', top_n=TOP_N_PADRAO):
+    """Um Relatorio por valor de `coluna` (ex.: regiao, categoria_principal)
+
+    Todas as seleções são feitas de uma vez para todos os grupos (idxmax e
+    top-N por grupo, médias por grupo × região); o laço em Python só monta
+    os objetos, um por grupo.
+    """
+    grupos = dados_lojas.groupby(coluna, observed=True, sort=True)
+    tamanhos = grupos.size()
+    melhores = dados_lojas.loc[grupos['score_performance'].idxmax().to_numpy()]
+    recomendacoes = dict(zip(melhores[coluna].astype(str), LojaResumo.de_frame(melhores)))
+
+    def por_grupo(frame):
+        chaves = frame[coluna].astype(str).to_numpy()
+        lojas = LojaResumo.de_frame(frame)
+        agrupado = {}
+        for chave, loja in zip(chaves, lojas):
+            agrupado.setdefault(chave, []).append(loja)
+        return agrupado
+
+    top_faturamento = por_grupo(_top_por_grupo(dados_lojas, coluna, 'faturamento_mensal', top_n))
+    top_avaliacao = por_grupo(_top_por_grupo(dados_lojas, coluna, 'avaliacao_media', top_n))
+
+    chaves_medias = [coluna] if coluna == 'regiao' else [coluna, 'regiao']
+    medias = medias_regionais(dados_lojas, chaves_medias)
+    tabela = medias[['n_lojas', *CAMPOS_REGIAO]].round(2).reset_index()
+    regioes = {}
+    for chave, registro in zip(tabela[coluna].astype(str), registros(tabela[['regiao', 'n_lojas', *CAMPOS_REGIAO]])):
+        regioes.setdefault(chave, []).append(EstatisticaRegional(**registro))
+
+    return [Relatorio(
+        escopo=f"{coluna}={grupo}",
+        n_lojas=int(n_lojas),
+        recomendacao=recomendacoes[str(grupo)],
+        top_faturamento=top_faturamento[str(grupo)],
+        top_avaliacao=top_avaliacao[str(grupo)],
+        regioes=regioes[str(grupo)],
+    ) for grupo, n_lojas in zip(tamanhos.index, tamanhos.to_numpy())]
+
+
+def salvar_relatorios(relatorios, caminho):
+    """Grava os relatórios em JSON (lista) ou NDJSON (um por linha), conforme a extensão"""
+    dicts = [r.para_dict() for r in relatorios]
+    diretorio = os.path.dirname(caminho)
+    if diretorio:
+        os.makedirs(diretorio, exist_ok=True)
+    if caminho.endswith('.ndjson'):
+        conteudo = '\n'.join(json.dumps(d, ensure_ascii=False) for d in dicts) + '\n'
+    else:
+        conteudo = json.dumps(dicts, ensure_ascii=False, indent=2)
+    with open(caminho, 'w', encoding='utf-8') as f:
+        f.write(conteudo)
+    return caminho
+
+
+def imprimir_relatorio(relatorio):
+    """Exibe o relatório no console (texto de gerar_recomendacoes)"""
+    melhor_loja = relatorio.recomendacao
+    print("\n" + "="*70)
+    print("💡 RECOMENDAÇÕES PARA O SENHOR JOÃO")
+    print("="*70)
+
+    print(f"\n🏆 LOJA RECOMENDADA: {melhor_loja.nome_loja}")
+    print(f"📍 Localização: {melhor_loja.nome_loja}")
+    print(f"💰 Faturamento Mensal: R$ {melhor_loja.faturamento_mensal:,.2f}")
+    print(f"⭐ Avaliação Média: {melhor_loja.avaliacao_media:g}/5.0")
+    print(f"🚚 Frete Médio: R$ {melhor_loja.frete_medio:.2f}")
+    print(f"📦 Produtos Vendidos: {melhor_loja.produtos_vendidos}")
+    print(f"🏪 Categoria Principal: {melhor_loja.categoria_principal}")
+
+    print(f"\n📊 JUSTIFICATIVA DA RECOMENDAÇÃO:")
+    print(f"• Score de Performance: {melhor_loja.score_performance:.3f}")
+    print(f"• Região estratégica: {melhor_loja.regiao}")
+
+    print(f"\n📈 INSIGHTS PRINCIPAIS:")
+
+    print(f"\n💰 TOP {len(relatorio.top_faturamento)} FATURAMENTO:")
+    print("\n".join(f"   {loja.nome_loja}: R$ {loja.faturamento_mensal:,.2f}"
+                    for loja in relatorio.top_faturamento))
+
+    print(f"\n⭐ TOP {len(relatorio.top_avaliacao)} AVALIAÇÃO:")
+    print("\n".join(f"   {loja.nome_loja}: {loja.avaliacao_media:g}/5.0" for loja in relatorio.top_avaliacao))
+
+    print(f"\n🗺️ ANÁLISE GEOGRÁFICA:")
+    melhor_regiao = relatorio.melhor_regiao
+    print(f"   Melhor região por faturamento: {melhor_regiao.regiao}")
+    print(f"   Faturamento médio: R$ {melhor_regiao.faturamento_medio:,.2f}")
+
+    print(f"\n✅ CONCLUSÃO FINAL:")
+    print(f"   Recomendamos a aquisição da {melhor_loja.nome_loja} por apresentar:")
+    print(f"   • Excelente performance geral (score: {melhor_loja.score_performance:.3f})")
+    print(f"   • Bom equilíbrio entre faturamento e satisfação do cliente")
+    print(f"   • Localização estratégica na região {melhor_loja.regiao}")
+    print(f"   • Categoria {melhor_loja.categoria_principal} com bom potencial")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Histórico mensal das lojas: empilhamento dos arquivos e métricas por período
+
+Cada arquivo mensal (ex.: dados_lojas_2024-01.csv) vira um bloco de um frame
+longo loja × mês. As métricas são calculadas sobre uma matriz lojas × meses
+(calendário contínuo, NaN nos meses sem dado) com somas acumuladas e
+deslocamentos de colunas: média móvel, variação mensal e anual e a inclinação
+da tendência linear de cada loja em forma fechada, sem laço sobre os períodos.
+O custo é linear em lojas × meses.
+"""
+
+import glob
+import os
+import re
+import numpy as np
+import pandas as pd
+
+PADRAO_ARQUIVOS = 'dados_lojas_*.csv'
+# Ano e mês no nome do arquivo: 2024-01, 2024_01 ou 202401
+PADRAO_PERIODO = re.compile(r'(\d{4})[-_]?(0[1-9]|1[0-2])')
+JANELA_PADRAO = 3
+MESES_NO_ANO = 12
+
+
+def tendencia_linear(x, y):
+    """Inclinação e intercepto da reta de mínimos quadrados de y em função de x
+
+    x e y podem ser vetores ou matrizes (uma série por linha); NaN em y é
+    ignorado. Usa as somas da forma fechada, sem montar o sistema do polyfit.
+    Retorna NaN onde há menos de dois pontos ou x constante.
+    """
+    y = np.asarray(y, dtype='float64')
+    x = np.broadcast_to(np.asarray(x, dtype='float64'), y.shape)
+    validos = ~(np.isnan(y) | np.isnan(x))
+    n = validos.sum(axis=-1)
+    xv = np.where(validos, x, 0.0)
+    yv = np.where(validos, y, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media_x = xv.sum(axis=-1) / n
+        media_y = yv.sum(axis=-1) / n
+        # Somas centradas: numericamente estáveis mesmo com x grande (ex.: datas)
+        dx = np.where(validos, x - np.expand_dims(media_x, -1), 0.0)
+        dy = np.where(validos, y - np.expand_dims(media_y, -1), 0.0)
+        sxx = (dx * dx).sum(axis=-1)
+        inclinacao = np.where((n >= 2) & (sxx > 0), (dx * dy).sum(axis=-1) / sxx, np.nan)
+    return inclinacao, media_y - inclinacao * media_x
+
+
+def periodo_do_arquivo(caminho):
+    """Mês (pd.Period) indicado no nome do arquivo; ValueError se não houver"""
+    encontrados = PADRAO_PERIODO.findall(os.path.basename(caminho))
+    if not encontrados:
+        raise ValueError(f"Não foi possível identificar o mês (AAAA-MM) no nome de {caminho!r}")
+    ano, mes = encontrados[-1]
+    return pd.Period(year=int(ano), month=int(mes), freq='M')
+
+
+def listar_arquivos_mensais(origem):
+    """[(mês, caminho)] ordenado por mês, a partir de um diretório ou de um padrão glob"""
+    padrao = os.path.join(origem, PADRAO_ARQUIVOS) if os.path.isdir(origem) else origem
+    arquivos = sorted((periodo_do_arquivo(c), c) for c in glob.glob(padrao))
+    if not arquivos:
+        raise FileNotFoundError(f"Nenhum arquivo mensal encontrado em {padrao!r}")
+    meses = [periodo for periodo, _ in arquivos]
+    repetidos = sorted({str(m) for m in meses if meses.count(m) > 1})
+    if repetidos:
+        raise ValueError(f"Mais de um arquivo para o(s) mês(es) {', '.join(repetidos)}")
+    return arquivos
+
+
+def empilhar_meses(frames, meses):
+    """Frame longo loja × mês (coluna 'mes'), ordenado por loja_id e mês"""
+    historico = pd.concat([frame.assign(mes=mes) for frame, mes in zip(frames, meses)], ignore_index=True)
+    # Categorias diferentes entre arquivos viram object no concat; volta a category
+    for coluna, tipo in frames[0].dtypes.items():
+        if isinstance(tipo, pd.CategoricalDtype) and not isinstance(historico[coluna].dtype, pd.CategoricalDtype):
+            historico[coluna] = historico[coluna].astype('category')
+    historico['mes'] = historico['mes'].astype(pd.PeriodDtype('M'))
+    ordem = np.lexsort((historico['mes'].array.asi8, historico['loja_id'].to_numpy()))
+    return historico.iloc[ordem].reset_index(drop=True)
+
+
+def ultimo_mes(historico):
+    """Linhas do mês mais recente (o retrato atual das lojas)"""
+    mes = historico['mes'].max()
+    return historico.loc[historico['mes'] == mes].drop(columns='mes').reset_index(drop=True)
+
+
+class PainelMensal:
+    """Valores de uma coluna do histórico em uma matriz lojas × meses"""
+
+    def __init__(self, historico, coluna='faturamento_mensal'):
+        self.coluna = coluna
+        self.lojas, codigo_loja = np.unique(historico['loja_id'].to_numpy(), return_inverse=True)
+        ordinal = historico['mes'].array.asi8
+        inicio = ordinal.min()
+        self.meses = pd.period_range(historico['mes'].min(), historico['mes'].max(), freq='M')
+        self.valores = np.full((len(self.lojas), len(self.meses)), np.nan)
+        self.valores[codigo_loja, ordinal - inicio] = historico[coluna].to_numpy(dtype='float64')
+
+    def media_movel(self, janela=JANELA_PADRAO):
+        """Média dos últimos `janela` meses (NaN se algum deles não tiver dado)"""
+        presentes = ~np.isnan(self.valores)
+        soma = np.cumsum(np.where(presentes, self.valores, 0.0), axis=1)
+        contagem = np.cumsum(presentes, axis=1)
+        soma[:, janela:] = soma[:, janela:] - soma[:, :-janela]
+        contagem[:, janela:] = contagem[:, janela:] - contagem[:, :-janela]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(contagem == janela, soma / janela, np.nan)
+
+    def variacao(self, defasagem):
+        """Variação relativa em relação a `defasagem` meses antes (1 = mensal, 12 = anual)"""
+        resultado = np.full(self.valores.shape, np.nan)
+        if defasagem < self.valores.shape[1]:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                resultado[:, defasagem:] = self.valores[:, defasagem:] / self.valores[:, :-defasagem] - 1
+        resultado[~np.isfinite(resultado)] = np.nan
+        return resultado
+
+    def longo(self, matrizes):
+        """Converte {nome: matriz lojas × meses} em frame longo, só nas posições com valor"""
+        lojas, meses = np.nonzero(~np.isnan(self.valores))
+        dados = {'loja_id': self.lojas[lojas], 'mes': self.meses[meses], self.coluna: self.valores[lojas, meses]}
+        dados.update({nome: matriz[lojas, meses] for nome, matriz in matrizes.items()})
+        return pd.DataFrame(dados)
+
+    def tendencias(self):
+        """Inclinação (por mês) da tendência linear de cada loja e crescimento relativo"""
+        x = np.arange(len(self.meses), dtype='float64')
+        inclinacao, intercepto = tendencia_linear(x, self.valores)
+        presentes = ~np.isnan(self.valores)
+        n_meses = presentes.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            media = np.where(presentes, self.valores, 0.0).sum(axis=1) / n_meses
+            crescimento = inclinacao / media
+        return pd.DataFrame({
+            'n_meses': n_meses,
+            'inclinacao_mensal': inclinacao,
+            'intercepto': intercepto,
+            'crescimento_mensal': np.where(np.isfinite(crescimento), crescimento, np.nan),
+        }, index=pd.Index(self.lojas, name='loja_id'))
+
+
+def metricas_temporais(historico, coluna='faturamento_mensal', janela=JANELA_PADRAO):
+    """Métricas por loja e mês (média móvel, variações) e tendência por loja
+
+    Retorna (metricas, tendencias): metricas é longo (loja_id, mes, coluna,
+    media_movel_<janela>m, variacao_mensal, variacao_anual); tendencias é
+    indexado por loja_id.
+    """
+    painel = PainelMensal(historico, coluna)
+    metricas = painel.longo({
+        f'media_movel_{janela}m': painel.media_movel(janela),
+        'variacao_mensal': painel.variacao(1),
+        'variacao_anual': painel.variacao(MESES_NO_ANO),
+    })
+    return metricas, painel.tendencias()
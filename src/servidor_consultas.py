@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidor local de consultas (HTTP/JSON) sobre os dados das lojas
+
+Os CSVs são carregados uma única vez (AnaliseLojasJoao); o ModeloConsultas
+mantém em memória os scores, a matriz normalizada dos critérios (para
+ranking com pesos personalizados sem renormalizar), os códigos de região e
+categoria usados nos filtros, as agregações e o resumo de produtos por loja.
+As consultas são respondidas com operações vetorizadas sobre esses arrays e
+os resultados ficam em um cache LRU (os dados não mudam enquanto o servidor
+está no ar). As requisições são atendidas por um pool fixo de threads.
+
+Só usa a biblioteca padrão além das dependências da análise:
+
+    cd src
+    python servidor_consultas.py --porta 8000
+    curl 'http://127.0.0.1:8000/lojas?regiao=Nordeste&categoria=Moda&limite=1'
+    curl 'http://127.0.0.1:8000/ranking?pesos=faturamento_mensal:0.6,avaliacao_media:0.4&limite=10'
+    curl 'http://127.0.0.1:8000/agregados?por=regiao_categoria'
+"""
+
+import argparse
+import functools
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+import pontuacao
+import relatorio
+from analise_lojas_joao import AnaliseLojasJoao, MODOS_CARGA
+
+LIMITE_PADRAO = 10
+LIMITE_MAXIMO = 1000
+TAMANHO_CACHE_PADRAO = 1024
+THREADS_PADRAO = 8
+# Filtros numéricos aceitos em /lojas: parâmetro -> (coluna, comparação)
+FILTROS_NUMERICOS = {
+    'min_faturamento': ('faturamento_mensal', np.greater_equal),
+    'max_faturamento': ('faturamento_mensal', np.less_equal),
+    'min_avaliacao': ('avaliacao_media', np.greater_equal),
+    'max_frete': ('frete_medio', np.less_equal),
+    'min_score': ('score_performance', np.greater_equal),
+}
+COLUNAS_ORDENACAO = ('score_performance', 'faturamento_mensal', 'avaliacao_media', 'produtos_vendidos',
+                     'frete_medio')
+AGRUPAMENTOS = ('regiao', 'categoria', 'regiao_categoria')
+
+
+class ConsultaInvalida(ValueError):
+    """Parâmetro de consulta inválido (respondido com HTTP 400)"""
+
+
+def _sem_nan(valor):
+    """Troca NaN/inf por None (JSON não aceita NaN)"""
+    if isinstance(valor, float) and not math.isfinite(valor):
+        return None
+    if isinstance(valor, dict):
+        return {chave: _sem_nan(v) for chave, v in valor.items()}
+    if isinstance(valor, list):
+        return [_sem_nan(v) for v in valor]
+    return valor
+
+
+def _top_k(valores, k):
+    """Posições dos k maiores valores, em ordem decrescente (empate: menor posição primeiro)"""
+    if k < len(valores):
+        candidatos = np.argpartition(-valores, k - 1)[:k]
+    else:
+        candidatos = np.arange(len(valores))
+    return candidatos[np.lexsort((candidatos, -valores[candidatos]))]
+
+
+class ModeloConsultas:
+    """Estruturas pré-calculadas para responder às consultas sem reprocessar os dados"""
+
+    def __init__(self, analise, tamanho_cache=TAMANHO_CACHE_PADRAO):
+        analise.calcular_score_performance()
+        self.dados = analise.dados_lojas.reset_index(drop=True)
+        self.criterios = analise.criterios_score
+        self.colunas_criterios = [c['coluna'] for c in self.criterios]
+        # Normalização calculada uma vez: um ranking com outros pesos é só um produto matriz × vetor
+        self.normalizada = pontuacao.matriz_normalizada(self.dados, self.criterios)
+        self.valores = {coluna: self.dados[coluna].to_numpy(dtype='float64')
+                        for coluna in {*COLUNAS_ORDENACAO, *(c for c, _ in FILTROS_NUMERICOS.values())}}
+        self.codigos_regiao, self.regioes = pd.factorize(self.dados['regiao'].astype(str))
+        self.codigos_categoria, self.categorias = pd.factorize(self.dados['categoria_principal'].astype(str))
+        # Campos das lojas como arrays de tipos nativos: montar a resposta não passa pelo pandas
+        self.campos_loja = {coluna: np.asarray(valores) for coluna, valores in
+                            relatorio.colunas_nativas(self.dados[list(relatorio.CAMPOS_LOJA)]).items()}
+        self.posicao_loja = pd.Series(np.arange(len(self.dados)), index=self.dados['loja_id'].to_numpy())
+
+        agregacoes = analise.agregacoes
+        self.agregados = {
+            'regiao': self._tabela(agregacoes.por_regiao),
+            'categoria': self._tabela(agregacoes.por_categoria),
+            'regiao_categoria': self._tabela(agregacoes.por_regiao_categoria),
+        }
+        self.produtos_por_loja = None
+        self.indice_produtos = None
+        if analise.produtos_detalhados is not None:
+            self.indice_produtos = analise.indice_produtos
+            self.produtos_por_loja = self.indice_produtos.resumo_por_loja()
+        elif analise.produtos_por_loja is not None:
+            self.produtos_por_loja = analise.produtos_por_loja
+
+        self._consultar = functools.lru_cache(maxsize=tamanho_cache)(self._executar)
+
+    @staticmethod
+    def _tabela(agregado):
+        colunas = ['n_lojas'] + [c for c in agregado.columns if c.endswith('_medio') or c.endswith('_soma')]
+        # Somas de colunas float32 carregam ruído de arredondamento (ex.: 8.300000190734863)
+        return _sem_nan(relatorio.registros(agregado[colunas].round(6).reset_index()))
+
+    def _mascara(self, regiao=None, categoria=None, **limites):
+        """Filtro booleano por região, categoria e limites numéricos"""
+        mascara = np.ones(len(self.dados), dtype=bool)
+        for valor, codigos, conhecidos in ((regiao, self.codigos_regiao, self.regioes),
+                                           (categoria, self.codigos_categoria, self.categorias)):
+            if valor is not None:
+                posicao = conhecidos.get_indexer([valor])[0]
+                mascara &= codigos == posicao if posicao >= 0 else False
+        for parametro, limite in limites.items():
+            coluna, comparacao = FILTROS_NUMERICOS[parametro]
+            mascara &= comparacao(self.valores[coluna], limite)
+        return mascara
+
+    def _lojas(self, posicoes, scores=None):
+        posicoes = np.asarray(posicoes, dtype='int64')
+        colunas = {campo: valores[posicoes].tolist() for campo, valores in self.campos_loja.items()}
+        lojas = [dict(zip(colunas, linha)) for linha in zip(*colunas.values())]
+        if scores is not None:
+            for loja, score in zip(lojas, scores):
+                loja['score_consulta'] = round(float(score), 6)
+        return _sem_nan(lojas)
+
+    def pesos(self, pesos):
+        """Vetor de pesos na ordem dos critérios a partir de {coluna: peso} (ou pares)"""
+        pesos = dict(pesos)
+        desconhecidas = set(pesos) - set(self.colunas_criterios)
+        if desconhecidas:
+            raise ConsultaInvalida(f"Critérios desconhecidos: {', '.join(sorted(desconhecidas))} "
+                                   f"(disponíveis: {', '.join(self.colunas_criterios)})")
+        return pontuacao.matriz_pesos(pesos, self.criterios)[0]
+
+    def _executar(self, tipo, parametros):
+        """Executa uma consulta; parametros é uma tupla ordenada de (nome, valor) para o cache"""
+        p = dict(parametros)
+        if tipo == 'lojas':
+            limites = {k: v for k, v in p.items() if k in FILTROS_NUMERICOS}
+            posicoes = np.flatnonzero(self._mascara(p.get('regiao'), p.get('categoria'), **limites))
+            valores = self.valores[p.get('ordenar', 'score_performance')][posicoes]
+            if p.get('crescente'):
+                valores = -valores
+            selecionadas = posicoes[_top_k(valores, p['limite'])]
+            return {'total': int(len(posicoes)), 'lojas': self._lojas(selecionadas)}
+        if tipo == 'ranking':
+            posicoes = np.flatnonzero(self._mascara(p.get('regiao'), p.get('categoria')))
+            pesos = self.pesos(p['pesos']) if p.get('pesos') else np.array([c['peso'] for c in self.criterios])
+            scores = self.normalizada[posicoes] @ pesos
+            ordem = _top_k(scores, p['limite'])
+            return {'total': int(len(posicoes)),
+                    'pesos': dict(zip(self.colunas_criterios, pesos.tolist())),
+                    'lojas': self._lojas(posicoes[ordem], scores[ordem])}
+        if tipo == 'agregados':
+            return {'por': p['por'], 'grupos': self.agregados[p['por']]}
+        if tipo == 'loja':
+            posicao = self.posicao_loja.get(p['loja_id'])
+            if posicao is None:
+                return None
+            resposta = {'loja': self._lojas([int(posicao)])[0]}
+            if self.produtos_por_loja is not None and p['loja_id'] in self.produtos_por_loja.index:
+                resumo = self.produtos_por_loja.loc[[p['loja_id']]].reset_index()
+                resposta['produtos'] = _sem_nan(relatorio.registros(resumo)[0])
+            if self.indice_produtos is not None:
+                resposta['itens'] = _sem_nan(relatorio.registros(self.indice_produtos.produtos_da_loja(p['loja_id'])))
+            return resposta
+        raise ConsultaInvalida(f"Consulta desconhecida: {tipo}")
+
+    def consultar(self, tipo, **parametros):
+        """Resultado da consulta (do cache LRU quando repetida)"""
+        return self._consultar(tipo, tuple(sorted(parametros.items())))
+
+    def estatisticas_cache(self):
+        info = self._consultar.cache_info()
+        return {'acertos': info.hits, 'falhas': info.misses, 'itens': info.currsize, 'capacidade': info.maxsize}
+
+
+def _texto(parametros, nome, padrao=None):
+    valores = parametros.get(nome)
+    return valores[-1] if valores else padrao
+
+
+def _numero(parametros, nome, tipo=float, padrao=None):
+    valor = _texto(parametros, nome)
+    if valor is None:
+        return padrao
+    try:
+        return tipo(valor)
+    except ValueError:
+        raise ConsultaInvalida(f"{nome} deve ser numérico, recebido: {valor!r}") from None
+
+
+def _limite(parametros):
+    limite = _numero(parametros, 'limite', int, LIMITE_PADRAO)
+    if not 1 <= limite <= LIMITE_MAXIMO:
+        raise ConsultaInvalida(f"limite deve estar entre 1 e {LIMITE_MAXIMO}")
+    return limite
+
+
+def _pesos(texto):
+    """'coluna:peso,coluna:peso' -> tupla ordenada de (coluna, peso)"""
+    pesos = {}
+    for item in filter(None, texto.split(',')):
+        coluna, separador, peso = item.partition(':')
+        if not separador:
+            raise ConsultaInvalida(f"pesos deve ter o formato coluna:peso,... (recebido: {item!r})")
+        try:
+            pesos[coluna.strip()] = float(peso)
+        except ValueError:
+            raise ConsultaInvalida(f"peso de {coluna!r} deve ser numérico, recebido: {peso!r}") from None
+    return tuple(sorted(pesos.items()))
+
+
+def interpretar(caminho, parametros):
+    """Converte caminho + query string em (tipo, parâmetros da consulta)"""
+    partes = [p for p in caminho.split('/') if p]
+    if partes == ['lojas']:
+        consulta = {'regiao': _texto(parametros, 'regiao'), 'categoria': _texto(parametros, 'categoria'),
+                    'ordenar': _texto(parametros, 'ordenar', 'score_performance'),
+                    'crescente': _texto(parametros, 'ordem') == 'crescente', 'limite': _limite(parametros)}
+        if consulta['ordenar'] not in COLUNAS_ORDENACAO:
+            raise ConsultaInvalida(f"ordenar deve ser uma de {COLUNAS_ORDENACAO}")
+        for nome in FILTROS_NUMERICOS:
+            valor = _numero(parametros, nome)
+            if valor is not None:
+                consulta[nome] = valor
+        return 'lojas', consulta
+    if partes == ['ranking']:
+        return 'ranking', {'regiao': _texto(parametros, 'regiao'), 'categoria': _texto(parametros, 'categoria'),
+                           'pesos': _pesos(_texto(parametros, 'pesos', '')), 'limite': _limite(parametros)}
+    if partes == ['agregados']:
+        por = _texto(parametros, 'por', 'regiao')
+        if por not in AGRUPAMENTOS:
+            raise ConsultaInvalida(f"por deve ser um de {AGRUPAMENTOS}")
+        return 'agregados', {'por': por}
+    if len(partes) == 2 and partes[0] == 'lojas':
+        try:
+            return 'loja', {'loja_id': int(partes[1])}
+        except ValueError:
+            raise ConsultaInvalida(f"loja_id deve ser inteiro, recebido: {partes[1]!r}") from None
+    return None, None
+
+
+class ManipuladorConsultas(BaseHTTPRequestHandler):
+    """GET /lojas, /lojas/<id>, /ranking, /agregados e /saude; respostas em JSON"""
+
+    modelo = None
+    registrar_requisicoes = False
+
+    def do_GET(self):
+        inicio = time.perf_counter()
+        url = urlsplit(self.path)
+        if url.path.rstrip('/') == '/saude':
+            return self._responder(200, {'status': 'ok', 'n_lojas': len(self.modelo.dados),
+                                         'cache': self.modelo.estatisticas_cache()})
+        try:
+            tipo, parametros = interpretar(url.path, parse_qs(url.query))
+            if tipo is None:
+                return self._responder(404, {'erro': f"Caminho desconhecido: {url.path}"})
+            resultado = self.modelo.consultar(tipo, **parametros)
+        except ConsultaInvalida as e:
+            return self._responder(400, {'erro': str(e)})
+        except Exception as e:
+            self.log_error("Erro na consulta %s: %r", self.path, e)
+            return self._responder(500, {'erro': f"{type(e).__name__}: {e}"})
+        if resultado is None:
+            return self._responder(404, {'erro': f"Loja não encontrada: {parametros['loja_id']}"})
+        self._responder(200, resultado, time.perf_counter() - inicio)
+
+    def _responder(self, status, conteudo, segundos=None):
+        corpo = json.dumps(conteudo, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        if segundos is not None:
+            self.send_header('X-Tempo-Consulta-Ms', f"{segundos * 1000:.3f}")
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        if self.registrar_requisicoes:
+            super().log_message(formato, *args)
+
+
+class ServidorConsultas(HTTPServer):
+    """HTTPServer que atende cada requisição em um pool fixo de threads"""
+
+    daemon_threads = True
+
+    def __init__(self, endereco, manipulador, threads=THREADS_PADRAO):
+        super().__init__(endereco, manipulador)
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='consulta')
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._atender, request, client_address)
+
+    def _atender(self, request, client_address):
+        # Mesmo fluxo de socketserver.ThreadingMixIn.process_request_thread
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=True)
+
+
+def criar_servidor(modelo, host='127.0.0.1', porta=8000, threads=THREADS_PADRAO, registrar_requisicoes=False):
+    """Servidor pronto para serve_forever(); porta=0 escolhe uma porta livre"""
+    manipulador = type('Manipulador', (ManipuladorConsultas,),
+                       {'modelo': modelo, 'registrar_requisicoes': registrar_requisicoes})
+    return ServidorConsultas((host, porta), manipulador, threads=threads)
+
+
+def parse_args(argv=None):
+    """Lê os argumentos de linha de comando"""
+    parser = argparse.ArgumentParser(description="Servidor local de consultas sobre as lojas")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8000)
+    parser.add_argument('--threads', type=int, default=THREADS_PADRAO,
+                        help="Threads que atendem as requisições (padrão: %(default)s)")
+    parser.add_argument('--cache', type=int, default=TAMANHO_CACHE_PADRAO,
+                        help="Consultas distintas mantidas no cache LRU (padrão: %(default)s)")
+    parser.add_argument('--diretorio-dados', default='../data')
+    parser.add_argument('--modo-carga', choices=MODOS_CARGA, default='tipado')
+    parser.add_argument('--registrar-requisicoes', action='store_true',
+                        help="Exibe uma linha por requisição")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    inicio = time.perf_counter()
+    analise = AnaliseLojasJoao(modo_carga=args.modo_carga, modo_batch=True, diretorio_dados=args.diretorio_dados)
+    if analise.dados_lojas is None:
+        return 1
+    modelo = ModeloConsultas(analise, tamanho_cache=args.cache)
+    servidor = criar_servidor(modelo, args.host, args.porta, args.threads, args.registrar_requisicoes)
+    print(f"\n🚀 Modelo pronto em {time.perf_counter() - inicio:.2f}s: {len(modelo.dados):,} lojas")
+    print(f"🌐 Servindo em http://{args.host}:{servidor.server_address[1]} ({args.threads} threads) "
+          f"- /lojas, /lojas/<id>, /ranking, /agregados, /saude")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Servidor encerrado")
+    finally:
+        servidor.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())